@@ -0,0 +1,192 @@
+"""
+Caching for the catalog API.
+
+Keys embed the league's snapshot_version, which the importers bump in the same
+transaction that publishes new data (see catalog.importers.staging), so nothing is
+ever deleted: a publish makes the old entries unreachable and they age out.
+
+Entries live in the "api" cache (settings.CACHES), which should be a shared store in
+production. A miss is computed by one worker at a time (get_or_compute), so the
+first requests after an import do not all run the same query.
+
+The same version makes strong ETags: CachedResponseMixin answers If-None-Match /
+If-Modified-Since with 304 before a cached or computed response is even looked up.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import time
+from typing import Any, Callable, Final, Iterable
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from catalog.models import League
+
+CACHE_ALIAS: Final[str] = "api"
+
+COUNT_TIMEOUT: Final[int] = 6 * 60 * 60
+RESPONSE_TIMEOUT: Final[int] = 6 * 60 * 60
+
+# a worker computing a miss holds the lock at most this long; the others poll for
+# the result and compute it themselves once LOCK_WAIT has passed
+LOCK_TIMEOUT: Final[int] = 30
+LOCK_WAIT: Final[float] = 10.0
+LOCK_POLL: Final[float] = 0.05
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def normalize_params(
+    params,
+    names: Iterable[str],
+    *,
+    folded: Iterable[str] = (),
+    multi: Iterable[str] = (),
+) -> str:
+    """
+    The non-empty `names` of a QueryDict in a canonical form, so equivalent requests
+    share a key. Like DRF and django-filter, a repeated param counts by its last value,
+    except for `multi` params, whose values are all kept (in any order). `folded`
+    params are compared case-insensitively with whitespace and commas collapsed (how
+    SearchFilter splits terms).
+    """
+    folded = set(folded)
+    multi = set(multi)
+    parts = []
+    for name in sorted(set(names)):
+        values = []
+        for value in params.getlist(name) if name in multi else [params.get(name, "")]:
+            value = value.strip()
+            if name in folded:
+                value = " ".join(value.replace(",", " ").split()).lower()
+            if value:
+                values.append(value)
+        if values:
+            parts.append(f"{name}={'&'.join(sorted(values))}")
+    return "|".join(parts)
+
+
+def versioned_key(prefix: str, league: League, params: str) -> str:
+    digest = hashlib.sha1(params.encode("utf-8")).hexdigest()
+    return f"{prefix}:{league.pk}:{league.snapshot_version}:{digest}"
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: int) -> Any:
+    """
+    The cached value for `key`, else compute() stored under it. Concurrent misses
+    wait for the worker holding the key's lock instead of computing it again.
+    None results are returned but not stored.
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            # the holder failed or its lock expired; take over
+            locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            if locked:
+                break
+
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def cached_count(queryset: QuerySet, key: str | None) -> int:
+    """queryset.count(), reused for `key` until the league publishes again."""
+    if key is None:
+        return queryset.count()
+    return get_or_compute(key, queryset.count, COUNT_TIMEOUT)
+
+
+class CachedResponseMixin:
+    """
+    For API views: cached_response() caches the data of a successful response, keyed
+    by URL, normalized query params and get_cache_version(). Serialized data
+    is stored rather than rendered bytes, so content negotiation still applies.
+    Responses carry an ETag (that key plus the rendered media type) and
+    get_last_modified() as Last-Modified, and matching conditional requests get a 304.
+    Subclasses must define get_cache_version(); one that does not fails when the class
+    is created, i.e. at import time.
+    """
+
+    search_param = "search"
+
+    # required: the version of the data behind the view, part of every key and ETag
+    get_cache_version: Callable[[], str]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "get_cache_version", None)):
+            raise ImproperlyConfigured(
+                f"{cls.__name__} uses CachedResponseMixin but does not define get_cache_version()"
+            )
+
+    def get_last_modified(self) -> dt.datetime | None:
+        return None
+
+    def get_response_cache_key(self, request) -> str:
+        params = normalize_params(request.query_params, request.query_params.keys(), folded=[self.search_param])
+        # host and scheme too: paginated data holds absolute next/previous links
+        url = request.build_absolute_uri(request.path)
+        digest = hashlib.sha1(f"{url}?{params}".encode("utf-8")).hexdigest()
+        return f"response:{type(self).__name__}:{self.get_cache_version()}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        etag = quote_etag(hashlib.sha1(f"{key}|{request.accepted_media_type}".encode("utf-8")).hexdigest())
+        last_modified = self.get_last_modified()
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        validators = {"ETag": etag}
+        if timestamp is not None:
+            validators["Last-Modified"] = http_date(timestamp)
+
+        # the 304 copies ETag/Last-Modified from this stand-in for the current response
+        current = HttpResponse(headers=validators)
+        conditional = get_conditional_response(request._request, etag=etag, last_modified=timestamp, response=current)
+        if conditional is not current:
+            return conditional
+
+        response = self._cached_response(key, handler, request, *args, **kwargs)
+        if response.status_code == 200:
+            for header, value in validators.items():
+                response[header] = value
+        return response
+
+    def _cached_response(self, key: str, handler, request, *args, **kwargs) -> Response:
+        computed: dict[str, Response] = {}
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            computed["response"] = response
+            return response.data if response.status_code == 200 else None
+
+        data = get_or_compute(key, compute, RESPONSE_TIMEOUT)
+        if "response" in computed:
+            return computed["response"]
+        return Response(data)
@@ -0,0 +1,239 @@
+"""
+Shared HTTP client for the importers and tools.
+
+- one keep-alive connection pool per client (requests.Session)
+- gzip/deflate always, br/zstd when brotli/zstandard are installed
+- bodies are streamed to a temp file in fixed-size chunks, never held in memory whole
+- optional on-disk cache: bodies are stored content-addressed (sha256) and each URL
+  keeps its ETag/Last-Modified, so the next GET is conditional and a 304 is served
+  from disk with `not_modified=True`
+
+No Django imports here so the standalone scripts in tools/ can use it too.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Final, cast
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+USER_AGENT: Final[str] = "poe-uniques-importer/1.0 (+django)"
+CHUNK_SIZE: Final[int] = 64 * 1024
+
+
+@dataclass
+class HttpResult:
+    url: str
+    # body on disk: a temp file until stored in the cache, then the cache blob
+    path: Path
+    digest: str
+    # True when the server answered 304 and the body came from the local cache
+    not_modified: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+    temporary: bool = False
+    # body file is gzip-compressed (snapshot archives)
+    gzipped: bool = False
+
+    def open(self) -> IO[bytes]:
+        if self.gzipped:
+            return cast(IO[bytes], gzip.open(self.path, "rb"))
+        return open(self.path, "rb")
+
+    @property
+    def body(self) -> bytes:
+        with self.open() as fh:
+            return fh.read()
+
+    def json(self) -> Any:
+        with self.open() as fh:
+            return json.load(fh)
+
+    def discard(self) -> None:
+        """Delete the temp body if it was never stored in the cache."""
+        if self.temporary:
+            self.temporary = False
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+class ResponseCache:
+    """
+    <dir>/blobs/<sha256 of body>   raw response bodies (decoded transfer encoding)
+    <dir>/urls/<sha256 of url>.json  {"url", "etag", "last_modified", "blob"}
+    <dir>/tmp/                       downloads in progress
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.url_dir = self.root / "urls"
+        self.tmp_dir = self.root / "tmp"
+        for d in (self.blob_dir, self.url_dir, self.tmp_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.url_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest
+
+    def lookup(self, url: str) -> dict[str, Any] | None:
+        path = self._entry_path(url)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not self.blob_path(str(entry.get("blob"))).exists():
+            return None
+        return entry
+
+    def store(self, result: HttpResult) -> None:
+        blob_path = self.blob_path(result.digest)
+        if result.temporary:
+            if blob_path.exists():
+                result.discard()
+            else:
+                shutil.move(str(result.path), blob_path)
+                result.temporary = False
+            result.path = blob_path
+
+        entry = {
+            "url": result.url,
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "blob": result.digest,
+        }
+        atomic_write(self._entry_path(result.url), json.dumps(entry).encode("utf-8"))
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class HttpClient:
+    def __init__(
+        self,
+        *,
+        cache_dir: Path | str | None = None,
+        timeout_s: float = 30,
+        pool_size: int = 8,
+        user_agent: str = USER_AGENT,
+    ) -> None:
+        self.timeout_s = timeout_s
+        self.cache = ResponseCache(Path(cache_dir)) if cache_dir else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(make_headers(accept_encoding=True))
+        self.session.headers.update({"User-Agent": user_agent, "Accept": "application/json"})
+        self._lock = threading.Lock()
+        self._temp_results: list[HttpResult] = []
+
+    def get(self, url: str, *, store: bool = True) -> HttpResult:
+        """
+        GET with validators from the cache. Pass store=False to defer caching until the
+        caller has finished with the body (see `store()`), so a failed write is retried
+        with a full download next time instead of being skipped on a 304.
+        """
+        headers: dict[str, str] = {}
+        # lookup() only returns entries whose blob is on disk, so a 304 has a body to serve
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = str(entry["etag"])
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = str(entry["last_modified"])
+
+        with self.session.get(url, headers=headers, timeout=self.timeout_s, stream=True) as resp:
+            if resp.status_code == 304:
+                digest = str(entry["blob"]) if entry else ""
+                if not (entry and self.cache and self.cache.blob_path(digest).exists()):
+                    # an empty 304 body must never be taken for the payload
+                    raise requests.HTTPError(f"304 Not Modified without a cached body for {url}", response=resp)
+                return HttpResult(
+                    url=url,
+                    path=self.cache.blob_path(digest),
+                    digest=digest,
+                    not_modified=True,
+                    etag=entry.get("etag"),
+                    last_modified=entry.get("last_modified"),
+                )
+
+            resp.raise_for_status()
+            path, digest = self._download(resp)
+
+            result = HttpResult(
+                url=url,
+                path=path,
+                digest=digest,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                temporary=True,
+            )
+
+        with self._lock:
+            self._temp_results.append(result)
+        if store:
+            self.store(result)
+        return result
+
+    def _download(self, resp: requests.Response) -> tuple[Path, str]:
+        tmp_dir = self.cache.tmp_dir if self.cache else None
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, prefix="body-")
+        sha = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    sha.update(chunk)
+                    fh.write(chunk)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return Path(tmp), sha.hexdigest()
+
+    def get_json(self, url: str) -> Any:
+        result = self.get(url)
+        try:
+            return result.json()
+        finally:
+            result.discard()
+
+    def store(self, result: HttpResult) -> None:
+        # Only worth caching if the server gave us something to revalidate with
+        if not self.cache or result.not_modified or not (result.etag or result.last_modified):
+            return
+        with self._lock:
+            self.cache.store(result)
+
+    def close(self) -> None:
+        self.session.close()
+        with self._lock:
+            results, self._temp_results = self._temp_results, []
+        for result in results:
+            result.discard()
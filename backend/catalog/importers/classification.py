@@ -0,0 +1,183 @@
+"""
+Base item classification.
+
+`BaseCatalog` maps base name -> (item class, slot, icon). It is built once per run
+from the poe.ninja BaseType feed, whose lines carry an `itemType` ("Helmet", "Belt",
+"Two Handed Sword", ...), and rows are then classified with a dict lookup.
+
+Bases missing from the feed are classified by the last word of their name ("Rustic
+Sash" -> belt, "Hubris Circlet" -> helmet, "Murder Mitts" -> gloves), then by the
+import type, and the answer is memoized so each name is only worked out once.
+
+The table is cached on disk keyed by the sha256 of the BaseType body, so a run whose
+BaseType request comes back unchanged does not re-parse the feed.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Final, Iterable, Mapping, NamedTuple
+
+from catalog.http_client import atomic_write
+from catalog.models import BaseItem
+
+CATALOG_FORMAT: Final[int] = 1
+CATALOG_FILENAME: Final[str] = "base_catalog.json"
+
+ItemClass = BaseItem.ItemClass
+Slot = BaseItem.Slot
+
+
+class BaseInfo(NamedTuple):
+    item_class: str
+    slot: str
+    icon: str | None = None
+
+
+_WEAPON: Final[tuple[str, str]] = (ItemClass.WEAPON.value, Slot.WEAPON.value)
+
+# poe.ninja BaseType `itemType`, lowercased
+ITEM_TYPES: Final[dict[str, tuple[str, str]]] = {
+    "helmet": (ItemClass.ARMOUR.value, Slot.HELMET.value),
+    "body armour": (ItemClass.ARMOUR.value, Slot.BODY.value),
+    "gloves": (ItemClass.ARMOUR.value, Slot.GLOVES.value),
+    "boots": (ItemClass.ARMOUR.value, Slot.BOOTS.value),
+    "shield": (ItemClass.ARMOUR.value, Slot.SHIELD.value),
+    "quiver": (ItemClass.ARMOUR.value, Slot.OTHER.value),
+    "belt": (ItemClass.ACCESSORY.value, Slot.BELT.value),
+    "ring": (ItemClass.ACCESSORY.value, Slot.RING.value),
+    "amulet": (ItemClass.ACCESSORY.value, Slot.AMULET.value),
+    "jewel": (ItemClass.JEWEL.value, Slot.JEWEL.value),
+    "abyss jewel": (ItemClass.JEWEL.value, Slot.JEWEL.value),
+    "cluster jewel": (ItemClass.JEWEL.value, Slot.JEWEL.value),
+    "flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    "life flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    "mana flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    "hybrid flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    "utility flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    **dict.fromkeys(
+        [
+            "bow", "claw", "dagger", "rune dagger", "wand", "sceptre", "staff", "warstaff",
+            "one handed axe", "one handed mace", "one handed sword", "thrusting one handed sword",
+            "two handed axe", "two handed mace", "two handed sword", "fishing rod",
+        ],
+        _WEAPON,
+    ),
+}
+
+# last word of the base name, lowercased
+NAME_SUFFIXES: Final[dict[str, tuple[str, str]]] = {
+    **dict.fromkeys(
+        [
+            "helmet", "helm", "hood", "cap", "hat", "mask", "circlet", "crown", "burgonet",
+            "bascinet", "sallet", "coif", "pelt", "cage", "tricorne",
+        ],
+        (ItemClass.ARMOUR.value, Slot.HELMET.value),
+    ),
+    **dict.fromkeys(
+        ["gloves", "gauntlets", "mitts", "wraps", "bracers"],
+        (ItemClass.ARMOUR.value, Slot.GLOVES.value),
+    ),
+    **dict.fromkeys(
+        ["boots", "greaves", "slippers", "shoes"],
+        (ItemClass.ARMOUR.value, Slot.BOOTS.value),
+    ),
+    **dict.fromkeys(
+        ["shield", "buckler", "bundle"],
+        (ItemClass.ARMOUR.value, Slot.SHIELD.value),
+    ),
+    "quiver": (ItemClass.ARMOUR.value, Slot.OTHER.value),
+    **dict.fromkeys(["belt", "sash", "vise"], (ItemClass.ACCESSORY.value, Slot.BELT.value)),
+    "ring": (ItemClass.ACCESSORY.value, Slot.RING.value),
+    **dict.fromkeys(["amulet", "talisman"], (ItemClass.ACCESSORY.value, Slot.AMULET.value)),
+    "jewel": (ItemClass.JEWEL.value, Slot.JEWEL.value),
+    "flask": (ItemClass.FLASK.value, Slot.FLASK.value),
+}
+
+# poe.ninja import type -> (item class, slot when nothing better is known)
+IMPORT_TYPES: Final[dict[str, tuple[str, str]]] = {
+    "UniqueArmour": (ItemClass.ARMOUR.value, Slot.BODY.value),
+    "UniqueWeapon": _WEAPON,
+    "UniqueAccessory": (ItemClass.ACCESSORY.value, Slot.OTHER.value),
+    "UniqueFlask": (ItemClass.FLASK.value, Slot.FLASK.value),
+    "UniqueJewel": (ItemClass.JEWEL.value, Slot.JEWEL.value),
+}
+
+
+def classify_name(base_name: str) -> tuple[str, str] | None:
+    words = base_name.lower().split()
+    return NAME_SUFFIXES.get(words[-1]) if words else None
+
+
+class BaseCatalog:
+    def __init__(self, entries: Mapping[str, BaseInfo] | None = None) -> None:
+        self.entries: dict[str, BaseInfo] = dict(entries or {})
+        # names classified from suffix/import type during this run, keyed by (name, import type)
+        self._derived: dict[tuple[str, str], BaseInfo] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[Mapping[str, Any]]) -> BaseCatalog:
+        entries: dict[str, BaseInfo] = {}
+        for row in lines:
+            name = str(row.get("name") or row.get("baseType") or row.get("typeLine") or "").strip()
+            if not name:
+                continue
+            icon = str(row.get("icon") or "").strip() or None
+            known = ITEM_TYPES.get(str(row.get("itemType") or "").strip().lower()) or classify_name(name)
+
+            prev = entries.get(name)
+            if known:
+                entries[name] = BaseInfo(known[0], known[1], icon or (prev.icon if prev else None))
+            elif prev is None:
+                # icon only; class/slot are left to the per-row fallbacks
+                entries[name] = BaseInfo("", "", icon)
+            elif icon and not prev.icon:
+                entries[name] = prev._replace(icon=icon)
+        return cls(entries)
+
+    def icon(self, base_name: str) -> str | None:
+        info = self.entries.get(base_name)
+        return info.icon if info else None
+
+    def classify(self, base_name: str, import_type: str) -> BaseInfo:
+        info = self.entries.get(base_name)
+        if info is not None and info.item_class:
+            return info
+
+        key = (base_name, import_type)
+        derived = self._derived.get(key)
+        if derived is None:
+            by_type = IMPORT_TYPES.get(import_type, (ItemClass.OTHER.value, Slot.OTHER.value))
+            by_name = classify_name(base_name)
+            # the name only picks the slot within the import type's class ("... Ring" in
+            # UniqueJewel stays a jewel)
+            if by_name and (by_name[0] == by_type[0] or import_type not in IMPORT_TYPES):
+                item_class, slot = by_name
+            else:
+                item_class, slot = by_type
+            derived = self._derived[key] = BaseInfo(item_class, slot, info.icon if info else None)
+        return derived
+
+    @classmethod
+    def load(cls, path: Path, *, digest: str) -> BaseCatalog | None:
+        """The cached table at `path` if it was built from a body with `digest`."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != CATALOG_FORMAT or data.get("digest") != digest:
+            return None
+        return cls({name: BaseInfo(*info) for name, info in data.get("bases", {}).items()})
+
+    def save(self, path: Path, *, digest: str) -> None:
+        data = {
+            "format": CATALOG_FORMAT,
+            "digest": digest,
+            "bases": {name: list(info) for name, info in self.entries.items()},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
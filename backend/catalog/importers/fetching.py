@@ -0,0 +1,133 @@
+"""
+Concurrent, rate-limited fetch stage for the importers.
+
+All URLs are downloaded on a small thread pool behind one shared token bucket, and
+results are yielded as they complete so the caller can write already-downloaded
+types to the DB while the rest are still in flight. DB work stays on the caller's
+thread; worker threads only do HTTP.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Final, Hashable, Iterator, Mapping, TypeVar
+from urllib.error import HTTPError, URLError
+
+import requests
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+RETRYABLE_STATUS: Final[frozenset[int]] = frozenset({408, 425, 429, 500, 502, 503, 504})
+MAX_RETRY_AFTER_S: Final[float] = 60.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up.
+    A rate <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_s = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def _retry_delay(exc: Exception, attempt: int, backoff_s: float) -> float | None:
+    """
+    Seconds to wait before retrying, or None if the error is not worth retrying.
+    """
+    status: int | None = None
+    headers: Mapping[str, str] | None = None
+
+    if isinstance(exc, HTTPError):
+        status, headers = exc.code, exc.headers
+    elif isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status, headers = exc.response.status_code, exc.response.headers
+    elif not isinstance(
+        exc,
+        (URLError, TimeoutError, ConnectionError, requests.ConnectionError, requests.Timeout),
+    ):
+        return None
+
+    if status is not None:
+        if status not in RETRYABLE_STATUS:
+            return None
+        retry_after = headers.get("Retry-After") if headers else None
+        if retry_after:
+            try:
+                return min(MAX_RETRY_AFTER_S, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+
+    # exponential backoff with jitter
+    return backoff_s * (2 ** attempt) * (0.5 + random.random())
+
+
+def fetch_with_retry(
+    fetch: Callable[[str], T],
+    url: str,
+    *,
+    limiter: TokenBucket,
+    retries: int = 3,
+    backoff_s: float = 1.0,
+) -> T:
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return fetch(url)
+        except Exception as exc:
+            delay = _retry_delay(exc, attempt, backoff_s)
+            if delay is None or attempt >= retries:
+                raise
+        attempt += 1
+        time.sleep(delay)
+
+
+def fetch_concurrently(
+    fetch: Callable[[str], T],
+    urls: Mapping[K, str],
+    *,
+    limiter: TokenBucket,
+    max_workers: int = 4,
+    retries: int = 3,
+    backoff_s: float = 1.0,
+) -> Iterator[tuple[K, T]]:
+    """
+    Yield (key, result) in completion order. The first failure (after retries)
+    is raised and the remaining downloads are cancelled.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="fetch")
+    try:
+        pending: dict[Future[T], K] = {
+            executor.submit(fetch_with_retry, fetch, url, limiter=limiter, retries=retries, backoff_s=backoff_s): key
+            for key, url in urls.items()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = pending.pop(fut)
+                yield key, fut.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
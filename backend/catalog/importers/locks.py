@@ -0,0 +1,40 @@
+"""
+Cross-process league locks.
+
+A Postgres session-level advisory lock keyed by league id is held for the whole of a
+league import, so import_poeninja runs (cron, manual, the scheduler) never write the
+same league at the same time. The lock dies with the connection, so a killed process
+cannot leave a league locked.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Final, Iterator
+
+from django.db import connection
+
+# first key of the two-int advisory lock form; the second is the league id
+LEAGUE_IMPORT_LOCK: Final[int] = 0x504E494D  # "PNIM"
+
+
+class LeagueBusyError(Exception):
+    pass
+
+
+@contextmanager
+def league_import_lock(league_id: int, league_name: str = "") -> Iterator[None]:
+    """Hold the import lock for a league, or raise LeagueBusyError if another process has it."""
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [LEAGUE_IMPORT_LOCK, league_id])
+        if not cursor.fetchone()[0]:
+            raise LeagueBusyError(f"Another import of league {league_name or league_id} is running")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [LEAGUE_IMPORT_LOCK, league_id])
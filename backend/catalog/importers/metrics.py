@@ -0,0 +1,225 @@
+"""
+Per-phase timings for import runs.
+
+Each timing is keyed by (league, type, phase) and accumulates wall time, DB queries
+issued through Django's connection and rows processed. Phases used by import_poeninja:
+
+    fetch       HTTP download (worker threads; no queries)
+    decode      JSON decoding, row building and hashing while streaming into staging
+    stage_copy  COPY of staged batches
+    base_items  BaseItem merge and base id resolution
+    uniques / stats / presence   the set-based merges (stats includes price history)
+    shadow      per-type copy into the shadow tables with --atomic (stats/presence then
+                run once per league, at publish)
+    rollups     daily OHLC rebuild, once per league
+    catalog     UniqueItemLeagueCatalog refresh, once per league
+
+Timings are plain dicts on the way out so league worker processes can return them.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Final, Iterable, Iterator, TypeVar
+
+from django.db import connection
+
+T = TypeVar("T")
+
+PROMETHEUS_PREFIX: Final[str] = "poe_import"
+
+
+@dataclass
+class PhaseTiming:
+    league: str
+    import_type: str
+    phase: str
+    seconds: float = 0.0
+    queries: int = 0
+    rows: int = 0
+    nbytes: int = 0
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        return round(self.rows / self.seconds, 1) if self.rows and self.seconds > 0 else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "seconds": round(self.seconds, 4), "rows_per_sec": self.rows_per_sec}
+
+
+class ImportMetrics:
+    def __init__(self) -> None:
+        self._timings: dict[tuple[str, str, str], PhaseTiming] = {}
+        self._lock = threading.Lock()
+
+    def _timing(self, league: str, import_type: str, phase: str) -> PhaseTiming:
+        key = (league, import_type, phase)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = PhaseTiming(league, import_type, phase)
+            return timing
+
+    def add(
+        self,
+        phase: str,
+        seconds: float,
+        *,
+        league: str = "",
+        import_type: str = "",
+        rows: int = 0,
+        queries: int = 0,
+        nbytes: int = 0,
+    ) -> None:
+        timing = self._timing(league, import_type, phase)
+        with self._lock:
+            timing.seconds += seconds
+            timing.rows += rows
+            timing.queries += queries
+            timing.nbytes += nbytes
+
+    def scope(self, league: str = "", import_type: str = "") -> MetricsScope:
+        return MetricsScope(self, league, import_type)
+
+    def timings(self) -> list[PhaseTiming]:
+        with self._lock:
+            return list(self._timings.values())
+
+    def as_rows(self) -> list[dict[str, Any]]:
+        return [t.as_dict() for t in self.timings()]
+
+    def extend(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Fold in `as_rows()` output from another process."""
+        for row in rows:
+            self.add(
+                row["phase"],
+                row["seconds"],
+                league=row["league"],
+                import_type=row["import_type"],
+                rows=row["rows"],
+                queries=row["queries"],
+                nbytes=row.get("nbytes", 0),
+            )
+
+    def by_phase(self) -> dict[str, dict[str, Any]]:
+        """
+        Totals per phase across leagues and types (the persisted run summary). Phases
+        that run concurrently (fetch, parallel leagues) can sum to more than wall time.
+        """
+        out: dict[str, dict[str, Any]] = {}
+        for t in self.timings():
+            agg = out.setdefault(t.phase, {"seconds": 0.0, "queries": 0, "rows": 0, "nbytes": 0})
+            agg["seconds"] += t.seconds
+            agg["queries"] += t.queries
+            agg["rows"] += t.rows
+            agg["nbytes"] += t.nbytes
+        for agg in out.values():
+            agg["seconds"] = round(agg["seconds"], 4)
+        return out
+
+
+class MetricsScope:
+    """ImportMetrics bound to one league/type."""
+
+    def __init__(self, metrics: ImportMetrics, league: str, import_type: str) -> None:
+        self.metrics = metrics
+        self.league = league
+        self.import_type = import_type
+
+    @contextmanager
+    def phase(self, phase: str, *, rows: int = 0) -> Iterator[PhaseTiming]:
+        """
+        Time the block and count the queries it runs on this thread's connection.
+        Set `.rows` on the yielded timing to record rows discovered inside the block.
+        """
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        out = PhaseTiming(self.league, self.import_type, phase, rows=rows)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                yield out
+        finally:
+            self.metrics.add(
+                phase,
+                time.perf_counter() - start,
+                league=self.league,
+                import_type=self.import_type,
+                rows=out.rows,
+                queries=queries,
+            )
+
+    def timed_iter(self, items: Iterable[T], phase: str, *, count: Callable[[T], int]) -> Iterator[T]:
+        """
+        Re-yield `items`, charging the time spent producing each one (not the time the
+        consumer spends on it) to `phase`. `count(item)` gives the rows per item.
+        """
+        it = iter(items)
+        seconds = 0.0
+        rows = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    seconds += time.perf_counter() - start
+                    return
+                seconds += time.perf_counter() - start
+                rows += count(item)
+                yield item
+        finally:
+            self.metrics.add(phase, seconds, league=self.league, import_type=self.import_type, rows=rows)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(
+    metrics: ImportMetrics,
+    *,
+    started_at: float,
+    finished_at: float,
+    totals: dict[str, int],
+    success: bool,
+) -> str:
+    """Render a node_exporter textfile-collector snapshot of one run."""
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {p}_last_run_timestamp_seconds Unix time the last import run finished.",
+        f"# TYPE {p}_last_run_timestamp_seconds gauge",
+        f"{p}_last_run_timestamp_seconds {finished_at:.3f}",
+        f"# HELP {p}_last_run_duration_seconds Wall time of the last import run.",
+        f"# TYPE {p}_last_run_duration_seconds gauge",
+        f"{p}_last_run_duration_seconds {finished_at - started_at:.3f}",
+        f"# HELP {p}_last_run_success 1 if the last import run finished without error.",
+        f"# TYPE {p}_last_run_success gauge",
+        f"{p}_last_run_success {int(success)}",
+        f"# HELP {p}_last_run_rows Row counts of the last import run by outcome.",
+        f"# TYPE {p}_last_run_rows gauge",
+    ]
+    lines += [f'{p}_last_run_rows{{kind="{_label(k)}"}} {n}' for k, n in sorted(totals.items())]
+
+    series = (
+        ("phase_seconds", "Wall time per league/type/phase in the last run.", "seconds"),
+        ("phase_queries", "DB queries per league/type/phase in the last run.", "queries"),
+        ("phase_rows", "Rows per league/type/phase in the last run.", "rows"),
+    )
+    timings = sorted(metrics.timings(), key=lambda t: (t.league, t.import_type, t.phase))
+    for name, help_text, attr in series:
+        lines.append(f"# HELP {p}_{name} {help_text}")
+        lines.append(f"# TYPE {p}_{name} gauge")
+        for t in timings:
+            labels = f'league="{_label(t.league)}",type="{_label(t.import_type)}",phase="{_label(t.phase)}"'
+            value = getattr(t, attr)
+            lines.append(f"{p}_{name}{{{labels}}} {value:.4f}" if attr == "seconds" else f"{p}_{name}{{{labels}}} {value}")
+    return "\n".join(lines) + "\n"
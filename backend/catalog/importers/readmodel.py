@@ -0,0 +1,150 @@
+"""
+Maintenance of UniqueItemLeagueCatalog, the read model behind the uniques list.
+
+A refresh rebuilds entries from presence, UniqueItem, BaseItem, the league's stats and
+UniqueAncientMeta in one INSERT ... ON CONFLICT, and only rewrites entries whose
+values differ, so refreshing an unchanged league writes nothing. Only listed presence
+counts: entries of uniques no longer present in the league, or delisted from it
+(--mark-unseen), are deleted.
+
+import_poeninja refreshes a league after writing it (inside the publish transaction
+with --atomic); import_ancient_meta refreshes the uniques it touched in every league.
+Static fields of a unique shared with other leagues catch up on those leagues' next
+refresh.
+"""
+
+from __future__ import annotations
+
+from typing import Final
+
+from django.db import connection
+
+from catalog.models import (
+    BaseItem,
+    UniqueAncientMeta,
+    UniqueItem,
+    UniqueItemLeagueCatalog,
+    UniqueItemLeaguePresence,
+    UniqueItemLeagueStats,
+)
+
+# copied columns, in INSERT order; league_id/unique_item_id/refreshed_at are handled separately
+CATALOG_COLUMNS: Final[list[str]] = [
+    "name",
+    "required_level",
+    "image_url",
+    "flavour_text",
+    "created_at",
+    "base_item_id",
+    "base_name",
+    "item_class",
+    "slot",
+    "base_icon_url",
+    "ancient_meta",
+    "ancient_tier",
+    "ancient_rank",
+    "chaos_value",
+    "divine_value",
+    "listing_count",
+]
+
+
+def _scope_sql(alias: str, *, league_id: int | None, unique_ids: list[int] | None) -> str:
+    clauses = []
+    if league_id is not None:
+        clauses.append(f"{alias}.league_id = %(league_id)s")
+    if unique_ids is not None:
+        clauses.append(f"{alias}.unique_item_id = ANY(%(unique_ids)s)")
+    return " AND ".join(clauses) or "TRUE"
+
+
+def catalog_league_ids(unique_ids: list[int]) -> list[int]:
+    """Leagues with catalog entries for any of `unique_ids`."""
+    return list(
+        UniqueItemLeagueCatalog.objects.filter(unique_item_id__in=unique_ids)
+        .values_list("league_id", flat=True)
+        .distinct()
+    )
+
+
+def refresh_catalog(*, league_id: int | None = None, unique_ids: list[int] | None = None) -> int:
+    """
+    Rebuild catalog entries for one league and/or some uniques (everything when both
+    are None). Returns the number of entries written or deleted.
+    """
+    catalog_table = UniqueItemLeagueCatalog._meta.db_table
+    presence_table = UniqueItemLeaguePresence._meta.db_table
+    unique_table = UniqueItem._meta.db_table
+    base_table = BaseItem._meta.db_table
+    stats_table = UniqueItemLeagueStats._meta.db_table
+    meta_table = UniqueAncientMeta._meta.db_table
+
+    params = {
+        "league_id": league_id,
+        "unique_ids": unique_ids,
+        "untiered": UniqueItemLeagueCatalog.RANK_UNTIERED,
+        "no_ancient": UniqueItemLeagueCatalog.RANK_NO_ANCIENT,
+    }
+    cols = ", ".join(CATALOG_COLUMNS)
+    changed = " OR ".join(f"c.{col} IS DISTINCT FROM EXCLUDED.{col}" for col in CATALOG_COLUMNS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {catalog_table} AS c (league_id, unique_item_id, {cols}, refreshed_at)
+            SELECT
+                p.league_id,
+                u.id,
+                u.name,
+                u.required_level,
+                u.image_url,
+                u.flavour_text,
+                u.created_at,
+                b.id,
+                b.name,
+                b.item_class,
+                b.slot,
+                b.icon_url,
+                CASE WHEN m.id IS NULL THEN NULL ELSE jsonb_build_object(
+                    'pool', m.pool,
+                    'tier', m.tier,
+                    'chance', m.chance,
+                    'avg_orbs', m.avg_orbs,
+                    'min_ilvl', m.min_ilvl,
+                    'source', m.source
+                ) END,
+                m.tier,
+                CASE WHEN m.id IS NULL THEN %(no_ancient)s ELSE COALESCE(m.tier, %(untiered)s) END,
+                s.chaos_value,
+                s.divine_value,
+                s.listing_count,
+                now()
+            FROM {presence_table} p
+            JOIN {unique_table} u ON u.id = p.unique_item_id
+            JOIN {base_table} b ON b.id = u.base_item_id
+            LEFT JOIN {stats_table} s ON s.unique_item_id = p.unique_item_id AND s.league_id = p.league_id
+            LEFT JOIN {meta_table} m ON m.unique_item_id = p.unique_item_id
+            WHERE {_scope_sql("p", league_id=league_id, unique_ids=unique_ids)}
+              AND p.delisted_at IS NULL
+            ON CONFLICT (league_id, unique_item_id) DO UPDATE SET
+                {", ".join(f"{col} = EXCLUDED.{col}" for col in CATALOG_COLUMNS)},
+                refreshed_at = EXCLUDED.refreshed_at
+            WHERE {changed}
+            """,
+            params,
+        )
+        written = cursor.rowcount
+
+        cursor.execute(
+            f"""
+            DELETE FROM {catalog_table} c
+            WHERE {_scope_sql("c", league_id=league_id, unique_ids=unique_ids)}
+              AND NOT EXISTS (
+                SELECT 1 FROM {presence_table} p
+                WHERE p.unique_item_id = c.unique_item_id AND p.league_id = c.league_id
+                  AND p.delisted_at IS NULL
+              )
+            """,
+            params,
+        )
+        return written + cursor.rowcount
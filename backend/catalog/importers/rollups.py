@@ -0,0 +1,97 @@
+"""
+Daily OHLC rollups of the price history.
+
+After a league import, only the uniques whose price moved in this run (the ids the
+stats merge reports as changed) get their row for the current day rebuilt from that
+day's history points. The last point before midnight is carried in as the
+opening value, so a day whose first change happens in the afternoon still opens at
+the previous close. The carried point only sets the open (and high/low/avg of a day
+without points of its own); averages and `points` count the day's own points.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import Iterable
+
+from django.db import connection
+from django.utils import timezone
+
+from catalog.models import UniqueItemDailyPrice, UniqueItemPriceHistory
+
+
+def rollup_daily_prices(*, league_id: int, now: dt.datetime, unique_ids: Iterable[int]) -> int:
+    """
+    Rebuild the rollup rows of the day of `now` for `unique_ids`. Returns the number
+    of rows written.
+    """
+    unique_ids = sorted(unique_ids)
+    if not unique_ids:
+        return 0
+
+    history_table = UniqueItemPriceHistory._meta.db_table
+    daily_table = UniqueItemDailyPrice._meta.db_table
+
+    day = timezone.localdate(now)
+    day_start = timezone.make_aware(dt.datetime.combine(day, dt.time.min))
+    day_end = day_start + dt.timedelta(days=1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH touched AS (
+                SELECT unnest(%(unique_ids)s::bigint[]) AS unique_item_id
+            ),
+            points AS (
+                SELECT h.unique_item_id, h.bucket, false AS carried, h.chaos_value, h.listing_count
+                FROM {history_table} h
+                JOIN touched t ON t.unique_item_id = h.unique_item_id
+                WHERE h.league_id = %(league_id)s AND h.bucket >= %(day_start)s AND h.bucket < %(day_end)s
+                UNION ALL
+                SELECT t.unique_item_id, %(day_start)s, true, prev.chaos_value, prev.listing_count
+                FROM touched t
+                CROSS JOIN LATERAL (
+                    SELECT h.chaos_value, h.listing_count
+                    FROM {history_table} h
+                    WHERE h.unique_item_id = t.unique_item_id
+                      AND h.league_id = %(league_id)s
+                      AND h.bucket < %(day_start)s
+                    ORDER BY h.bucket DESC
+                    LIMIT 1
+                ) AS prev
+            )
+            INSERT INTO {daily_table}
+                (unique_item_id, league_id, day, open_chaos, high_chaos, low_chaos, close_chaos,
+                 avg_chaos, avg_listing_count, points)
+            SELECT unique_item_id, %(league_id)s, %(day)s,
+                   (array_agg(chaos_value ORDER BY bucket, carried DESC))[1],
+                   CASE WHEN bool_and(carried) THEN max(chaos_value)
+                        ELSE max(chaos_value) FILTER (WHERE NOT carried) END,
+                   CASE WHEN bool_and(carried) THEN min(chaos_value)
+                        ELSE min(chaos_value) FILTER (WHERE NOT carried) END,
+                   (array_agg(chaos_value ORDER BY bucket DESC, carried))[1],
+                   round(CASE WHEN bool_and(carried) THEN avg(chaos_value)
+                              ELSE avg(chaos_value) FILTER (WHERE NOT carried) END, 2),
+                   round(CASE WHEN bool_and(carried) THEN avg(listing_count)
+                              ELSE avg(listing_count) FILTER (WHERE NOT carried) END, 1),
+                   count(*) FILTER (WHERE NOT carried)
+            FROM points
+            GROUP BY unique_item_id
+            ON CONFLICT (unique_item_id, league_id, day) DO UPDATE SET
+                open_chaos = EXCLUDED.open_chaos,
+                high_chaos = EXCLUDED.high_chaos,
+                low_chaos = EXCLUDED.low_chaos,
+                close_chaos = EXCLUDED.close_chaos,
+                avg_chaos = EXCLUDED.avg_chaos,
+                avg_listing_count = EXCLUDED.avg_listing_count,
+                points = EXCLUDED.points
+            """,
+            {
+                "league_id": league_id,
+                "unique_ids": unique_ids,
+                "day": day,
+                "day_start": day_start,
+                "day_end": day_end,
+            },
+        )
+        return cursor.rowcount
@@ -0,0 +1,101 @@
+"""
+Refresh intervals for run_import_scheduler.
+
+Each league/type keeps a smoothed "churn": the share of its rows whose price changed
+on recent runs (a 304 or an import with nothing changed counts as zero). The next
+interval is interpolated between the configured minimum and maximum: churn at or
+above CHURN_SATURATION refreshes at the minimum, no churn at the maximum. A fresh
+league with prices still settling therefore refreshes often, and a stable category
+backs off on its own. Failed runs back off exponentially from the minimum.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import Final, Iterable
+
+from catalog.models import ImportSchedule, League
+
+CHURN_SATURATION: Final[float] = 0.25
+# weight of the newest run in the smoothed churn
+CHURN_SMOOTHING: Final[float] = 0.5
+
+
+def next_interval(churn: float, *, min_s: int, max_s: int) -> int:
+    share = min(1.0, max(0.0, churn) / CHURN_SATURATION)
+    return int(round(max_s - (max_s - min_s) * share))
+
+
+def failure_backoff(failures: int, *, min_s: int, max_s: int) -> int:
+    return min(max_s, min_s * 2 ** max(0, failures - 1))
+
+
+def ensure_schedules(leagues: Iterable[League], types: list[str], *, now: dt.datetime) -> None:
+    """Create missing league/type rows, due immediately."""
+    ImportSchedule.objects.bulk_create(
+        [ImportSchedule(league=league, import_type=t, next_run_at=now) for league in leagues for t in types],
+        ignore_conflicts=True,
+    )
+
+
+def due_schedules(leagues: Iterable[League], types: list[str], *, now: dt.datetime) -> dict[League, list[ImportSchedule]]:
+    """Due schedules grouped by league, most overdue league first."""
+    by_league: dict[League, list[ImportSchedule]] = {}
+    qs = (
+        ImportSchedule.objects
+        .select_related("league")
+        .filter(league__in=list(leagues), import_type__in=types, next_run_at__lte=now)
+        .order_by("next_run_at")
+    )
+    for schedule in qs:
+        by_league.setdefault(schedule.league, []).append(schedule)
+    return by_league
+
+
+def next_due_at(leagues: Iterable[League], types: list[str]) -> dt.datetime | None:
+    schedule = (
+        ImportSchedule.objects
+        .filter(league__in=list(leagues), import_type__in=types)
+        .order_by("next_run_at")
+        .only("next_run_at")
+        .first()
+    )
+    return schedule.next_run_at if schedule else None
+
+
+def record_success(
+    schedule: ImportSchedule,
+    counts: dict[str, int],
+    *,
+    finished: dt.datetime,
+    min_s: int,
+    max_s: int,
+) -> None:
+    rows = counts.get("stats_changed", 0) + counts.get("stats_unchanged", 0)
+    changed = counts.get("stats_changed", 0)
+    sample = changed / rows if rows else 0.0
+
+    # the first run has nothing to smooth against
+    if schedule.last_finished_at is None:
+        schedule.churn = sample
+    else:
+        schedule.churn = CHURN_SMOOTHING * sample + (1 - CHURN_SMOOTHING) * schedule.churn
+
+    schedule.interval_seconds = next_interval(schedule.churn, min_s=min_s, max_s=max_s)
+    schedule.next_run_at = finished + dt.timedelta(seconds=schedule.interval_seconds)
+    schedule.last_finished_at = finished
+    schedule.last_status = "ok" if counts else "not_modified"
+    schedule.last_rows = rows
+    schedule.last_changed = changed
+    schedule.failures = 0
+    schedule.save()
+
+
+def record_failure(schedule: ImportSchedule, *, finished: dt.datetime, min_s: int, max_s: int) -> None:
+    schedule.failures += 1
+    schedule.next_run_at = finished + dt.timedelta(
+        seconds=failure_backoff(schedule.failures, min_s=min_s, max_s=max_s)
+    )
+    schedule.last_finished_at = finished
+    schedule.last_status = "failed"
+    schedule.save()
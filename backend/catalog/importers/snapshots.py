@@ -0,0 +1,172 @@
+"""
+Record/replay archives of fetched payloads.
+
+Layout of a snapshot directory:
+
+    snapshot.json                 {"format": 1, "created_at": ...}
+    index/<sha256 of url>.json    {"url", "blob", "etag", "last_modified", "fetched_at"}
+    blobs/<sha256 of body>.gz     gzip-compressed response body
+
+Bodies are content-addressed, so re-recording an unchanged payload costs one index
+write. Every file is written atomically and per URL, so several league processes can
+record into the same directory at once.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Final, Iterator, Protocol
+
+from catalog.http_client import HttpResult, atomic_write
+
+SNAPSHOT_FORMAT: Final[int] = 1
+
+
+class PayloadClient(Protocol):
+    def get(self, url: str, *, store: bool = True) -> HttpResult: ...
+
+    def store(self, result: HttpResult) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotArchive:
+    def __init__(self, root: Path | str, *, create: bool = False) -> None:
+        self.root = Path(root)
+        self.index_dir = self.root / "index"
+        self.blob_dir = self.root / "blobs"
+        meta_path = self.root / "snapshot.json"
+
+        if create:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            if not meta_path.exists():
+                meta = {"format": SNAPSHOT_FORMAT, "created_at": datetime.now(timezone.utc).isoformat()}
+                atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise SnapshotError(f"Not a snapshot directory: {self.root}") from exc
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise SnapshotError(f"Unsupported snapshot format {meta.get('format')!r} in {self.root}")
+
+    def _index_path(self, url: str) -> Path:
+        return self.index_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _write_blob(self, digest: str, src: IO[bytes]) -> None:
+        blob_path = self.blob_dir / f"{digest}.gz"
+        if blob_path.exists():
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.blob_dir, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+        os.replace(tmp, blob_path)
+
+    def _write_index(
+        self,
+        url: str,
+        digest: str,
+        *,
+        etag: str | None,
+        last_modified: str | None,
+        fetched_at: str | None = None,
+    ) -> dict[str, Any]:
+        entry = {
+            "url": url,
+            "blob": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at or datetime.now(timezone.utc).isoformat(),
+        }
+        atomic_write(self._index_path(url), json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def record(self, result: HttpResult) -> None:
+        with result.open() as src:
+            self._write_blob(result.digest, src)
+        self._write_index(result.url, result.digest, etag=result.etag, last_modified=result.last_modified)
+
+    def record_body(
+        self,
+        url: str,
+        body: bytes,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> dict[str, Any]:
+        """Record a body already in memory (e.g. captured by a browser). Returns the index entry."""
+        digest = hashlib.sha256(body).hexdigest()
+        self._write_blob(digest, io.BytesIO(body))
+        return self._write_index(url, digest, etag=etag, last_modified=last_modified)
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        """Index entries (latest capture per URL), in no particular order."""
+        for path in self.index_dir.glob("*.json"):
+            try:
+                yield json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+
+    def lookup(self, url: str) -> HttpResult:
+        try:
+            entry = json.loads(self._index_path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise SnapshotError(f"{url} is not in snapshot {self.root}") from exc
+
+        return HttpResult(
+            url=url,
+            path=self.blob_dir / f"{entry['blob']}.gz",
+            digest=str(entry["blob"]),
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+            gzipped=True,
+        )
+
+
+class RecordingClient:
+    """Wraps a live client and records every payload it returns."""
+
+    def __init__(self, client: PayloadClient, archive: SnapshotArchive) -> None:
+        self.client = client
+        self.archive = archive
+
+    def get(self, url: str, *, store: bool = True) -> HttpResult:
+        result = self.client.get(url, store=store)
+        self.archive.record(result)
+        return result
+
+    def store(self, result: HttpResult) -> None:
+        self.client.store(result)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class ReplayClient:
+    """Serves payloads from a snapshot; never touches the network."""
+
+    def __init__(self, archive: SnapshotArchive) -> None:
+        self.archive = archive
+
+    def get(self, url: str, *, store: bool = True) -> HttpResult:
+        return self.archive.lookup(url)
+
+    def store(self, result: HttpResult) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
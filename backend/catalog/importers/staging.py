@@ -0,0 +1,732 @@
+"""
+Set-based merge of parsed poe.ninja rows.
+
+Rows for one import type are bulk loaded into a temporary staging table and then
+merged into BaseItem, UniqueItem, stats, price history and presence with a handful of
+INSERT ... ON CONFLICT statements, instead of several ORM round trips per row.
+
+Each staged row carries a compact hash of its static fields and of its price fields.
+Rows whose hash matches the one stored on UniqueItem / UniqueItemLeagueStats are left
+alone entirely (no new tuple, no row lock), so hourly re-imports only write what moved.
+
+Base items are resolved once per (base name, item class) per run: callers can pass a
+`base_cache` (shared between league workers) and cached bases skip the BaseItem merge.
+
+With --atomic, stats and presence of every type are first collected in session temp
+"shadow" tables and then applied to the live tables in a single short transaction by
+publish_shadow, so API readers never see a league with half its types refreshed.
+
+Must be called inside transaction.atomic(): the staging table is ON COMMIT DROP.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import io
+from functools import partial
+from typing import Final, Iterable, Iterator, MutableMapping, NamedTuple
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from catalog.importers.metrics import ImportMetrics, MetricsScope
+from catalog.models import (
+    BaseItem,
+    League,
+    UniqueItem,
+    UniqueItemLeaguePresence,
+    UniqueItemLeagueStats,
+    UniqueItemPriceHistory,
+)
+
+STAGE_TABLE: Final[str] = "poeninja_stage"
+INSERT_CHUNK_SIZE: Final[int] = 500
+STAGE_BATCH_SIZE: Final[int] = 2000
+
+# session temp tables collecting a whole league run in --atomic mode, see publish_shadow
+SHADOW_STATS_TABLE: Final[str] = "poeninja_shadow_stats"
+SHADOW_PRESENCE_TABLE: Final[str] = "poeninja_shadow_presence"
+
+# (base name, item class) -> BaseItem.id
+BaseCache = MutableMapping[tuple[str, str], int]
+
+
+class StageRow(NamedTuple):
+    poe_ninja_id: int | None
+    name: str
+    base_name: str
+    item_class: str
+    slot: str
+    base_icon: str | None
+    required_level: int | None
+    image_url: str
+    raw_mods: str
+    flavour_text: str
+    chaos_value: float | None
+    divine_value: float | None
+    listing_count: int | None
+
+
+# (column, sql type) in StageRow order; "ord" is appended so "last row wins" like the old loop
+STAGE_COLUMNS: Final[list[tuple[str, str]]] = [
+    ("poe_ninja_id", "bigint"),
+    ("name", "text"),
+    ("base_name", "text"),
+    ("item_class", "text"),
+    ("slot", "text"),
+    ("base_icon", "text"),
+    ("required_level", "integer"),
+    ("image_url", "text"),
+    ("raw_mods", "text"),
+    ("flavour_text", "text"),
+    ("chaos_value", "numeric"),
+    ("divine_value", "numeric"),
+    ("listing_count", "integer"),
+    ("static_hash", "text"),
+    ("price_hash", "text"),
+    ("base_item_id", "bigint"),
+    ("ord", "integer"),
+]
+
+
+def _digest(*parts: object) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(b"\x00" if part is None else repr(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _price(val: float | None) -> float | None:
+    # chaos/divine are stored as numeric(12, 2); noise below a cent is not a change
+    return None if val is None else round(float(val), 2)
+
+
+def static_hash(row: StageRow) -> str:
+    return _digest(
+        row.name,
+        row.base_name,
+        row.required_level,
+        row.image_url,
+        row.raw_mods,
+        row.flavour_text,
+    )
+
+
+def price_hash(row: StageRow) -> str:
+    return _digest(_price(row.chaos_value), _price(row.divine_value), row.listing_count)
+
+
+def _create_stage_table(cursor) -> None:
+    cols = ", ".join(f"{name} {sql_type}" for name, sql_type in STAGE_COLUMNS)
+    cursor.execute(f"DROP TABLE IF EXISTS {STAGE_TABLE}")
+    cursor.execute(f"CREATE TEMP TABLE {STAGE_TABLE} ({cols}) ON COMMIT DROP")
+
+
+def _copy_text(val: object) -> str:
+    # COPY text format: \N is NULL, backslash/tab/newline must be escaped
+    if val is None:
+        return "\\N"
+    return (
+        str(val)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(cursor, rows: list[tuple[object, ...]]) -> None:
+    """
+    COPY when the driver supports it (psycopg2), multi-row INSERT otherwise.
+    """
+    col_names = ", ".join(name for name, _ in STAGE_COLUMNS)
+    raw_cursor = getattr(cursor, "cursor", cursor)
+
+    if hasattr(raw_cursor, "copy_expert"):
+        buf = io.StringIO()
+        for row in rows:
+            buf.write("\t".join(_copy_text(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+        raw_cursor.copy_expert(f"COPY {STAGE_TABLE} ({col_names}) FROM STDIN", buf)
+        return
+
+    placeholders = "(" + ", ".join(["%s"] * len(STAGE_COLUMNS)) + ")"
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + INSERT_CHUNK_SIZE]
+        params = [v for row in chunk for v in row]
+        cursor.execute(
+            f"INSERT INTO {STAGE_TABLE} ({col_names}) VALUES {', '.join([placeholders] * len(chunk))}",
+            params,
+        )
+
+
+def _merge_base_items(cursor) -> int:
+    """
+    Merge bases for staged rows not resolved from the cache. Returns the number created.
+    """
+    base_table = BaseItem._meta.db_table
+    src = f"""
+        SELECT DISTINCT ON (base_name) base_name, item_class, slot, base_icon
+        FROM {STAGE_TABLE}
+        WHERE base_item_id IS NULL
+        ORDER BY base_name, ord
+    """
+
+    # Same semantics as BaseItem.get_or_create(name=...): only names we have never seen are inserted
+    cursor.execute(
+        f"""
+        INSERT INTO {base_table} (name, item_class, slot, icon_url)
+        SELECT src.base_name, src.item_class, src.slot, src.base_icon
+        FROM ({src}) AS src
+        WHERE NOT EXISTS (SELECT 1 FROM {base_table} b WHERE b.name = src.base_name)
+        ON CONFLICT (name, item_class) DO NOTHING
+        """
+    )
+    created = cursor.rowcount
+
+    # Fill in class/slot/icon on existing bases that are still missing them. A slot left at
+    # one of the old substring-rule fallbacks (a "Sash" as other, a "Circlet" as body
+    # armour) is replaced by a specific one from the classification table.
+    fallback_slot = "b.slot = ANY(%(fallback_slots)s) AND src.slot <> ALL(%(fallback_slots)s) AND src.slot <> ''"
+    cursor.execute(
+        f"""
+        UPDATE {base_table} AS b SET
+            item_class = CASE WHEN b.item_class = %(other)s AND src.item_class <> %(other)s
+                              THEN src.item_class ELSE b.item_class END,
+            slot = CASE WHEN b.slot IS NULL OR b.slot = '' OR {fallback_slot} THEN src.slot ELSE b.slot END,
+            icon_url = CASE WHEN (b.icon_url IS NULL OR b.icon_url = '') AND src.base_icon IS NOT NULL
+                            THEN src.base_icon ELSE b.icon_url END
+        FROM ({src}) AS src
+        WHERE b.name = src.base_name
+          AND (
+            (b.item_class = %(other)s AND src.item_class <> %(other)s)
+            OR ((b.slot IS NULL OR b.slot = '') AND src.slot <> '')
+            OR {fallback_slot}
+            OR ((b.icon_url IS NULL OR b.icon_url = '') AND src.base_icon IS NOT NULL)
+          )
+        """,
+        {
+            "other": BaseItem.ItemClass.OTHER.value,
+            "fallback_slots": [BaseItem.Slot.OTHER.value, BaseItem.Slot.BODY.value],
+        },
+    )
+    return created
+
+
+def _resolve_base_ids(cursor) -> dict[tuple[str, str], int]:
+    """
+    Fill stage.base_item_id for uncached rows and return the newly resolved bases.
+    Prefers the base whose class matches the import type when a name exists under several classes.
+    """
+    base_table = BaseItem._meta.db_table
+    cursor.execute(
+        f"""
+        UPDATE {STAGE_TABLE} AS s SET base_item_id = r.id
+        FROM (
+            SELECT DISTINCT ON (x.base_name, x.item_class) x.base_name, x.item_class, b.id
+            FROM (SELECT DISTINCT base_name, item_class FROM {STAGE_TABLE} WHERE base_item_id IS NULL) AS x
+            JOIN {base_table} b ON b.name = x.base_name
+            ORDER BY x.base_name, x.item_class, (b.item_class = x.item_class) DESC, b.id
+        ) AS r
+        WHERE s.base_item_id IS NULL AND s.base_name = r.base_name AND s.item_class = r.item_class
+        RETURNING s.base_name, s.item_class, s.base_item_id
+        """
+    )
+    return {(name, item_class): int(base_id) for name, item_class, base_id in cursor.fetchall()}
+
+
+def _merge_uniques(cursor, *, now: dt.datetime) -> tuple[int, int]:
+    """
+    Returns (created, updated); rows whose static hash and resolved base are unchanged
+    are not written. The base is compared separately because it is resolved after
+    hashing, and a reclassified base must still be written back to the unique.
+    """
+    unique_table = UniqueItem._meta.db_table
+
+    cursor.execute(
+        f"""
+        INSERT INTO {unique_table}
+            (name, base_item_id, poe_ninja_id, required_level, image_url, flavour_text, raw_mods,
+             content_hash, created_at)
+        SELECT name, base_item_id, poe_ninja_id, required_level, image_url, flavour_text, raw_mods,
+               static_hash, %s
+        FROM (
+            SELECT DISTINCT ON (poe_ninja_id) *
+            FROM {STAGE_TABLE}
+            WHERE poe_ninja_id IS NOT NULL AND base_item_id IS NOT NULL
+            ORDER BY poe_ninja_id, ord DESC
+        ) AS src
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {unique_table} u
+            WHERE u.poe_ninja_id = src.poe_ninja_id
+              AND u.content_hash = src.static_hash
+              AND u.base_item_id = src.base_item_id
+        )
+        ON CONFLICT (poe_ninja_id) DO UPDATE SET
+            name = EXCLUDED.name,
+            base_item_id = EXCLUDED.base_item_id,
+            required_level = EXCLUDED.required_level,
+            image_url = EXCLUDED.image_url,
+            flavour_text = EXCLUDED.flavour_text,
+            raw_mods = EXCLUDED.raw_mods,
+            content_hash = EXCLUDED.content_hash
+        RETURNING (xmax = 0)
+        """,
+        [now],
+    )
+    inserted = [row[0] for row in cursor.fetchall()]
+    created = sum(1 for was_insert in inserted if was_insert)
+    return created, len(inserted) - created
+
+
+def history_bucket(now: dt.datetime) -> dt.datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def _staged_prices_sql() -> str:
+    # (unique_item_id, chaos_value, divine_value, listing_count, price_hash), last row per id wins
+    unique_table = UniqueItem._meta.db_table
+    return f"""
+        SELECT DISTINCT ON (s.poe_ninja_id)
+               u.id AS unique_item_id, s.chaos_value, s.divine_value, s.listing_count, s.price_hash
+        FROM {STAGE_TABLE} s
+        JOIN {unique_table} u ON u.poe_ninja_id = s.poe_ninja_id
+        ORDER BY s.poe_ninja_id, s.ord DESC
+    """
+
+
+def _merge_stats(
+    cursor,
+    *,
+    league_id: int,
+    now: dt.datetime,
+    source: str,
+    changed_ids: set[int] | None = None,
+) -> int:
+    """
+    Returns the number of stats rows changed from `source` (see _staged_prices_sql);
+    rows whose price hash is unchanged keep their values and only get last_fetched_at
+    moved forward (it still means "seen in the last fetch"). Every changed row is also
+    appended to the price history in the same statement, so history only grows by what
+    actually moved. A second change within the same hour bucket overwrites that
+    bucket's point. Ids of changed uniques are added to `changed_ids` when given.
+    """
+    stats_table = UniqueItemLeagueStats._meta.db_table
+    history_table = UniqueItemPriceHistory._meta.db_table
+
+    cursor.execute(
+        f"""
+        WITH changed AS (
+            INSERT INTO {stats_table}
+                (unique_item_id, league_id, chaos_value, divine_value, listing_count, confidence, raw,
+                 content_hash, last_fetched_at)
+            SELECT unique_item_id, %(league_id)s, chaos_value, divine_value, listing_count, '', '{{}}'::jsonb,
+                   price_hash, %(now)s
+            FROM ({source}) AS src
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {stats_table} st
+                WHERE st.unique_item_id = src.unique_item_id
+                  AND st.league_id = %(league_id)s
+                  AND st.content_hash = src.price_hash
+            )
+            ON CONFLICT (unique_item_id, league_id) DO UPDATE SET
+                chaos_value = EXCLUDED.chaos_value,
+                divine_value = EXCLUDED.divine_value,
+                listing_count = EXCLUDED.listing_count,
+                content_hash = EXCLUDED.content_hash,
+                last_fetched_at = EXCLUDED.last_fetched_at
+            RETURNING unique_item_id, chaos_value, divine_value, listing_count
+        )
+        INSERT INTO {history_table} (unique_item_id, league_id, bucket, chaos_value, divine_value, listing_count)
+        SELECT unique_item_id, %(league_id)s, %(bucket)s, chaos_value, divine_value, listing_count
+        FROM changed
+        ON CONFLICT (unique_item_id, league_id, bucket) DO UPDATE SET
+            chaos_value = EXCLUDED.chaos_value,
+            divine_value = EXCLUDED.divine_value,
+            listing_count = EXCLUDED.listing_count
+        RETURNING unique_item_id
+        """,
+        {"league_id": league_id, "now": now, "bucket": history_bucket(now)},
+    )
+    ids = [row[0] for row in cursor.fetchall()]
+    if changed_ids is not None:
+        changed_ids.update(ids)
+    changed = len(ids)
+
+    # unchanged rows: a timestamp-only (unindexed column, so HOT) update
+    cursor.execute(
+        f"""
+        UPDATE {stats_table} AS st SET last_fetched_at = %(now)s
+        FROM ({source}) AS src
+        WHERE st.unique_item_id = src.unique_item_id
+          AND st.league_id = %(league_id)s
+          AND st.last_fetched_at < %(now)s
+        """,
+        {"league_id": league_id, "now": now},
+    )
+    return changed
+
+
+def _count_distinct_ids(cursor) -> int:
+    # the unique/stats totals are per distinct unique: duplicate rows merge into one
+    cursor.execute(f"SELECT count(DISTINCT poe_ninja_id) FROM {STAGE_TABLE}")
+    return int(cursor.fetchone()[0])
+
+
+def _staged_presence_sql() -> str:
+    # (id, source_type) of uniques in the stage; %(import_type)s is bound by the caller
+    unique_table = UniqueItem._meta.db_table
+    return f"""
+        SELECT DISTINCT u.id, %(import_type)s AS source_type
+        FROM {STAGE_TABLE} s
+        JOIN {unique_table} u ON u.poe_ninja_id = s.poe_ninja_id
+    """
+
+
+def _merge_presence(
+    cursor,
+    *,
+    league_id: int,
+    today: dt.date,
+    seen: str,
+    delist_types: list[str],
+    params: dict[str, object] | None = None,
+) -> tuple[int, int, int]:
+    """
+    Returns (created, refreshed, delisted) for the (id, source_type) rows of `seen`.
+    New pairs are inserted without touching existing rows, then one UPDATE refreshes
+    only pairs not yet seen today (or coming back after being delisted). Presence rows
+    last listed under one of `delist_types` but missing from `seen` are marked delisted.
+    """
+    presence_table = UniqueItemLeaguePresence._meta.db_table
+    params = {**(params or {}), "league_id": league_id, "today": today, "delist_types": delist_types}
+
+    cursor.execute(
+        f"""
+        INSERT INTO {presence_table} (unique_item_id, league_id, first_seen_at, last_seen_at, source_type)
+        SELECT seen.id, %(league_id)s, %(today)s::date, %(today)s::date, seen.source_type
+        FROM ({seen}) AS seen
+        ON CONFLICT (unique_item_id, league_id) DO NOTHING
+        """,
+        params,
+    )
+    created = cursor.rowcount
+
+    cursor.execute(
+        f"""
+        UPDATE {presence_table} AS p SET
+            last_seen_at = %(today)s::date,
+            source_type = seen.source_type,
+            delisted_at = NULL
+        FROM ({seen}) AS seen
+        WHERE p.unique_item_id = seen.id
+          AND p.league_id = %(league_id)s
+          AND (p.last_seen_at <> %(today)s::date OR p.source_type <> seen.source_type OR p.delisted_at IS NOT NULL)
+        """,
+        params,
+    )
+    refreshed = cursor.rowcount
+
+    delisted = 0
+    if delist_types:
+        cursor.execute(
+            f"""
+            UPDATE {presence_table} AS p SET delisted_at = %(today)s::date
+            WHERE p.league_id = %(league_id)s
+              AND p.source_type = ANY(%(delist_types)s)
+              AND p.delisted_at IS NULL
+              AND p.unique_item_id NOT IN (SELECT seen.id FROM ({seen}) AS seen)
+            """,
+            params,
+        )
+        delisted = cursor.rowcount
+
+    return created, refreshed, delisted
+
+
+def create_shadow_tables() -> None:
+    """
+    (Re)create the session temp tables for an --atomic league run. They survive the
+    per-type transactions and are private to this connection.
+    """
+    with connection.cursor() as cursor:
+        drop_shadow_tables(cursor)
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE {SHADOW_STATS_TABLE} (
+                unique_item_id bigint PRIMARY KEY,
+                chaos_value numeric,
+                divine_value numeric,
+                listing_count integer,
+                price_hash text,
+                source_type text NOT NULL
+            )
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE {SHADOW_PRESENCE_TABLE} (
+                id bigint PRIMARY KEY,
+                source_type text NOT NULL
+            )
+            """
+        )
+
+
+def drop_shadow_tables(cursor=None) -> None:
+    if cursor is None:
+        with connection.cursor() as cursor:
+            drop_shadow_tables(cursor)
+        return
+    cursor.execute(f"DROP TABLE IF EXISTS {SHADOW_STATS_TABLE}, {SHADOW_PRESENCE_TABLE}")
+
+
+def _shadow_stage(cursor, *, import_type: str) -> None:
+    # a unique listed under several types keeps the row from the type imported last
+    cursor.execute(
+        f"""
+        INSERT INTO {SHADOW_STATS_TABLE}
+            (unique_item_id, chaos_value, divine_value, listing_count, price_hash, source_type)
+        SELECT unique_item_id, chaos_value, divine_value, listing_count, price_hash, %(import_type)s
+        FROM ({_staged_prices_sql()}) AS src
+        ON CONFLICT (unique_item_id) DO UPDATE SET
+            chaos_value = EXCLUDED.chaos_value,
+            divine_value = EXCLUDED.divine_value,
+            listing_count = EXCLUDED.listing_count,
+            price_hash = EXCLUDED.price_hash,
+            source_type = EXCLUDED.source_type
+        """,
+        {"import_type": import_type},
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {SHADOW_PRESENCE_TABLE} (id, source_type)
+        SELECT id, source_type FROM ({_staged_presence_sql()}) AS seen
+        ON CONFLICT (id) DO UPDATE SET source_type = EXCLUDED.source_type
+        """,
+        {"import_type": import_type},
+    )
+
+
+def publish_shadow(
+    *,
+    league: League,
+    today: dt.date,
+    now: dt.datetime,
+    delist_types: list[str],
+    metrics: MetricsScope | None = None,
+    changed_ids: set[int] | None = None,
+    type_counts: dict[str, dict[str, int]] | None = None,
+) -> dict[str, int]:
+    """
+    Apply a whole --atomic league run from the shadow tables to the live stats,
+    history and presence. Call inside transaction.atomic(): readers see every type
+    switch over at once, and row locks are only held for this one short transaction.
+    The caller bumps the snapshot version if anything changed (see publishes_changes).
+    Ids of uniques whose stats changed are added to `changed_ids` when given, and
+    stats_changed/stats_unchanged per import type are filled into `type_counts`.
+    """
+    if metrics is None:
+        metrics = ImportMetrics().scope()
+
+    counts = {
+        "stats_changed": 0,
+        "stats_unchanged": 0,
+        "presence_created": 0,
+        "presence_refreshed": 0,
+        "presence_delisted": 0,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {SHADOW_STATS_TABLE}")
+        shadow_rows = int(cursor.fetchone()[0])
+
+        if shadow_rows:
+            changed: set[int] = set()
+            with metrics.phase("stats", rows=shadow_rows):
+                counts["stats_changed"] = _merge_stats(
+                    cursor,
+                    league_id=league.pk,
+                    now=now,
+                    source=f"SELECT * FROM {SHADOW_STATS_TABLE}",
+                    changed_ids=changed,
+                )
+            counts["stats_unchanged"] = shadow_rows - counts["stats_changed"]
+            if changed_ids is not None:
+                changed_ids.update(changed)
+
+            if type_counts is not None:
+                cursor.execute(
+                    f"""
+                    SELECT source_type, count(*), count(*) FILTER (WHERE unique_item_id = ANY(%s))
+                    FROM {SHADOW_STATS_TABLE}
+                    GROUP BY source_type
+                    """,
+                    [sorted(changed)],
+                )
+                for source_type, total, type_changed in cursor.fetchall():
+                    type_counts[source_type] = {
+                        "stats_changed": type_changed,
+                        "stats_unchanged": total - type_changed,
+                    }
+
+            with metrics.phase("presence", rows=shadow_rows):
+                (
+                    counts["presence_created"],
+                    counts["presence_refreshed"],
+                    counts["presence_delisted"],
+                ) = _merge_presence(
+                    cursor,
+                    league_id=league.pk,
+                    today=today,
+                    seen=f"SELECT id, source_type FROM {SHADOW_PRESENCE_TABLE}",
+                    delist_types=delist_types,
+                )
+
+    return counts
+
+
+# totals that change what the API serves; a run where all are zero publishes nothing
+PUBLISHED_TOTALS: Final[tuple[str, ...]] = (
+    "unique_created",
+    "unique_updated",
+    "stats_changed",
+    "presence_created",
+    "presence_delisted",
+    "catalog_updated",
+)
+
+
+def publishes_changes(totals: dict[str, int]) -> bool:
+    return any(totals.get(key) for key in PUBLISHED_TOTALS)
+
+
+def bump_snapshot_version(*league_ids: int, now: dt.datetime) -> None:
+    """
+    Mark new data as published. The API's cache keys embed snapshot_version
+    (catalog.caching), so this also invalidates cached counts and responses.
+    """
+    League.objects.filter(pk__in=league_ids).update(
+        snapshot_version=F("snapshot_version") + 1,
+        published_at=now,
+    )
+
+
+def merge_stage_rows(
+    rows: Iterable[StageRow],
+    *,
+    league: League,
+    today: dt.date,
+    now: dt.datetime,
+    batch_size: int = STAGE_BATCH_SIZE,
+    base_cache: BaseCache | None = None,
+    metrics: MetricsScope | None = None,
+    import_type: str = "",
+    mark_unseen: bool = False,
+    shadow: bool = False,
+    changed_ids: set[int] | None = None,
+) -> dict[str, int]:
+    """
+    Stage rows and merge them. Returns counts using the same keys as the command totals.
+    `rows` is consumed lazily and copied `batch_size` rows at a time, so a streamed
+    payload never has to be materialized in Python.
+    `base_cache` is read once up front and updated once at the end (it may be a
+    multiprocessing proxy, so per-row access would be an IPC round trip).
+    Phase timings go to `metrics` when given. `mark_unseen` delists uniques of
+    `import_type` missing from `rows` (see _merge_presence); an empty payload never
+    delists anything. With `shadow`, stats and presence go to the shadow tables
+    instead and stay unpublished until publish_shadow. Ids of uniques whose stats
+    changed are added to `changed_ids` when given (see rollup_daily_prices).
+    """
+    known_bases = dict(base_cache) if base_cache is not None else {}
+    totals = {
+        "base_created": 0,
+        "base_touched": 0,
+        "unique_created": 0,
+        "unique_updated": 0,
+        "unique_unchanged": 0,
+        "stats_changed": 0,
+        "stats_unchanged": 0,
+        "presence_created": 0,
+        "presence_refreshed": 0,
+        "presence_delisted": 0,
+    }
+
+    if metrics is None:
+        metrics = ImportMetrics().scope()
+
+    with connection.cursor() as cursor:
+        _create_stage_table(cursor)
+
+        batches = metrics.timed_iter(_batched(rows, batch_size, known_bases), "decode", count=len)
+        for batch in batches:
+            with metrics.phase("stage_copy", rows=len(batch)):
+                _copy_rows(cursor, batch)
+            totals["base_touched"] += len(batch)
+
+        if not totals["base_touched"]:
+            return totals
+
+        with metrics.phase("base_items") as phase:
+            totals["base_created"] = _merge_base_items(cursor)
+            resolved = _resolve_base_ids(cursor)
+            phase.rows = len(resolved)
+        if base_cache is not None and resolved:
+            # other workers may read the cache: only publish ids of committed bases
+            transaction.on_commit(partial(base_cache.update, resolved))
+        distinct_ids = _count_distinct_ids(cursor)
+
+        with metrics.phase("uniques", rows=distinct_ids):
+            totals["unique_created"], totals["unique_updated"] = _merge_uniques(cursor, now=now)
+        totals["unique_unchanged"] = distinct_ids - totals["unique_created"] - totals["unique_updated"]
+
+        if shadow:
+            with metrics.phase("shadow", rows=distinct_ids):
+                _shadow_stage(cursor, import_type=import_type)
+            return totals
+
+        with metrics.phase("stats", rows=distinct_ids):
+            totals["stats_changed"] = _merge_stats(
+                cursor,
+                league_id=league.pk,
+                now=now,
+                source=_staged_prices_sql(),
+                changed_ids=changed_ids,
+            )
+        totals["stats_unchanged"] = distinct_ids - totals["stats_changed"]
+
+        with metrics.phase("presence", rows=distinct_ids):
+            (
+                totals["presence_created"],
+                totals["presence_refreshed"],
+                totals["presence_delisted"],
+            ) = _merge_presence(
+                cursor,
+                league_id=league.pk,
+                today=today,
+                seen=_staged_presence_sql(),
+                delist_types=[import_type] if mark_unseen and import_type else [],
+                params={"import_type": import_type},
+            )
+
+    return totals
+
+
+def _batched(
+    rows: Iterable[StageRow],
+    size: int,
+    known_bases: dict[tuple[str, str], int],
+) -> Iterator[list[tuple[object, ...]]]:
+    # appends the hash, cached base id and "ord" columns while batching
+    batch: list[tuple[object, ...]] = []
+    for i, row in enumerate(rows):
+        # plain str keys: item_class may be a TextChoices member and the cache may be a proxy
+        base_item_id = known_bases.get((row.base_name, str(row.item_class)))
+        batch.append((*row, static_hash(row), price_hash(row), base_item_id, i))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,113 @@
+"""
+Incremental JSON decoding for large API payloads.
+
+`iter_array_items(fp, "lines")` walks a top-level JSON object read from a binary
+stream and yields the elements of one array key one at a time. Only a single
+element (plus one read chunk) is held in memory, so peak memory does not grow
+with the payload. Other top-level keys are decoded and dropped.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import IO, Any, Final, Iterator
+
+READ_CHUNK_SIZE: Final[int] = 64 * 1024
+WHITESPACE: Final[str] = " \t\n\r"
+NUMBER_CHARS: Final[frozenset[str]] = frozenset("0123456789.eE+-")
+
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    def __init__(self, fp: IO[bytes], chunk_size: int) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        # drop what has been consumed so the buffer never grows past one element + one chunk
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+            self.buf += self.text_decoder.decode(b"", final=True)
+            return False
+        self.buf += self.text_decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace char (not consumed), or "" at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        got = self.peek()
+        if got != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, got {got!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number followed by nothing but number chars may continue in the next
+            # chunk ("3." or "1e" decode as 3 and 1)
+            if (
+                isinstance(obj, (int, float))
+                and not isinstance(obj, bool)
+                and all(c in NUMBER_CHARS for c in self.buf[end:])
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_array_items(fp: IO[bytes], key: str, *, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    buf = _Buffer(fp, chunk_size)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+
+    while True:
+        name = buf.value()
+        buf.expect(":")
+
+        if name == key and buf.peek() == "[":
+            buf.expect("[")
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    yield buf.value()
+                    if buf.peek() == ",":
+                        buf.pos += 1
+                        continue
+                    buf.expect("]")
+                    break
+        else:
+            buf.value()
+
+        if buf.peek() == ",":
+            buf.pos += 1
+            continue
+        buf.expect("}")
+        return
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from shutil import copyfileobj
+from typing import Any, Callable, Final, Iterator, cast
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from catalog.management.commands.import_poeninja import BASE_TYPE, DEFAULT_TYPES
+
+BENCH_LEAGUE: Final[str] = "Benchmark"
+
+# Synthetic poe_ninja_ids start high so they never collide with real ones
+SYNTHETIC_ID_START: Final[int] = 900_000_000
+# each type's ids come from its own block of this size
+ID_BLOCK_SIZE: Final[int] = 1_000_000
+
+MAX_LINES: Final[int] = 500_000
+
+BASES_BY_TYPE: Final[dict[str, list[str]]] = {
+    "UniqueArmour": [
+        "Vaal Regalia", "Astral Plate", "Sorcerer Boots", "Slink Boots", "Titan Gauntlets",
+        "Hubris Circlet", "Royal Burgonet", "Archon Kite Shield", "Silken Hood", "Leather Cap",
+    ],
+    "UniqueWeapon": [
+        "Imperial Claw", "Jewelled Foil", "Thicket Bow", "Void Sceptre", "Siege Axe", "Lion Sword",
+    ],
+    "UniqueAccessory": [
+        "Leather Belt", "Heavy Belt", "Stygian Vise", "Two-Stone Ring", "Onyx Amulet", "Amethyst Ring",
+    ],
+    "UniqueFlask": ["Granite Flask", "Quicksilver Flask", "Divine Life Flask"],
+    "UniqueJewel": ["Cobalt Jewel", "Crimson Jewel", "Viridian Jewel", "Timeless Jewel"],
+}
+
+EXPLICIT_MODS: Final[list[str]] = [
+    "+{n} to maximum Life",
+    "{n}% increased Attack Speed",
+    "Adds {n} to {m} Fire Damage to Attacks",
+    "+{n}% to all Elemental Resistances",
+    "{n}% increased Movement Speed",
+    "Regenerate {n} Mana per second",
+]
+
+
+def synthetic_line(poe_id: int, import_type: str, index: int, rng: random.Random) -> dict[str, Any]:
+    """
+    One itemoverview line shaped like poe.ninja's, including fields the importer ignores
+    (sparkline, trade info) so decoding cost is realistic.
+    """
+    bases = BASES_BY_TYPE.get(import_type) or ["Synthetic Base"]
+    chaos = round(rng.lognormvariate(3, 2), 2)
+    return {
+        "id": poe_id,
+        "name": f"Synthetic {import_type} {poe_id}",
+        "icon": f"https://web.poecdn.com/gen/image/bench/{poe_id}.png",
+        "levelRequired": rng.randint(1, 86),
+        "baseType": bases[index % len(bases)],
+        "itemClass": 3,
+        "sparkline": {"data": [round(rng.uniform(-5, 5), 2) for _ in range(7)], "totalChange": 0.0},
+        "lowConfidenceSparkline": {"data": [0, 0, 0, 0, 0, 0, 0], "totalChange": 0.0},
+        "implicitMods": [{"text": f"+{rng.randint(1, 40)} to Strength", "optional": False}],
+        "explicitMods": [
+            {"text": mod.format(n=rng.randint(1, 100), m=rng.randint(100, 200)), "optional": False}
+            for mod in rng.sample(EXPLICIT_MODS, 4)
+        ],
+        "flavourText": "A synthetic relic,\nforged for measurement.",
+        "chaosValue": chaos,
+        "exaltedValue": round(chaos / 12, 2),
+        "divineValue": round(chaos / 180, 2),
+        "count": rng.randint(1, 50),
+        "detailsId": f"synthetic-{poe_id}",
+        "tradeInfo": [],
+        "listingCount": rng.randint(0, 2000),
+    }
+
+
+def write_payload(path: Path, lines: Iterator[dict[str, Any]]) -> int:
+    """Write an itemoverview payload line by line; returns the number of lines."""
+    n = 0
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write('{"lines":[')
+        for line in lines:
+            if n:
+                fh.write(",")
+            fh.write(json.dumps(line, separators=(",", ":")))
+            n += 1
+        fh.write('],"language":{"name":"en","translations":{}}}')
+    return n
+
+
+def generate_payloads(
+    out_dir: Path,
+    *,
+    types: list[str],
+    id_ranges: dict[str, range],
+    seed: int,
+) -> int:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    base_lines = (
+        {"id": i, "name": base, "icon": f"https://web.poecdn.com/gen/image/bench/base-{i}.png"}
+        for i, base in enumerate(b for bases in BASES_BY_TYPE.values() for b in bases)
+    )
+    write_payload(out_dir / f"{BASE_TYPE}.json", base_lines)
+
+    total = 0
+    for t in types:
+        ids = id_ranges[t]
+        total += write_payload(
+            out_dir / f"{t}.json",
+            (synthetic_line(poe_id, t, i, rng) for i, poe_id in enumerate(ids)),
+        )
+    return total
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    GET /<variant>/itemoverview?type=<type> streams <root>/<variant>/<type>.json from disk.
+    """
+
+    root: Path
+
+    def do_GET(self) -> None:
+        url = self.path.split("?", 1)
+        variant = url[0].strip("/").split("/")[0]
+        query = dict(part.split("=", 1) for part in url[1].split("&") if "=" in part) if len(url) > 1 else {}
+        path = self.root / variant / f"{query.get('type', '')}.json"
+
+        if not path.is_file():
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.end_headers()
+        with path.open("rb") as fh:
+            copyfileobj(fh, self.wfile)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def start_stub_server(root: Path) -> ThreadingHTTPServer:
+    handler = type("StubHandler", (_StubHandler,), {"root": root})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="bench-stub", daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS. It is the process high-water mark, so it
+    # can only be reported per run: every phase after the peak would repeat it
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return out.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = "Benchmark import_poeninja end to end against synthetic payloads served from a local stub."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--lines",
+            type=int,
+            default=10_000,
+            help=f"Total itemoverview lines across all types, at least one per type and at most {MAX_LINES}. Default: 10000",
+        )
+        parser.add_argument(
+            "--overlap",
+            type=float,
+            default=0.5,
+            help="Fraction of lines that already exist in the DB before the measured import. Default: 0.5",
+        )
+        parser.add_argument(
+            "--types",
+            nargs="*",
+            default=list(DEFAULT_TYPES),
+            help=f"Types to generate. Default: {', '.join(DEFAULT_TYPES)}",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="Random seed for payload generation. Default: 1",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Passed through to import_poeninja --workers. Default: 4",
+        )
+        parser.add_argument(
+            "--out",
+            help="Write results as JSON to this file.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Previous results JSON to compare rows/sec against.",
+        )
+        parser.add_argument(
+            "--use-configured-db",
+            action="store_true",
+            help="Run against the configured database instead of a throwaway test database. "
+                 "Synthetic uniques are left behind.",
+        )
+
+    def handle(self, *args: object, **opts: object) -> None:
+        lines = int(cast(int, opts.get("lines") or 0))
+        overlap = float(cast(float, opts.get("overlap") or 0.0))
+        types = cast(list[str], opts.get("types") or list(DEFAULT_TYPES))
+
+        if lines < 1:
+            raise SystemExit("--lines must be positive")
+        if not types:
+            raise SystemExit("--types cannot be empty")
+        if not len(types) <= lines <= MAX_LINES:
+            raise SystemExit(f"--lines must be between {len(types)} (one per type) and {MAX_LINES}, got {lines}")
+        if not 0.0 <= overlap <= 1.0:
+            raise SystemExit("--overlap must be between 0 and 1")
+
+        old_db_name = None
+        if not opts.get("use_configured_db"):
+            self.stdout.write("Creating throwaway test database...")
+            old_db_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="bench-import-") as tmp:
+                results = self._run(Path(tmp), lines=lines, overlap=overlap, types=types, opts=opts)
+        finally:
+            if old_db_name is not None:
+                connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+        self._report(results, compare_path=cast(str | None, opts.get("compare")))
+
+        out = opts.get("out")
+        if out:
+            Path(str(out)).write_text(json.dumps(results, indent=2), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {out}"))
+
+    def _run(
+        self,
+        tmp: Path,
+        *,
+        lines: int,
+        overlap: float,
+        types: list[str],
+        opts: dict[str, object],
+    ) -> dict[str, Any]:
+        per_type = lines // len(types)
+        seeded_per_type = int(per_type * overlap)
+
+        # Each type gets its own id block; the seed run covers the first `overlap` of every block
+        run_ranges: dict[str, range] = {}
+        seed_ranges: dict[str, range] = {}
+        for i, t in enumerate(types):
+            start = SYNTHETIC_ID_START + i * ID_BLOCK_SIZE
+            run_ranges[t] = range(start, start + per_type)
+            seed_ranges[t] = range(start, start + seeded_per_type)
+
+        phases: dict[str, dict[str, Any]] = {}
+        seed = int(cast(int, opts.get("seed") or 1))
+
+        def generate() -> int:
+            n = generate_payloads(tmp / "run", types=types, id_ranges=run_ranges, seed=seed)
+            generate_payloads(tmp / "seed", types=types, id_ranges=seed_ranges, seed=seed + 1)
+            return n
+
+        phases["generate"] = self._measure(generate)
+
+        server = start_stub_server(tmp)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        workers = str(opts.get("workers") or 4)
+
+        def run_import(name: str, variant: str) -> dict[str, Any]:
+            # import_poeninja's own per-phase metrics (fetch/decode/stage_copy/.../catalog)
+            metrics_path = tmp / f"metrics-{name}.json"
+
+            def _import() -> int:
+                call_command(
+                    "import_poeninja",
+                    "--league", BENCH_LEAGUE,
+                    "--base-url", f"{base}/{variant}/itemoverview",
+                    "--types", *types,
+                    "--workers", workers,
+                    "--sleep", "0",
+                    "--no-cache",
+                    "--no-set-active",
+                    "--metrics-out", str(metrics_path),
+                    stdout=StringIO(),
+                )
+                return sum(len(r) for r in (seed_ranges if variant == "seed" else run_ranges).values())
+
+            result = self._measure(_import)
+            report = json.loads(metrics_path.read_text(encoding="utf-8"))
+            result["import_phases"] = report.get("phases", {})
+            result["totals"] = report.get("totals", {})
+            return result
+
+        try:
+            if seeded_per_type:
+                phases["seed"] = run_import("seed", "seed")
+            # cold: new rows + price/content changes on the overlapping ones
+            phases["import"] = run_import("import", "run")
+            # warm: identical payload again, everything unchanged
+            phases["reimport"] = run_import("reimport", "run")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT version()")
+            db_version = cursor.fetchone()[0]
+
+        return {
+            "benchmark": "import_poeninja",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": db_version,
+            "params": {
+                "lines": per_type * len(types),
+                "overlap": overlap,
+                "types": types,
+                "seed": seed,
+                "workers": int(workers),
+            },
+            "phases": phases,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def _measure(self, fn: Callable[[], int]) -> dict[str, Any]:
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            start = time.perf_counter()
+            rows = fn()
+            seconds = time.perf_counter() - start
+
+        return {
+            "seconds": round(seconds, 3),
+            "rows": rows,
+            "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+            "queries": queries,
+        }
+
+    def _report(self, results: dict[str, Any], *, compare_path: str | None) -> None:
+        previous: dict[str, Any] = {}
+        if compare_path:
+            previous = json.loads(Path(compare_path).read_text(encoding="utf-8")).get("phases", {})
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"import_poeninja benchmark @ {results['git_revision'] or 'unknown'}: {results['params']}"
+        ))
+        for name, phase in results["phases"].items():
+            line = (
+                f"{name:>9}: {phase['seconds']:>8.3f}s  {phase['rows']:>7} rows  "
+                f"{phase['rows_per_sec'] or 0:>10.1f} rows/s  {phase['queries']:>5} queries"
+            )
+            old = previous.get(name)
+            if old and old.get("rows_per_sec") and phase.get("rows_per_sec"):
+                change = (phase["rows_per_sec"] / old["rows_per_sec"] - 1) * 100
+                line += f"  ({change:+.1f}% rows/s vs {compare_path})"
+            self.stdout.write(line)
+
+            old_phases = (old or {}).get("import_phases", {})
+            for sub, agg in sorted(phase.get("import_phases", {}).items(), key=lambda kv: -kv[1]["seconds"]):
+                sub_line = f"{'':>11}{sub:<11} {agg['seconds']:>8.3f}s  {agg['queries']:>6} queries  {agg['rows']:>8} rows"
+                old_agg = old_phases.get(sub)
+                if old_agg and old_agg.get("seconds"):
+                    sub_line += f"  ({(agg['seconds'] / old_agg['seconds'] - 1) * 100:+.1f}% time)"
+                self.stdout.write(sub_line)
+
+        self.stdout.write(f"peak RSS: {results['peak_rss_mb']} MB (whole run)")
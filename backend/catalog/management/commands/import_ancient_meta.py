@@ -1,97 +1,254 @@
 from __future__ import annotations
 
+import glob
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 
-from catalog.models import UniqueItem, UniqueAncientMeta
+from catalog.importers.readmodel import catalog_league_ids, refresh_catalog
+from catalog.importers.staging import bump_snapshot_version
+from catalog.models import UniqueItem, UniqueAncientMeta, normalized_name
+
+META_FIELDS = ["pool", "tier", "chance", "avg_orbs", "min_ilvl", "source"]
+POOLS = set(UniqueAncientMeta.Pool.values)
+# normalized_name() as raw SQL; the unique_item_name_trgm index (migration 0028) is on this expression
+NAME_KEY_SQL = r"lower(regexp_replace(btrim(name), '\s+', ' ', 'g'))"
 
 
 def normalize_name(s: str) -> str:
     return " ".join((s or "").strip().split())
 
 
+def resolve_paths(specs: list[str]) -> list[Path]:
+    """Files, directories (every *.json inside) and glob patterns -> sorted, de-duplicated files."""
+    paths: dict[Path, None] = {}
+    for spec in specs:
+        path = Path(spec).expanduser()
+        if path.is_dir():
+            found = sorted(path.glob("*.json"))
+        elif path.exists():
+            found = [path]
+        else:
+            found = sorted(Path(p) for p in glob.glob(str(path)))
+            if not found:
+                raise SystemExit(f"File not found: {path}")
+        paths.update(dict.fromkeys(p.resolve() for p in found if p.is_file()))
+    return list(paths)
+
+
+def pool_from_filename(path: Path) -> str | None:
+    # ancient_belts.json -> belt, ancient_body.json -> body
+    for word in path.stem.lower().replace("-", "_").split("_"):
+        for candidate in (word, word.removesuffix("s")):
+            if candidate in POOLS:
+                return candidate
+    return None
+
+
+def parse_snapshot(path: str, pool: str | None) -> tuple[list[tuple[str, str, dict[str, Any]]], str]:
+    """
+    Read one snapshot file into (pool, normalized name, fields) rows. Returns an error
+    message instead of raising, so every bad file is reported at once; a row whose
+    pool is missing or unknown makes the whole file an error.
+    """
+    file_path = Path(path)
+    try:
+        raw = json.loads(file_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        return [], f"{file_path.name}: {exc}"
+    if not isinstance(raw, list):
+        return [], f"{file_path.name}: JSON must be a list of objects"
+
+    default_pool = pool_from_filename(file_path)
+    out = []
+    for row in raw:
+        if not isinstance(row, dict):
+            continue
+        name = normalize_name(str(row.get("name") or "")).lower()
+        if not name:
+            continue
+        row_pool = pool or str(row.get("pool") or default_pool or "").strip().lower()
+        if row_pool not in POOLS:
+            if not row_pool:
+                return [], (
+                    f"{file_path.name}: no pool for {name!r}; give each row a \"pool\", "
+                    "name the pool in the file name (e.g. ancient_belts.json) or pass --pool"
+                )
+            return [], f"{file_path.name}: unknown pool {row_pool!r} for {name!r}"
+
+        tier_raw = row.get("tier")
+        try:
+            tier = int(tier_raw)
+        except (TypeError, ValueError):
+            tier = None
+
+        out.append((row_pool, name, {
+            "tier": tier,
+            "chance": row.get("chance"),
+            "avg_orbs": row.get("avg_orbs"),
+            "min_ilvl": row.get("min_ilvl"),
+            "source": row.get("source"),
+        }))
+    return out, ""
+
+
+def match_names(keys: list[str]) -> dict[str, int]:
+    """
+    Normalized name (see normalize_name, lowercased) -> UniqueItem id, in one query on
+    the unique_item_name_norm index, which normalizes stored names the same way.
+    """
+    return dict(
+        UniqueItem.objects
+        .annotate(key=normalized_name())
+        .filter(key__in=keys)
+        .order_by("id")
+        .values_list("key", "id")
+    )
+
+
+def match_names_fuzzy(keys: list[str], *, min_similarity: float) -> dict[str, tuple[int, str, float]]:
+    """
+    Normalized name -> (id, name, similarity) of the closest unique by trigram
+    similarity of the normalized names, for names at or above `min_similarity`.
+    Needs pg_trgm.
+    """
+    if not keys:
+        return {}
+    if connection.vendor != "postgresql":
+        raise SystemExit("--fuzzy needs PostgreSQL with the pg_trgm extension")
+
+    unique_table = UniqueItem._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            raise SystemExit("--fuzzy needs the pg_trgm extension (CREATE EXTENSION pg_trgm, then re-run migrate)")
+        # the % operator below uses this threshold and can be answered from the trigram index
+        cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(min_similarity)])
+        cursor.execute(
+            f"""
+            SELECT m.key, u.id, u.name, u.score
+            FROM unnest(%s::text[]) AS m(key)
+            CROSS JOIN LATERAL (
+                SELECT id, name, similarity({NAME_KEY_SQL}, m.key) AS score
+                FROM {unique_table}
+                WHERE {NAME_KEY_SQL} %% m.key
+                ORDER BY score DESC, id
+                LIMIT 1
+            ) AS u
+            """,
+            [keys],
+        )
+        return {key: (pk, name, float(score)) for key, pk, name, score in cursor.fetchall()}
+
+
 class Command(BaseCommand):
-    help = "Import Ancient Orb tier/odds metadata from JSON snapshot."
+    help = "Import Ancient Orb tier/odds metadata from JSON snapshots (one file per pool)."
 
     def add_arguments(self, parser) -> None:
         parser.add_argument(
             "--file",
             required=True,
-            help="Path to JSON file (e.g. data/ancient_belts.json)",
+            nargs="+",
+            help="JSON snapshot files, directories of them or glob patterns (e.g. data/ or 'data/ancient_*.json')",
         )
         parser.add_argument(
             "--pool",
-            default="belt",
-            help="Pool key (default: belt)",
+            help=(
+                "Pool for every row. Default: each row's own \"pool\", else the pool named in the file "
+                f"name. One of: {', '.join(sorted(POOLS))}"
+            ),
+        )
+        parser.add_argument(
+            "--fuzzy",
+            action="store_true",
+            help="Match names with no exact match to the most similar unique (pg_trgm), and report the scores.",
+        )
+        parser.add_argument(
+            "--min-similarity",
+            type=float,
+            default=0.6,
+            help="Lowest trigram similarity accepted by --fuzzy, 0-1. Default: 0.6",
         )
 
     def handle(self, *args: object, **opts: object) -> None:
-        file_path = Path(str(opts["file"])).expanduser().resolve()
-        pool = str(opts.get("pool") or "belt").strip().lower()
+        paths = resolve_paths([str(p) for p in cast(list[str], opts["file"])])
+        pool = str(opts.get("pool") or "").strip().lower() or None
+        if not paths:
+            raise SystemExit("No snapshot files found")
+        if pool is not None and pool not in POOLS:
+            raise SystemExit(f"Unknown --pool {pool!r}; expected one of: {', '.join(sorted(POOLS))}")
 
-        if not file_path.exists():
-            raise SystemExit(f"File not found: {file_path}")
+        parsed = [parse_snapshot(str(path), pool) for path in paths]
 
-        raw = json.loads(file_path.read_text(encoding="utf-8"))
-        if not isinstance(raw, list):
-            raise SystemExit("JSON must be a list of objects")
+        errors = [error for _, error in parsed if error]
+        if errors:
+            raise SystemExit("Could not read snapshots:\n  " + "\n  ".join(errors))
+
+        # later files win for a name listed twice in one pool
+        rows: dict[tuple[str, str], dict[str, Any]] = {}
+        for file_rows, _ in parsed:
+            for row_pool, name, fields in file_rows:
+                rows[(row_pool, name)] = fields
 
-        # Build lookup map of uniques by normalized name
-        uniques = {
-            normalize_name(u.name).lower(): u
-            for u in UniqueItem.objects.all()
-        }
+        names = list(dict.fromkeys(name for _, name in rows))
+        matched = match_names(names)
+        missing = [name for name in names if name not in matched]
 
-        updated = 0
-        missing = []
+        fuzzy: dict[str, tuple[int, str, float]] = {}
+        if opts.get("fuzzy") and missing:
+            fuzzy = match_names_fuzzy(missing, min_similarity=float(cast(float, opts.get("min_similarity"))))
+            matched.update({name: pk for name, (pk, _, _) in fuzzy.items()})
+            missing = [name for name in missing if name not in fuzzy]
+
+        # keyed by unique (a unique has one meta row): a unique listed in several pools, or
+        # under two spellings, keeps the last row and is reported below
+        metas: dict[int, UniqueAncientMeta] = {}
+        collisions: dict[int, list[str]] = {}
+        for (row_pool, name), fields in rows.items():
+            unique_id = matched.get(name)
+            if unique_id is None:
+                continue
+            if unique_id in metas:
+                collisions.setdefault(unique_id, [metas[unique_id].pool]).append(row_pool)
+            metas[unique_id] = UniqueAncientMeta(unique_item_id=unique_id, pool=row_pool, **fields)
+
+        by_pool: dict[str, list[UniqueAncientMeta]] = {}
+        for meta in metas.values():
+            by_pool.setdefault(meta.pool, []).append(meta)
 
         with transaction.atomic():
-            for row in raw:
-                if not isinstance(row, dict):
-                    continue
-
-                name = normalize_name(str(row.get("name") or "")).lower()
-                if not name:
-                    continue
-
-                unique = uniques.get(name)
-                if not unique:
-                    missing.append(name)
-                    continue
-
-                tier_raw = row.get("tier")
-                try:
-                    tier = int(tier_raw)
-                except (TypeError, ValueError):
-                    tier = None
-
-                chance = row.get("chance")
-                avg_orbs = row.get("avg_orbs")
-                min_ilvl = row.get("min_ilvl")
-                source = row.get("source")
-
-                UniqueAncientMeta.objects.update_or_create(
-                    unique_item=unique,
-                    defaults={
-                        "pool": pool,
-                        "tier": tier,
-                        "chance": chance,
-                        "avg_orbs": avg_orbs,
-                        "min_ilvl": min_ilvl,
-                        "source": source,
-                    },
+            for pool_metas in by_pool.values():
+                UniqueAncientMeta.objects.bulk_create(
+                    pool_metas,
+                    update_conflicts=True,
+                    unique_fields=["unique_item"],
+                    update_fields=[*META_FIELDS, "updated_at"],
                 )
-
-                updated += 1
+            if refresh_catalog(unique_ids=list(metas)):
+                bump_snapshot_version(*catalog_league_ids(list(metas)), now=timezone.now())
 
         self.stdout.write(self.style.SUCCESS(
-            f"Imported/updated {updated} rows into pool='{pool}'"
+            f"Imported/updated {len(metas)} rows from {len(paths)} file(s): "
+            + ", ".join(f"{p}={len(m)}" for p, m in sorted(by_pool.items()))
         ))
 
+        if collisions:
+            unique_names = dict(UniqueItem.objects.filter(pk__in=collisions).values_list("id", "name"))
+            self.stdout.write(self.style.WARNING(
+                f"{len(collisions)} uniques are listed more than once; the last row was kept:"
+            ))
+            for unique_id, pools in sorted(collisions.items()):
+                self.stdout.write(f"  - {unique_names[unique_id]}: {', '.join(pools)} -> {pools[-1]}")
+
+        if fuzzy:
+            self.stdout.write(self.style.WARNING(f"Fuzzy matched {len(fuzzy)} names:"))
+            for name, (_, unique_name, score) in sorted(fuzzy.items(), key=lambda kv: kv[1][2]):
+                self.stdout.write(f"  - {name} -> {unique_name} ({score:.2f})")
+
         if missing:
             self.stdout.write(self.style.WARNING(
                 f"Missing {len(missing)} uniques not found in DB:"
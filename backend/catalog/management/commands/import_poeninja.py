@@ -1,24 +1,47 @@
 from __future__ import annotations
 
 import json
+import multiprocessing
 import time
-from typing import Any, Final, Iterator, TypedDict, cast
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import IO, Any, Callable, Final, Iterator, TypedDict, cast
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 
+import django
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connections, transaction
 from django.utils import timezone
 
-from catalog.models import (
-    BaseItem,
-    League,
-    UniqueItem,
-    UniqueItemLeaguePresence,
-    UniqueItemLeagueStats,
+from catalog.http_client import HttpClient, HttpResult, atomic_write
+from catalog.importers.classification import CATALOG_FILENAME, BaseCatalog
+from catalog.importers.fetching import TokenBucket, fetch_concurrently, fetch_with_retry
+from catalog.importers.locks import LeagueBusyError, league_import_lock
+from catalog.importers.metrics import ImportMetrics, MetricsScope, prometheus_text
+from catalog.importers.readmodel import refresh_catalog
+from catalog.importers.rollups import rollup_daily_prices
+from catalog.importers.snapshots import (
+    PayloadClient,
+    RecordingClient,
+    ReplayClient,
+    SnapshotArchive,
+    SnapshotError,
 )
-
-# adding this to test again
+from catalog.importers.streaming import iter_array_items
+from catalog.importers.staging import (
+    BaseCache,
+    StageRow,
+    bump_snapshot_version,
+    create_shadow_tables,
+    drop_shadow_tables,
+    merge_stage_rows,
+    publish_shadow,
+    publishes_changes,
+)
+from catalog.models import ImportRun, League
 
 POE_NINJA_ITEMOVERVIEW_URL: Final[str] = "https://poe.ninja/api/data/itemoverview"
 
@@ -30,6 +53,9 @@ DEFAULT_TYPES: Final[list[str]] = [
     "UniqueJewel",
     ]
 
+# Fetched alongside the unique types; classifies bases and fills BaseItem.icon_url
+BASE_TYPE: Final[str] = "BaseType"
+
 
 class PoeNinjaLine(TypedDict, total=False):
     # Common fields (vary by type)
@@ -37,11 +63,12 @@ class PoeNinjaLine(TypedDict, total=False):
     name: str
     baseType: str
     typeLine: str
+    itemType: str
     icon: str
     levelRequired: int
 
-    explicitMods: list[str]
-    implicitMods: list[str]
+    explicitMods: list[str] | list[dict[str, Any]]
+    implicitMods: list[str] | list[dict[str, Any]]
     flavourText: list[str] | str
 
     chaosValue: float
@@ -49,24 +76,18 @@ class PoeNinjaLine(TypedDict, total=False):
     listingCount: int
 
 
+# Everything else on a line (sparkline, trade info, ...) is dropped while streaming
+LINE_FIELDS: Final[frozenset[str]] = frozenset(PoeNinjaLine.__annotations__)
+
+
 class PoeNinjaPayload(TypedDict):
     lines: list[PoeNinjaLine]
     # There are other keys like "currencyDetails" etc depending on endpoint,
     # but we only care about "lines" here.
 
 
-def fetch_json(url: str, *, timeout_s: int = 30) -> dict[str, Any]:
-    req = Request(
-        url,
-        headers={
-            "User-Agent": "poe-uniques-importer/1.0 (+django)",
-            "Accept": "application/json",
-        },
-        method="GET",
-    )
-    with urlopen(req, timeout=timeout_s) as resp:
-        raw = resp.read().decode("utf-8")
-    return cast(dict[str, Any], json.loads(raw))
+def fetch_json(url: str, *, client: HttpClient | None = None) -> dict[str, Any]:
+    return cast(dict[str, Any], (client or HttpClient()).get_json(url))
 
 
 def coalesce_str(*vals: object) -> str:
@@ -79,40 +100,62 @@ def coalesce_str(*vals: object) -> str:
     return ""
 
 
-def fetch_base_icon_map(league_name: str) -> dict[str, str]:
-    url = f"{POE_NINJA_ITEMOVERVIEW_URL}?{urlencode({'league': league_name, 'type': 'BaseType'})}"
-    payload = fetch_json(url)
-    icon_map: dict[str, str] = {}
+def itemoverview_url(league_name: str, import_type: str, base_url: str = POE_NINJA_ITEMOVERVIEW_URL) -> str:
+    return f"{base_url}?{urlencode({'league': league_name, 'type': import_type})}"
 
-    for row in iter_lines(payload):
-        # BaseType rows typically identify the base by "name"
-        base_name = coalesce_str(row.get("name"), row.get("baseType"), row.get("typeLine"))
-        icon_url = coalesce_str(row.get("icon"))
-        if base_name and icon_url:
-            icon_map[base_name] = icon_url
 
-    return icon_map
+def build_base_catalog(payload: dict[str, Any] | IO[bytes]) -> BaseCatalog:
+    return BaseCatalog.from_lines(iter_lines(payload))
+
+
+def load_base_catalog(result: HttpResult, cache_dir: str | None) -> BaseCatalog:
+    """
+    Classification table for a BaseType payload, from the on-disk copy when the body
+    is unchanged since it was built.
+    """
+    path = Path(cache_dir) / CATALOG_FILENAME if cache_dir else None
+    if path is not None:
+        cached = BaseCatalog.load(path, digest=result.digest)
+        if cached is not None:
+            return cached
+
+    with result.open() as fh:
+        base_catalog = build_base_catalog(fh)
+    if path is not None:
+        base_catalog.save(path, digest=result.digest)
+    return base_catalog
 
 
 def to_text(val: object) -> str:
     """
-    poe.ninja commonly uses lists for mod lines.
-    Convert list[str] -> newline text, str -> stripped.
+    poe.ninja commonly uses lists for mod lines, as strings or {"text": ..., "optional": ...}
+    objects. Convert the list -> newline text of the mod texts, str -> stripped.
     """
     if isinstance(val, list):
-        return "\n".join(str(x) for x in val if x is not None).strip()
+        parts = (x.get("text") if isinstance(x, dict) else x for x in val)
+        return "\n".join(str(x) for x in parts if x is not None).strip()
     if isinstance(val, str):
         return val.strip()
     return ""
 
 
-def iter_lines(payload: dict[str, Any]) -> Iterator[PoeNinjaLine]:
-    raw_lines = payload.get("lines", [])
-    if isinstance(raw_lines, list):
-        for row in raw_lines:
-            if isinstance(row, dict):
-                # We accept it as PoeNinjaLine-like; missing keys are fine (TypedDict total=False)
-                yield cast(PoeNinjaLine, row)
+def iter_lines(payload: dict[str, Any] | IO[bytes]) -> Iterator[PoeNinjaLine]:
+    """
+    Yield "lines" rows from a decoded payload, or straight off a binary stream
+    (incrementally, keeping only LINE_FIELDS of each row).
+    """
+    if isinstance(payload, dict):
+        raw_lines = payload.get("lines", [])
+        if isinstance(raw_lines, list):
+            for row in raw_lines:
+                if isinstance(row, dict):
+                    # We accept it as PoeNinjaLine-like; missing keys are fine (TypedDict total=False)
+                    yield cast(PoeNinjaLine, row)
+        return
+
+    for row in iter_array_items(payload, "lines"):
+        if isinstance(row, dict):
+            yield cast(PoeNinjaLine, {k: v for k, v in row.items() if k in LINE_FIELDS})
 
 
 def parse_required_level(val: object) -> int | None:
@@ -124,47 +167,129 @@ def parse_required_level(val: object) -> int | None:
         return None
     return n if n >= 0 else None
 
-def infer_item_class(import_type: str) -> str:
-    t = (import_type or "").lower()
-    if "armour" in t: return BaseItem.ItemClass.ARMOUR
-    if "weapon" in t: return BaseItem.ItemClass.WEAPON
-    if "accessory" in t: return BaseItem.ItemClass.ACCESSORY
-    if "flask" in t: return BaseItem.ItemClass.FLASK
-    if "jewel" in t: return BaseItem.ItemClass.JEWEL
-    return BaseItem.ItemClass.OTHER
-
-def infer_slot(base_name: str, import_type: str) -> str | None:
-    n = (base_name or "").lower()
-    t = (import_type or "").lower()
+def build_stage_row(row: PoeNinjaLine, import_type: str, base_catalog: BaseCatalog) -> StageRow | None:
+    """
+    Normalize one itemoverview line into a staging row.
+    Returns None for rows without a unique name or base (they were always skipped).
+    """
+    unique_name = coalesce_str(row.get("name"))
+    base_name = coalesce_str(row.get("baseType"), row.get("typeLine"))
 
-    if "armour" in t:
-        if "boots" in n: return BaseItem.Slot.BOOTS
-        if "gloves" in n or "gauntlets" in n: return BaseItem.Slot.GLOVES
-        if "helmet" in n or "helm" in n or "hood" in n: return BaseItem.Slot.HELMET
-        if "shield" in n: return BaseItem.Slot.SHIELD
-        return BaseItem.Slot.BODY
+    if not unique_name or not base_name:
+        return None
 
-    if "accessory" in t:
-        if "belt" in n: return BaseItem.Slot.BELT
-        if "ring" in n: return BaseItem.Slot.RING
-        if "amulet" in n: return BaseItem.Slot.AMULET
-        return BaseItem.Slot.OTHER
+    base_info = base_catalog.classify(base_name, import_type)
+
+    implicit = to_text(row.get("implicitMods"))
+    explicit = to_text(row.get("explicitMods"))
+    raw_mods = "\n".join([part for part in (implicit, explicit) if part]).strip()
+
+    poe_id = row.get("id")
+
+    return StageRow(
+        poe_ninja_id=int(poe_id) if poe_id is not None else None,
+        name=unique_name,
+        base_name=base_name,
+        item_class=base_info.item_class,
+        slot=base_info.slot,
+        base_icon=base_info.icon,
+        required_level=parse_required_level(row.get("levelRequired")),
+        image_url=coalesce_str(row.get("icon")),
+        raw_mods=raw_mods,
+        flavour_text=to_text(row.get("flavourText")),
+        chaos_value=row.get("chaosValue"),
+        divine_value=row.get("divineValue"),
+        listing_count=row.get("listingCount"),
+    )
 
-    if "weapon" in t: return BaseItem.Slot.WEAPON
-    if "flask" in t: return BaseItem.Slot.FLASK
-    if "jewel" in t: return BaseItem.Slot.JEWEL
 
-    return None
+@dataclass(frozen=True)
+class ImportOptions:
+    """Per-league settings; picklable so it can be handed to worker processes."""
+    types: list[str]
+    rate: float
+    workers: int
+    retries: int
+    cache_dir: str | None
+    force: bool
+    dry_run: bool
+    record_dir: str | None = None
+    replay_dir: str | None = None
+    base_url: str = POE_NINJA_ITEMOVERVIEW_URL
+    mark_unseen: bool = False
+    atomic: bool = False
+
+
+def open_client(options: ImportOptions) -> PayloadClient:
+    if options.replay_dir:
+        return ReplayClient(SnapshotArchive(options.replay_dir))
+    client = HttpClient(cache_dir=options.cache_dir, pool_size=options.workers)
+    if options.record_dir:
+        return RecordingClient(client, SnapshotArchive(options.record_dir, create=True))
+    return client
+
+
+def empty_totals() -> dict[str, int]:
+    # unique_*/stats_* count distinct poe_ninja ids per type, not payload rows
+    return {
+        "base_created": 0,
+        "base_touched": 0,
+        "unique_created": 0,
+        "unique_updated": 0,
+        "unique_unchanged": 0,
+        "stats_changed": 0,
+        "stats_unchanged": 0,
+        "presence_created": 0,
+        "presence_refreshed": 0,
+        "presence_delisted": 0,
+        "rollups_updated": 0,
+        "catalog_updated": 0,
+    }
+
+
+def _init_league_worker() -> None:
+    # no-op under fork; needed when the platform spawns fresh interpreters
+    django.setup()
+
+
+def _import_league_worker(
+    league_name: str,
+    options: ImportOptions,
+    base_catalog: BaseCatalog,
+    base_cache: BaseCache,
+) -> tuple[dict[str, int], list[dict[str, Any]]]:
+    cmd = Command()
+    cmd.label = f"[{league_name}] "
+    metrics = ImportMetrics()
+    totals = cmd.import_league(
+        league_name, options, base_catalog=base_catalog, base_cache=base_cache, metrics=metrics
+    )
+    return totals, metrics.as_rows()
 
 
 class Command(BaseCommand):
-    help = "Import uniques/base items from poe.ninja itemoverview endpoints."
+    help = (
+        "Import uniques/base items from poe.ninja itemoverview endpoints. UniqueItem and Stats "
+        "totals count distinct uniques per type (a poe.ninja id listed twice counts once), split "
+        "into created/updated/unchanged by content hash; the pre-staging importer counted every "
+        "non-new row as updated."
+    )
+
+    # prefixed to output lines when several leagues import in parallel
+    label = ""
 
     def add_arguments(self, parser) -> None:
         parser.add_argument(
             "--league",
             required=True,
-            help="League name (e.g. Standard, Settlers). Default: Standard",
+            nargs="+",
+            help="One or more league names (e.g. Standard Hardcore Settlers). Leagues import in parallel processes.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Worker processes for multi-league imports. Default: one per league",
         )
         parser.add_argument(
             "--types",
@@ -176,7 +301,72 @@ class Command(BaseCommand):
             "--sleep",
             type=float,
             default=0.4,
-            help="Seconds to sleep between requests. Default: 0.4",
+            help="Minimum seconds between request starts, shared by all leagues. Default: 0.4",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent HTTP downloads. Default: 4",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            help="Retries per request on timeouts, 429 and 5xx (with backoff). Default: 3",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            default=str(settings.HTTP_CACHE_DIR),
+            help="On-disk response cache used for conditional GETs. Default: settings.HTTP_CACHE_DIR",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always download full payloads (no If-None-Match/If-Modified-Since).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import types even when poe.ninja answers 304 Not Modified.",
+        )
+        parser.add_argument(
+            "--base-url",
+            default=POE_NINJA_ITEMOVERVIEW_URL,
+            help=f"itemoverview endpoint (e.g. a mirror or local stub). Default: {POE_NINJA_ITEMOVERVIEW_URL}",
+        )
+        parser.add_argument(
+            "--record",
+            metavar="DIR",
+            help="Also write every fetched payload into a compressed snapshot archive in DIR.",
+        )
+        parser.add_argument(
+            "--replay",
+            metavar="DIR",
+            help="Import from a snapshot archive recorded with --record. No network access.",
+        )
+        parser.add_argument(
+            "--mark-unseen",
+            action="store_true",
+            help="Mark uniques missing from an imported type's payload as delisted in the league.",
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help=(
+                "Collect every type of a league before touching live stats/presence, then publish "
+                "them in one short transaction. A failed run leaves the previous snapshot as it was."
+            ),
+        )
+        parser.add_argument(
+            "--metrics-out",
+            metavar="FILE",
+            help="Write per-league/type/phase timings, query counts and rows/sec as JSON.",
+        )
+        parser.add_argument(
+            "--prometheus-out",
+            metavar="FILE",
+            help="Write run metrics in Prometheus textfile-collector format (e.g. for node_exporter).",
         )
         parser.add_argument(
             "--dry-run",
@@ -187,7 +377,7 @@ class Command(BaseCommand):
             "--set-active",
             action="store_true",
             default=True,
-            help="Mark this league as active and deactivate other leagues"
+            help="Mark the first --league as active and deactivate other leagues"
         )
         parser.add_argument(
             "--no-set-active",
@@ -197,150 +387,484 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args: object, **opts: object) -> None:
-        league_name = str(opts.get("league", "Standard")).strip()
+        league_names = list(dict.fromkeys(
+            str(name).strip() for name in cast(list[str], opts.get("league") or []) if str(name).strip()
+        ))
         types = cast(list[str], opts.get("types", list(DEFAULT_TYPES)))
         sleep_s = float(opts.get("sleep", 0.4) or 0.0)
         dry_run = bool(opts.get("dry_run", False))
-        base_icon_map = fetch_base_icon_map(league_name)
+        set_active = bool(opts.get("set_active", True))
 
-        if not league_name:
+        if not league_names:
             raise SystemExit("--league cannot be blank")
         if not types:
             raise SystemExit("--types cannot be empty")
 
-        self.stdout.write(self.style.MIGRATE_HEADING(f"Importing league={league_name}, types={types}"))
-
-        league_obj, _ = League.objects.get_or_create(name=league_name)
-
-        set_active = bool(opts.get("is_active", True))
+        record_dir = str(opts["record"]) if opts.get("record") else None
+        replay_dir = str(opts["replay"]) if opts.get("replay") else None
+        if record_dir and replay_dir:
+            raise SystemExit("--record and --replay are mutually exclusive")
+        if replay_dir:
+            try:
+                SnapshotArchive(replay_dir)
+            except SnapshotError as exc:
+                raise SystemExit(str(exc))
+
+        processes = min(len(league_names), int(cast(int, opts.get("processes") or 0)) or len(league_names))
+
+        options = ImportOptions(
+            types=types,
+            # one request budget for the whole run, split between league processes; replay is unthrottled
+            rate=(1.0 / sleep_s / processes) if sleep_s > 0 and not replay_dir else 0.0,
+            workers=int(cast(int, opts.get("workers", 4)) or 1),
+            retries=int(cast(int, opts.get("retries", 3)) or 0),
+            cache_dir=None if opts.get("no_cache") else str(opts.get("cache_dir") or settings.HTTP_CACHE_DIR),
+            # replayed payloads always import; there is no 304 to skip on
+            force=bool(opts.get("force", False)) or bool(replay_dir),
+            dry_run=dry_run,
+            record_dir=record_dir,
+            replay_dir=replay_dir,
+            base_url=str(opts.get("base_url") or POE_NINJA_ITEMOVERVIEW_URL),
+            mark_unseen=bool(opts.get("mark_unseen", False)),
+            atomic=bool(opts.get("atomic", False)),
+        )
 
         if not dry_run and set_active:
+            league_obj, _ = League.objects.get_or_create(name=league_names[0])
             League.objects.filter(is_active=True).exclude(pk=league_obj.pk).update(is_active=False)
             if not league_obj.is_active:
                 league_obj.is_active=True
                 league_obj.save(update_fields=["is_active"])
 
-        today = timezone.localdate()
-        now_dt = timezone.now()
-
-        totals: dict[str, int] = {
-            "base_created": 0,
-            "base_touched": 0,
-            "unique_created": 0,
-            "unique_updated": 0,
-            "presence_upserted": 0,
-        }
-
-        for t in types:
-            url = f"{POE_NINJA_ITEMOVERVIEW_URL}?{urlencode({'league': league_name, 'type': t})}"
-            self.stdout.write(self.style.HTTP_INFO(f"GET {url}"))
-
-            payload = fetch_json(url)
-            rows = list(iter_lines(payload))
-            self.stdout.write(self.style.SUCCESS(f"  -> {len(rows)} rows"))
-
-            if dry_run:
-                time.sleep(sleep_s)
-                continue
-
-            # One atomic block per type keeps DB consistent and performance reasonable
-            with transaction.atomic():
-                for row in rows:
-                    unique_name = coalesce_str(row.get("name"))
-                    base_name = coalesce_str(row.get("baseType"), row.get("typeLine"))
-
-                    if not unique_name or not base_name:
-                        continue
-
-                    image_url = coalesce_str(row.get("icon"))
-                    required_level = parse_required_level(row.get("levelRequired"))
-
-                    implicit = to_text(row.get("implicitMods"))
-                    explicit = to_text(row.get("explicitMods"))
-                    raw_mods = "\n".join([part for part in (implicit, explicit) if part]).strip()
+        metrics = ImportMetrics()
+        run = None
+        if not dry_run:
+            run = ImportRun.objects.create(leagues=league_names, types=types)
+        started = time.time()
+        totals = empty_totals()
+        error = ""
+
+        try:
+            if len(league_names) == 1:
+                totals = self.import_league(league_names[0], options, metrics=metrics)
+            else:
+                totals = self._import_leagues_parallel(league_names, options, processes=processes, metrics=metrics)
+        except (SnapshotError, LeagueBusyError) as exc:
+            error = str(exc)
+            raise SystemExit(error)
+        except BaseException as exc:
+            error = repr(exc)
+            raise
+        finally:
+            self.report_metrics(
+                metrics,
+                run=run,
+                started=started,
+                totals=totals,
+                error=error,
+                leagues=league_names,
+                types=types,
+                metrics_out=cast(str | None, opts.get("metrics_out")),
+                prometheus_out=cast(str | None, opts.get("prometheus_out")),
+                verbosity=int(cast(int, opts.get("verbosity", 1))),
+            )
 
-                    flavour = to_text(row.get("flavourText"))
-
-                    item_class = infer_item_class(t)
-                    slot = infer_slot(base_name, t)
-
-                    base_obj, base_created = BaseItem.objects.get_or_create(
-                        name=base_name,
-                        defaults={"item_class": item_class, "slot": slot, "icon_url": base_icon_map.get(base_name)},
-                    )
+        self.stdout.write(self.style.SUCCESS("Done."))
+        self.stdout.write(
+            "BaseItem: created={base_created} touched={base_touched}\n"
+            "UniqueItem: created={unique_created} updated={unique_updated} unchanged={unique_unchanged}\n"
+            "Stats: changed={stats_changed} unchanged={stats_unchanged}\n"
+            "Presence: created={presence_created} refreshed={presence_refreshed} delisted={presence_delisted}\n"
+            "Daily rollups: updated={rollups_updated}\n"
+            "Catalog entries: updated={catalog_updated}".format(**totals)
+        )
 
-                    changed = False
-                    if base_obj.item_class == BaseItem.ItemClass.OTHER and item_class != BaseItem.ItemClass.OTHER:
-                        base_obj.item_class = item_class
-                        changed = True
-                    if base_obj.slot in (None, "") and slot:
-                        base_obj.slot = slot
-                        changed = True
-                    
-                    base_icon = base_icon_map.get(base_name)
-                    if base_icon and not base_obj.icon_url:
-                        base_obj.icon_url = base_icon
-                        changed = True
-
-                    if changed:
-                        base_obj.save(update_fields=["item_class", "slot","icon_url"])
-                    
-                    if base_created:
-                        totals["base_created"] += 1
-                    totals["base_touched"] += 1
-
-                    poe_id = row.get("id")
-                    if poe_id is None:
-                        continue
-
-                    unique_obj, created = UniqueItem.objects.update_or_create(
-                        poe_ninja_id = poe_id,
-                        defaults={
-                            "name": unique_name,
-                            "base_item": base_obj,
-                            "required_level": required_level,
-                            "image_url": image_url,
-                            "raw_mods": raw_mods,
-                            "flavour_text": flavour,
-                        },
-                    )
+    def report_metrics(
+        self,
+        metrics: ImportMetrics,
+        *,
+        run: ImportRun | None,
+        started: float,
+        totals: dict[str, int],
+        error: str,
+        leagues: list[str],
+        types: list[str],
+        metrics_out: str | None,
+        prometheus_out: str | None,
+        verbosity: int = 1,
+    ) -> None:
+        finished = time.time()
+        phases = metrics.by_phase()
+
+        if verbosity >= 2:
+            for phase, agg in sorted(phases.items(), key=lambda kv: -kv[1]["seconds"]):
+                self.stdout.write(
+                    f"  {phase:<11} {agg['seconds']:>9.3f}s  {agg['queries']:>6} queries  {agg['rows']:>8} rows"
+                )
+
+        if run is not None:
+            run.status = ImportRun.Status.FAILED if error else ImportRun.Status.OK
+            run.finished_at = timezone.now()
+            run.duration_seconds = round(finished - started, 3)
+            run.totals = totals
+            run.phases = phases
+            run.error = error
+            run.save(update_fields=["status", "finished_at", "duration_seconds", "totals", "phases", "error"])
+
+        if metrics_out:
+            report = {
+                "run_id": run.pk if run is not None else None,
+                "started_at": datetime.fromtimestamp(started, tz=dt_timezone.utc).isoformat(),
+                "finished_at": datetime.fromtimestamp(finished, tz=dt_timezone.utc).isoformat(),
+                "duration_seconds": round(finished - started, 3),
+                "success": not error,
+                "leagues": leagues,
+                "types": types,
+                "totals": totals,
+                "phases": phases,
+                "timings": sorted(metrics.as_rows(), key=lambda t: (t["league"], t["import_type"], t["phase"])),
+            }
+            atomic_write(Path(metrics_out), json.dumps(report, indent=2).encode("utf-8"))
+
+        if prometheus_out:
+            text = prometheus_text(
+                metrics, started_at=started, finished_at=finished, totals=totals, success=not error
+            )
+            atomic_write(Path(prometheus_out), text.encode("utf-8"))
+
+    def _import_leagues_parallel(
+        self,
+        league_names: list[str],
+        options: ImportOptions,
+        *,
+        processes: int,
+        metrics: ImportMetrics,
+    ) -> dict[str, int]:
+        """
+        One process per league. The BaseType catalog is fetched once here and the
+        BaseItem resolution cache is shared, so bases are resolved once per run.
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Importing leagues={league_names} in {processes} processes, types={options.types}"
+        ))
+
+        client = open_client(options)
+        try:
+            result = fetch_with_retry(
+                client.get,
+                itemoverview_url(league_names[0], BASE_TYPE, options.base_url),
+                limiter=TokenBucket(rate=0.0),
+                retries=options.retries,
+            )
+            base_catalog = load_base_catalog(result, options.cache_dir)
+        finally:
+            client.close()
+        self.stdout.write(self.style.SUCCESS(f"  -> {len(base_catalog)} base types"))
+
+        totals = empty_totals()
+
+        # Children must open their own DB connections, never inherit ours
+        connections.close_all()
+
+        with multiprocessing.Manager() as manager:
+            base_cache = cast(BaseCache, manager.dict())
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_league_worker) as pool:
+                futures = {
+                    pool.submit(_import_league_worker, name, options, base_catalog, base_cache): name
+                    for name in league_names
+                }
+                for fut in as_completed(futures):
+                    league_totals, league_timings = fut.result()
+                    metrics.extend(league_timings)
+                    self.stdout.write(self.style.SUCCESS(
+                        f"[{futures[fut]}] done: {league_totals['unique_created']} created, "
+                        f"{league_totals['unique_updated']} updated, {league_totals['stats_changed']} prices changed"
+                    ))
+                    for k, n in league_totals.items():
+                        totals[k] += n
+            self.stdout.write(f"Base items resolved once for {len(base_cache)} (base, class) pairs")
+
+        return totals
+
+    def import_league(
+        self,
+        league_name: str,
+        options: ImportOptions,
+        *,
+        base_catalog: BaseCatalog | None = None,
+        base_cache: BaseCache | None = None,
+        metrics: ImportMetrics | None = None,
+        on_type_done: Callable[[str, dict[str, int]], None] | None = None,
+    ) -> dict[str, int]:
+        """
+        Fetch and import every type for one league. Pass `base_catalog` to skip the
+        BaseType request (multi-league runs fetch it once). `on_type_done(type, counts)`
+        is called after each type is written, with empty counts for types skipped as
+        not modified. With options.atomic it is called for the written types only once
+        the league is published, and their counts include that type's stats_changed and
+        stats_unchanged; a run that fails before publishing reports none of them.
+        Raises LeagueBusyError if another process is importing the league.
+        """
+        league_obj, _ = League.objects.get_or_create(name=league_name)
+        with league_import_lock(league_obj.pk, league_name):
+            return self._import_league(
+                league_obj,
+                options,
+                base_catalog=base_catalog,
+                base_cache=base_cache,
+                metrics=metrics or ImportMetrics(),
+                on_type_done=on_type_done,
+            )
+
+    def _import_league(
+        self,
+        league_obj: League,
+        options: ImportOptions,
+        *,
+        base_catalog: BaseCatalog | None,
+        base_cache: BaseCache | None,
+        metrics: ImportMetrics,
+        on_type_done: Callable[[str, dict[str, int]], None] | None,
+    ) -> dict[str, int]:
+        league_name = league_obj.name
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{self.label}Importing league={league_name}, types={options.types}"
+        ))
+
+        if base_cache is None:
+            base_cache = {}
 
-                    chaos_value = row.get("chaosValue")
-                    divine_value = row.get("divineValue")
-                    listing_count = row.get("listingCount")
+        today = timezone.localdate()
+        now_dt = timezone.now()
 
-                    UniqueItemLeagueStats.objects.update_or_create(
-                        unique_item=unique_obj,
+        totals = empty_totals()
+
+        urls = {}
+        if base_catalog is None:
+            urls[BASE_TYPE] = itemoverview_url(league_name, BASE_TYPE, options.base_url)
+        urls.update({t: itemoverview_url(league_name, t, options.base_url) for t in options.types})
+        limiter = TokenBucket(rate=options.rate)
+        client = open_client(options)
+        url_types = {url: t for t, url in urls.items()}
+
+        def fetch(url: str) -> HttpResult:
+            start = time.perf_counter()
+            # Cache validators are only stored once a type has been written, see HttpClient.get
+            result = client.get(url, store=False)
+            metrics.add(
+                "fetch",
+                time.perf_counter() - start,
+                league=league_name,
+                import_type=url_types[url],
+                nbytes=0 if result.not_modified else result.path.stat().st_size,
+            )
+            return result
+
+        shadow = options.atomic and not options.dry_run
+        # with --atomic, validators are only stored once the league is published, so a
+        # failed run re-downloads everything next time
+        unpublished: list[HttpResult] = []
+        staged_types: list[str] = []
+        # with --atomic, per-type counts are held back until publish_shadow adds the stats
+        deferred_counts: dict[str, dict[str, int]] = {}
+        type_counts: dict[str, dict[str, int]] = {}
+        # uniques whose stats changed, for the daily rollups
+        changed_ids: set[int] = set()
+        if shadow:
+            create_shadow_tables()
+        try:
+            self._fetch_and_import(
+                fetch,
+                urls,
+                client,
+                limiter,
+                options,
+                base_catalog=base_catalog,
+                base_cache=base_cache,
+                league_obj=league_obj,
+                today=today,
+                now_dt=now_dt,
+                totals=totals,
+                metrics=metrics,
+                on_type_done=on_type_done,
+                unpublished=unpublished,
+                staged_types=staged_types,
+                deferred_counts=deferred_counts,
+                changed_ids=changed_ids,
+                shadow=shadow,
+            )
+
+            if shadow and staged_types:
+                # the list read model switches over in the same transaction as the data
+                with transaction.atomic():
+                    counts = publish_shadow(
                         league=league_obj,
-                        defaults={
-                            "chaos_value": chaos_value,
-                            "divine_value": divine_value,
-                            "listing_count": listing_count,
-                            "last_fetched_at": now_dt
-                        }
+                        today=today,
+                        now=now_dt,
+                        delist_types=staged_types if options.mark_unseen else [],
+                        metrics=metrics.scope(league_name),
+                        changed_ids=changed_ids,
+                        type_counts=type_counts,
                     )
-
-                    if created:
-                        totals["unique_created"] += 1
-                    else:
-                        totals["unique_updated"] += 1
-
-                    pres_obj, pres_created = UniqueItemLeaguePresence.objects.get_or_create(
-                        unique_item=unique_obj,
-                        league=league_obj,
-                        defaults={"first_seen_at": today, "last_seen_at": today},
+                    with metrics.scope(league_name).phase("catalog") as phase:
+                        totals["catalog_updated"] = phase.rows = refresh_catalog(league_id=league_obj.pk)
+                    for k, n in counts.items():
+                        totals[k] += n
+                    # an unchanged payload keeps the version, and with it API caches and ETags
+                    if publishes_changes(totals):
+                        bump_snapshot_version(league_obj.pk, now=now_dt)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{self.label}  published {len(staged_types)} type(s) for league={league_name}"
+                ))
+            elif staged_types:
+                with transaction.atomic(), metrics.scope(league_name).phase("catalog") as phase:
+                    totals["catalog_updated"] = phase.rows = refresh_catalog(league_id=league_obj.pk)
+                    if publishes_changes(totals):
+                        bump_snapshot_version(league_obj.pk, now=now_dt)
+
+            for type_result in unpublished:
+                client.store(type_result)
+            if on_type_done is not None:
+                for t, counts in deferred_counts.items():
+                    on_type_done(t, {**counts, **type_counts.get(t, {})})
+        finally:
+            if shadow:
+                drop_shadow_tables()
+            client.close()
+
+        if changed_ids:
+            with transaction.atomic(), metrics.scope(league_name).phase("rollups") as phase:
+                totals["rollups_updated"] = phase.rows = rollup_daily_prices(
+                    league_id=league_obj.pk, now=now_dt, unique_ids=changed_ids
+                )
+
+        return totals
+
+    def _fetch_and_import(
+        self,
+        fetch: Callable[[str], HttpResult],
+        urls: dict[str, str],
+        client: PayloadClient,
+        limiter: TokenBucket,
+        options: ImportOptions,
+        *,
+        base_catalog: BaseCatalog | None,
+        base_cache: BaseCache,
+        league_obj: League,
+        today: date,
+        now_dt: datetime,
+        totals: dict[str, int],
+        metrics: ImportMetrics,
+        on_type_done: Callable[[str, dict[str, int]], None] | None,
+        unpublished: list[HttpResult],
+        staged_types: list[str],
+        deferred_counts: dict[str, dict[str, int]],
+        changed_ids: set[int],
+        shadow: bool,
+    ) -> None:
+        league_name = league_obj.name
+        # Types are written as soon as they arrive, except that the base catalog has to be in first
+        waiting: list[tuple[str, HttpResult]] = []
+
+        for key, result in fetch_concurrently(
+            fetch, urls, limiter=limiter, max_workers=options.workers, retries=options.retries
+        ):
+            status = "304 Not Modified" if result.not_modified else f"{result.path.stat().st_size} bytes"
+            self.stdout.write(self.style.HTTP_INFO(f"{self.label}GET {urls[key]} ({status})"))
+
+            if key == BASE_TYPE:
+                base_catalog = load_base_catalog(result, options.cache_dir)
+                client.store(result)
+                self.stdout.write(self.style.SUCCESS(f"{self.label}  -> {len(base_catalog)} base types"))
+                ready, waiting = waiting, []
+            elif base_catalog is None:
+                waiting.append((key, result))
+                continue
+            else:
+                ready = [(key, result)]
+
+            for t, type_result in ready:
+                if type_result.not_modified and not options.force:
+                    self.stdout.write(f"{self.label}  {t} -> not modified, skipped")
+                    if on_type_done is not None:
+                        on_type_done(t, {})
+                    continue
+
+                with type_result.open() as fh:
+                    counts = self._import_type(
+                        t,
+                        fh,
+                        base_catalog=base_catalog,
+                        base_cache=base_cache,
+                        league_obj=league_obj,
+                        today=today,
+                        now_dt=now_dt,
+                        dry_run=options.dry_run,
+                        mark_unseen=options.mark_unseen,
+                        shadow=shadow,
+                        metrics=metrics.scope(league_name, t),
+                        changed_ids=changed_ids,
                     )
-                    if not pres_created and pres_obj.last_seen_at != today:
-                        pres_obj.last_seen_at = today
-                        pres_obj.save(update_fields=["last_seen_at"])
-
-                    totals["presence_upserted"] += 1
-
-            time.sleep(sleep_s)
-
-        self.stdout.write(self.style.SUCCESS("Done."))
-        self.stdout.write(
-            "BaseItem: created={base_created} touched={base_touched}\n"
-            "UniqueItem: created={unique_created} updated={unique_updated}\n"
-            "Presence: upserted={presence_upserted}".format(**totals)
-        )
+                for k, n in counts.items():
+                    totals[k] += n
+                if counts.get("base_touched"):
+                    staged_types.append(t)
+                if shadow:
+                    unpublished.append(type_result)
+                    deferred_counts[t] = counts
+                    continue
+                if not options.dry_run:
+                    client.store(type_result)
+                if on_type_done is not None:
+                    on_type_done(t, counts)
+
+    def _import_type(
+        self,
+        import_type: str,
+        payload: dict[str, Any] | IO[bytes],
+        *,
+        base_catalog: BaseCatalog,
+        base_cache: BaseCache,
+        league_obj: League,
+        today: date,
+        now_dt: datetime,
+        dry_run: bool,
+        mark_unseen: bool,
+        shadow: bool,
+        metrics: MetricsScope,
+        changed_ids: set[int],
+    ) -> dict[str, int]:
+        rows = iter_lines(payload)
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"{self.label}  {import_type} -> {sum(1 for _ in rows)} rows"))
+            return {}
+
+        seen = 0
+
+        def staged() -> Iterator[StageRow]:
+            nonlocal seen
+            for row in rows:
+                seen += 1
+                stage_row = build_stage_row(row, import_type, base_catalog)
+                if stage_row is not None:
+                    yield stage_row
+
+        # One atomic block per type: rows are streamed into the staging table in batches
+        # and merged set-based
+        with transaction.atomic():
+            counts = merge_stage_rows(
+                staged(),
+                league=league_obj,
+                today=today,
+                now=now_dt,
+                base_cache=base_cache,
+                metrics=metrics,
+                import_type=import_type,
+                mark_unseen=mark_unseen,
+                shadow=shadow,
+                changed_ids=changed_ids,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"{self.label}  {import_type} -> {seen} rows"))
+        return counts
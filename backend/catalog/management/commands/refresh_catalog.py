@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from typing import cast
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.importers.readmodel import refresh_catalog
+from catalog.importers.staging import bump_snapshot_version
+from catalog.models import League
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the uniques list read model (UniqueItemLeagueCatalog). The importers keep it "
+        "current and migration 0032 backfills it; run this after editing catalog data by hand."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--league",
+            nargs="*",
+            default=[],
+            help="Leagues to rebuild. Default: all",
+        )
+
+    def handle(self, *args: object, **opts: object) -> None:
+        names = [str(n).strip() for n in cast(list[str], opts.get("league") or []) if str(n).strip()]
+        leagues = League.objects.order_by("name")
+        if names:
+            leagues = leagues.filter(name__in=names)
+            missing = set(names) - set(leagues.values_list("name", flat=True))
+            if missing:
+                raise SystemExit(f"Unknown league(s): {', '.join(sorted(missing))}")
+
+        for league in leagues:
+            start = time.perf_counter()
+            with transaction.atomic():
+                written = refresh_catalog(league_id=league.pk)
+                if written:
+                    bump_snapshot_version(league.pk, now=timezone.now())
+            self.stdout.write(f"{league.name}: {written} entries written ({time.perf_counter() - start:.2f}s)")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
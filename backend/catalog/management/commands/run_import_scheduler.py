@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import datetime as dt
+import signal
+import threading
+import time
+import traceback
+from dataclasses import replace
+from typing import cast
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from catalog.importers.locks import LeagueBusyError
+from catalog.importers.metrics import ImportMetrics
+from catalog.importers.scheduling import (
+    due_schedules,
+    ensure_schedules,
+    next_due_at,
+    record_failure,
+    record_success,
+)
+from catalog.management.commands.import_poeninja import (
+    DEFAULT_TYPES,
+    POE_NINJA_ITEMOVERVIEW_URL,
+    Command as ImportCommand,
+    ImportOptions,
+    empty_totals,
+)
+from catalog.models import ImportRun, ImportSchedule, League
+
+
+class Command(BaseCommand):
+    help = (
+        "Long-running import loop: refreshes each league/type when due, more often for "
+        "categories whose prices moved on recent runs."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--league",
+            nargs="*",
+            default=[],
+            help="Leagues to keep fresh. Default: the active league(s), re-read every tick",
+        )
+        parser.add_argument(
+            "--types",
+            nargs="*",
+            default=list(DEFAULT_TYPES),
+            help=f"poe.ninja itemoverview types. Default: {', '.join(DEFAULT_TYPES)}",
+        )
+        parser.add_argument(
+            "--min-interval",
+            type=int,
+            default=600,
+            help="Seconds between refreshes of the most volatile types. Default: 600",
+        )
+        parser.add_argument(
+            "--max-interval",
+            type=int,
+            default=3 * 3600,
+            help="Seconds between refreshes of types whose prices do not move. Default: 10800",
+        )
+        parser.add_argument(
+            "--tick",
+            type=float,
+            default=30.0,
+            help="Longest sleep between checks for due work. Default: 30",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run whatever is due now and exit.",
+        )
+        parser.add_argument(
+            "--mark-unseen",
+            action="store_true",
+            help="Mark uniques missing from an imported type's payload as delisted in the league.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.4,
+            help="Minimum seconds between request starts. Default: 0.4",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent HTTP downloads. Default: 4",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            help="Retries per request on timeouts, 429 and 5xx (with backoff). Default: 3",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            default=str(settings.HTTP_CACHE_DIR),
+            help="On-disk response cache used for conditional GETs. Default: settings.HTTP_CACHE_DIR",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always download full payloads (no If-None-Match/If-Modified-Since).",
+        )
+        parser.add_argument(
+            "--base-url",
+            default=POE_NINJA_ITEMOVERVIEW_URL,
+            help=f"itemoverview endpoint. Default: {POE_NINJA_ITEMOVERVIEW_URL}",
+        )
+
+    def handle(self, *args: object, **opts: object) -> None:
+        league_names = [str(n).strip() for n in cast(list[str], opts.get("league") or []) if str(n).strip()]
+        types = cast(list[str], opts.get("types") or list(DEFAULT_TYPES))
+        min_s = int(cast(int, opts.get("min_interval") or 600))
+        max_s = int(cast(int, opts.get("max_interval") or 3 * 3600))
+        tick = max(1.0, float(cast(float, opts.get("tick") or 30.0)))
+        sleep_s = float(cast(float, opts.get("sleep") or 0.0))
+
+        if not types:
+            raise SystemExit("--types cannot be empty")
+        if min_s < 1 or max_s < min_s:
+            raise SystemExit("--min-interval must be positive and not above --max-interval")
+
+        options = ImportOptions(
+            types=types,
+            rate=(1.0 / sleep_s) if sleep_s > 0 else 0.0,
+            workers=int(cast(int, opts.get("workers") or 1)),
+            retries=int(cast(int, opts.get("retries") or 0)),
+            cache_dir=None if opts.get("no_cache") else str(opts.get("cache_dir") or settings.HTTP_CACHE_DIR),
+            force=False,
+            dry_run=False,
+            base_url=str(opts.get("base_url") or POE_NINJA_ITEMOVERVIEW_URL),
+            mark_unseen=bool(opts.get("mark_unseen", False)),
+        )
+
+        stop = threading.Event()
+
+        def request_stop(signum, frame) -> None:
+            self.stdout.write(f"Signal {signum}: stopping after the current import")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        # one warm importer for the life of the process
+        importer = ImportCommand(stdout=self.stdout, stderr=self.stderr)
+
+        while not stop.is_set():
+            close_old_connections()
+            leagues = self._leagues(league_names)
+            if not leagues:
+                raise SystemExit("No --league given and no active league set")
+
+            ensure_schedules(leagues, types, now=timezone.now())
+            for league, schedules in due_schedules(leagues, types, now=timezone.now()).items():
+                if stop.is_set():
+                    break
+                self._run_league(importer, league, schedules, options, min_s=min_s, max_s=max_s, tick=tick)
+
+            if opts.get("once"):
+                break
+
+            next_at = next_due_at(leagues, types)
+            wait_s = tick if next_at is None else (next_at - timezone.now()).total_seconds()
+            stop.wait(min(tick, max(1.0, wait_s)))
+
+    def _leagues(self, names: list[str]) -> list[League]:
+        if names:
+            return [League.objects.get_or_create(name=name)[0] for name in names]
+        return list(League.objects.filter(is_active=True).order_by("name"))
+
+    def _run_league(
+        self,
+        importer: ImportCommand,
+        league: League,
+        schedules: list[ImportSchedule],
+        options: ImportOptions,
+        *,
+        min_s: int,
+        max_s: int,
+        tick: float,
+    ) -> None:
+        pending = {s.import_type: s for s in schedules}
+        types = list(pending)
+
+        started = timezone.now()
+        ImportSchedule.objects.filter(pk__in=[s.pk for s in schedules]).update(last_started_at=started)
+
+        def on_type_done(import_type: str, counts: dict[str, int]) -> None:
+            schedule = pending.pop(import_type, None)
+            if schedule is not None:
+                record_success(schedule, counts, finished=timezone.now(), min_s=min_s, max_s=max_s)
+                self.stdout.write(
+                    f"[{league.name}] {import_type}: churn={schedule.churn:.3f}, "
+                    f"next in {schedule.interval_seconds}s"
+                )
+
+        metrics = ImportMetrics()
+        run = ImportRun.objects.create(command="run_import_scheduler", leagues=[league.name], types=types)
+        run_started = time.time()
+        totals = empty_totals()
+        error = ""
+
+        try:
+            totals = importer.import_league(
+                league.name,
+                replace(options, types=types),
+                metrics=metrics,
+                on_type_done=on_type_done,
+            )
+        except LeagueBusyError as exc:
+            # not a failure: someone else is refreshing it, look again next tick
+            error = str(exc)
+            self.stdout.write(self.style.WARNING(f"[{league.name}] {exc}"))
+            retry_at = timezone.now() + dt.timedelta(seconds=tick)
+            ImportSchedule.objects.filter(pk__in=[s.pk for s in pending.values()]).update(next_run_at=retry_at)
+            pending.clear()
+        except Exception as exc:
+            error = repr(exc)
+            self.stderr.write(f"[{league.name}] import failed:\n{traceback.format_exc()}")
+        finally:
+            finished = timezone.now()
+            for schedule in pending.values():
+                record_failure(schedule, finished=finished, min_s=min_s, max_s=max_s)
+            importer.report_metrics(
+                metrics,
+                run=run,
+                started=run_started,
+                totals=totals,
+                error=error,
+                leagues=[league.name],
+                types=types,
+                metrics_out=None,
+                prometheus_out=None,
+            )
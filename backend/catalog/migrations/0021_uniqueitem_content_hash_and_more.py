@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0020_alter_uniqueancientmeta_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uniqueitem',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='uniqueitemleaguestats',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0021_uniqueitem_content_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniqueItemPriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('chaos_value', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('divine_value', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('listing_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='catalog.league')),
+                ('unique_item', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='catalog.uniqueitem')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['bucket'], name='price_history_bucket_brin')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='uniqueitempricehistory',
+            constraint=models.UniqueConstraint(fields=('unique_item', 'league', 'bucket'), name='uniq_price_history_bucket'),
+        ),
+    ]
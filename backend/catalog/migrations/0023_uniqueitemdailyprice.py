@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0022_uniqueitempricehistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniqueItemDailyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('open_chaos', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('high_chaos', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('low_chaos', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('close_chaos', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('avg_chaos', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('avg_listing_count', models.DecimalField(blank=True, decimal_places=1, max_digits=10, null=True)),
+                ('points', models.PositiveSmallIntegerField(default=0)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='catalog.league')),
+                ('unique_item', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='catalog.uniqueitem')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uniqueitemdailyprice',
+            constraint=models.UniqueConstraint(fields=('unique_item', 'league', 'day'), name='uniq_daily_price_day'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0023_uniqueitemdailyprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(default='import_poeninja', max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('ok', 'OK'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('leagues', models.JSONField(blank=True, default=list)),
+                ('types', models.JSONField(blank=True, default=list)),
+                ('totals', models.JSONField(blank=True, default=dict)),
+                ('phases', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0024_importrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('import_type', models.CharField(max_length=50)),
+                ('interval_seconds', models.PositiveIntegerField(default=1800)),
+                ('next_run_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, default='', max_length=20)),
+                ('last_rows', models.PositiveIntegerField(default=0)),
+                ('last_changed', models.PositiveIntegerField(default=0)),
+                ('churn', models.FloatField(default=0.0)),
+                ('failures', models.PositiveSmallIntegerField(default=0)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_schedules', to='catalog.league')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importschedule',
+            constraint=models.UniqueConstraint(fields=('league', 'import_type'), name='uniq_import_schedule_league_type'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0025_importschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uniqueitemleaguepresence',
+            name='delisted_at',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uniqueitemleaguepresence',
+            name='source_type',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='uniqueitemleaguepresence',
+            index=models.Index(fields=['league', 'source_type'], name='catalog_uni_league__d48fbe_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0026_presence_source_type_delisted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='league',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:20
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm ships with contrib; without it import_ancient_meta --fuzzy is unavailable
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS unique_item_name_trgm ON catalog_uniqueitem "
+        "USING gin (lower(regexp_replace(btrim(name), '\\s+', ' ', 'g')) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS unique_item_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0027_league_snapshot_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uniqueitem',
+            index=models.Index(django.db.models.functions.text.Lower(models.Func(django.db.models.functions.text.Trim('name'), models.Value('\\s+'), models.Value(' '), models.Value('g'), function='regexp_replace')), name='unique_item_name_norm'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0028_unique_item_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uniqueancientmeta',
+            name='pool',
+            field=models.CharField(choices=[('helmet', 'Helmet'), ('body', 'Body Armour'), ('gloves', 'Gloves'), ('boots', 'Boots'), ('shield', 'Shield'), ('weapon', 'Weapon'), ('belt', 'Belt'), ('ring', 'Ring'), ('amulet', 'Amulet'), ('jewel', 'Jewel')], db_index=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0029_ancient_meta_pools'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniqueItemLeagueCatalog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('required_level', models.PositiveIntegerField(blank=True, null=True)),
+                ('image_url', models.URLField(blank=True, default='', max_length=500)),
+                ('flavour_text', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField()),
+                ('base_name', models.CharField(max_length=200)),
+                ('item_class', models.CharField(choices=[('weapon', 'Weapon'), ('armour', 'Armour'), ('accessory', 'Accessory'), ('jewel', 'Jewel'), ('flask', 'Flask'), ('other', 'Other')], max_length=20)),
+                ('slot', models.CharField(choices=[('helmet', 'Helmet'), ('body', 'Body Armour'), ('gloves', 'Gloves'), ('boots', 'Boots'), ('shield', 'Shield'), ('weapon', 'Weapon'), ('belt', 'Belt'), ('ring', 'Ring'), ('amulet', 'Amulet'), ('jewel', 'Jewel'), ('flask', 'Flask'), ('other', 'Other')], max_length=20)),
+                ('base_icon_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('ancient_meta', models.JSONField(blank=True, null=True)),
+                ('ancient_tier', models.IntegerField(blank=True, null=True)),
+                ('ancient_rank', models.SmallIntegerField(default=32767)),
+                ('chaos_value', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('divine_value', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('listing_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('base_item', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.baseitem')),
+                ('league', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entries', to='catalog.league')),
+                ('unique_item', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entries', to='catalog.uniqueitem')),
+            ],
+            options={
+                'indexes': [models.Index(models.F('league'), models.F('ancient_rank'), models.OrderBy(models.F('chaos_value'), descending=True, nulls_last=True), models.F('name'), name='catalog_default_order'), models.Index(fields=['league', 'name'], name='catalog_league_name'), models.Index(fields=['league', 'chaos_value'], name='catalog_league_chaos'), models.Index(fields=['league', 'divine_value'], name='catalog_league_divine'), models.Index(fields=['league', 'listing_count'], name='catalog_league_listings'), models.Index(fields=['league', 'required_level'], name='catalog_league_level'), models.Index(fields=['league', 'slot', 'item_class'], name='catalog_league_slot')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='uniqueitemleaguecatalog',
+            constraint=models.UniqueConstraint(fields=('league', 'unique_item'), name='uniq_catalog_league_unique'),
+        ),
+    ]
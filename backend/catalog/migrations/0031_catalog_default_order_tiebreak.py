@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0030_uniqueitemleaguecatalog'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='uniqueitemleaguecatalog',
+            name='catalog_default_order',
+        ),
+        migrations.AddIndex(
+            model_name='uniqueitemleaguecatalog',
+            index=models.Index(models.F('league'), models.F('ancient_rank'), models.OrderBy(models.F('chaos_value'), descending=True, nulls_last=True), models.F('name'), models.F('unique_item'), name='catalog_default_order'),
+        ),
+    ]
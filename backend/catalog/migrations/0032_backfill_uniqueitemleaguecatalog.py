@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:05
+
+from django.db import migrations
+
+# UniqueItemLeagueCatalog.RANK_UNTIERED / RANK_NO_ANCIENT as of this migration
+RANK_UNTIERED = 32766
+RANK_NO_ANCIENT = 32767
+
+
+def backfill_catalog(apps, schema_editor):
+    # the uniques list reads only the read model; fill it from the presence/stats that
+    # already exist so the API does not serve empty leagues until the next import.
+    # The SQL is frozen here (refresh_catalog as of this migration) so later changes to
+    # the importer cannot change what this migration does; table names come from the
+    # historical models.
+    def table(model_name):
+        return apps.get_model("catalog", model_name)._meta.db_table
+
+    schema_editor.execute(
+        f"""
+        INSERT INTO {table("UniqueItemLeagueCatalog")} (
+            league_id, unique_item_id, name, required_level, image_url, flavour_text,
+            created_at, base_item_id, base_name, item_class, slot, base_icon_url,
+            ancient_meta, ancient_tier, ancient_rank, chaos_value, divine_value,
+            listing_count, refreshed_at
+        )
+        SELECT
+            p.league_id,
+            u.id,
+            u.name,
+            u.required_level,
+            u.image_url,
+            u.flavour_text,
+            u.created_at,
+            b.id,
+            b.name,
+            b.item_class,
+            b.slot,
+            b.icon_url,
+            CASE WHEN m.id IS NULL THEN NULL ELSE jsonb_build_object(
+                'pool', m.pool,
+                'tier', m.tier,
+                'chance', m.chance,
+                'avg_orbs', m.avg_orbs,
+                'min_ilvl', m.min_ilvl,
+                'source', m.source
+            ) END,
+            m.tier,
+            CASE WHEN m.id IS NULL THEN {RANK_NO_ANCIENT} ELSE COALESCE(m.tier, {RANK_UNTIERED}) END,
+            s.chaos_value,
+            s.divine_value,
+            s.listing_count,
+            now()
+        FROM {table("UniqueItemLeaguePresence")} p
+        JOIN {table("UniqueItem")} u ON u.id = p.unique_item_id
+        JOIN {table("BaseItem")} b ON b.id = u.base_item_id
+        LEFT JOIN {table("UniqueItemLeagueStats")} s
+            ON s.unique_item_id = p.unique_item_id AND s.league_id = p.league_id
+        LEFT JOIN {table("UniqueAncientMeta")} m ON m.unique_item_id = p.unique_item_id
+        WHERE p.delisted_at IS NULL
+        ON CONFLICT (league_id, unique_item_id) DO NOTHING
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0031_catalog_default_order_tiebreak'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+    ]
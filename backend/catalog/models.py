@@ -1,7 +1,15 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Lower, Trim
 from django.utils import timezone
 
 
+def normalized_name(field: str = "name"):
+  """lower(name) with whitespace trimmed and runs collapsed to one space, in SQL."""
+  return Lower(Func(Trim(field), Value(r"\s+"), Value(" "), Value("g"), function="regexp_replace"))
+
+
 class BaseItem(models.Model):
   class ItemClass(models.TextChoices):
     WEAPON = "weapon", "Weapon"
@@ -57,8 +65,18 @@ class UniqueItem(models.Model):
   flavour_text = models.TextField(blank=True, default="")
   raw_mods = models.TextField(blank=True, default="")
 
+  # hash of the imported static fields; the importer skips rows whose hash is unchanged
+  content_hash = models.CharField(max_length=32, blank=True, default="")
+
   created_at = models.DateTimeField(auto_now_add=True)
 
+  class Meta:
+    indexes = [
+      # whitespace/case-insensitive name lookups, see import_ancient_meta (migration 0028
+      # also adds a pg_trgm index on the same expression where the extension is available)
+      models.Index(normalized_name(), name="unique_item_name_norm"),
+    ]
+
   def __str__(self):
     return self.name
   
@@ -69,6 +87,11 @@ class League(models.Model):
   name = models.CharField(max_length=100, unique=True)
   is_active = models.BooleanField(default=False)
 
+  # bumped each time an import publishes new stats/presence or ancient meta for the league;
+  # API cache keys embed it
+  snapshot_version = models.PositiveIntegerField(default=0)
+  published_at = models.DateTimeField(null=True, blank=True)
+
   created_at = models.DateTimeField(auto_now_add=True)
   updated_at = models.DateTimeField(auto_now=True)
 
@@ -94,6 +117,10 @@ class UniqueItemLeaguePresence(models.Model):
   first_seen_at = models.DateField(default=timezone.localdate)
   last_seen_at = models.DateField(default=timezone.localdate)
 
+  # poe.ninja type the unique was last listed under, and when it stopped being listed there
+  source_type = models.CharField(max_length=50, blank=True, default="")
+  delisted_at = models.DateField(null=True, blank=True)
+
   class Meta:
     constraints = [
       models.UniqueConstraint(
@@ -103,7 +130,8 @@ class UniqueItemLeaguePresence(models.Model):
     ]
     indexes = [
       models.Index(fields=["league", "last_seen_at"]),
-      models.Index(fields=["unique_item", "league"])
+      models.Index(fields=["unique_item", "league"]),
+      models.Index(fields=["league", "source_type"]),
     ]
   
   def __str__(self):
@@ -130,6 +158,9 @@ class UniqueItemLeagueStats(models.Model):
   confidence = models.CharField(max_length=20, blank=True, default="")
   raw = models.JSONField(blank=True, default=dict)
 
+  # hash of chaos/divine/listing values from the last import that changed them
+  content_hash = models.CharField(max_length=32, blank=True, default="")
+
   last_fetched_at = models.DateTimeField(default=timezone.now)
 
   class Meta:
@@ -149,10 +180,192 @@ class UniqueItemLeagueStats(models.Model):
     return f"{self.unique_item} @ {self.league}"
   
 
+class UniqueItemPriceHistory(models.Model):
+  """
+  Price series, one row per unique/league/hour bucket in which the price changed. A
+  point holds until the next one for the same unique/league. Imports only add rows
+  for changed prices, and a second change within the same hour replaces that hour's
+  point (last write wins), so a bucket holds the price at the end of its hour.
+
+  Not partitioned per league: Postgres needs the partition key in the primary key,
+  which Django cannot model here, and each new league would need its own partition.
+  Per-item lookups use the unique constraint's index and time scans the BRIN index.
+  """
+
+  unique_item = models.ForeignKey(
+    "UniqueItem",
+    on_delete=models.CASCADE,
+    related_name="price_history",
+    # covered by the unique constraint below
+    db_index=False,
+  )
+  league = models.ForeignKey(
+    "League",
+    on_delete=models.CASCADE,
+    related_name="price_history",
+  )
+
+  # import time truncated to the hour
+  bucket = models.DateTimeField()
+
+  chaos_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  divine_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  listing_count = models.PositiveIntegerField(null=True, blank=True)
+
+  class Meta:
+    constraints = [
+      # also the index behind the per-item series lookup
+      models.UniqueConstraint(
+        fields=["unique_item", "league", "bucket"],
+        name="uniq_price_history_bucket",
+      )
+    ]
+    indexes = [
+      # rows arrive in time order, so a BRIN index on bucket stays tiny
+      BrinIndex(fields=["bucket"], name="price_history_bucket_brin"),
+    ]
+
+  def __str__(self):
+    return f"{self.unique_item} @ {self.league} ({self.bucket:%Y-%m-%d %H:00})"
+
+
+class UniqueItemDailyPrice(models.Model):
+  """
+  Daily open/high/low/close rollup of UniqueItemPriceHistory, rebuilt by the importer
+  for the days it touched. Days without a price change have no row; the previous
+  close holds.
+  """
+
+  unique_item = models.ForeignKey(
+    "UniqueItem",
+    on_delete=models.CASCADE,
+    related_name="daily_prices",
+    # covered by the unique constraint below
+    db_index=False,
+  )
+  league = models.ForeignKey(
+    "League",
+    on_delete=models.CASCADE,
+    related_name="daily_prices",
+  )
+
+  day = models.DateField()
+
+  open_chaos = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  high_chaos = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  low_chaos = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  close_chaos = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  avg_chaos = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  avg_listing_count = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True)
+
+  # the day's own history points; the carried-over opening point is not counted
+  points = models.PositiveSmallIntegerField(default=0)
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(
+        fields=["unique_item", "league", "day"],
+        name="uniq_daily_price_day",
+      )
+    ]
+
+  def __str__(self):
+    return f"{self.unique_item} @ {self.league} ({self.day})"
+
+
+class UniqueItemLeagueCatalog(models.Model):
+  """
+  Read model behind the uniques list: one row per unique listed (not delisted) in a
+  league, with everything a list page shows copied in, so the endpoint never joins or
+  runs per-row subqueries. Rebuilt by the importers (see catalog.importers.readmodel);
+  never edit it by hand.
+  """
+
+  # ancient_rank for uniques with an ancient meta but no tier, and for uniques without one
+  RANK_UNTIERED = 32766
+  RANK_NO_ANCIENT = 32767
+
+  # both covered by the unique constraint below
+  league = models.ForeignKey(
+    "League",
+    on_delete=models.CASCADE,
+    related_name="catalog_entries",
+    db_index=False,
+  )
+  unique_item = models.ForeignKey(
+    "UniqueItem",
+    on_delete=models.CASCADE,
+    related_name="catalog_entries",
+    db_index=False,
+  )
+
+  name = models.CharField(max_length=200)
+  required_level = models.PositiveIntegerField(null=True, blank=True)
+  image_url = models.URLField(max_length=500, blank=True, default="")
+  flavour_text = models.TextField(blank=True, default="")
+  created_at = models.DateTimeField()
+
+  base_item = models.ForeignKey(BaseItem, on_delete=models.CASCADE, related_name="+", db_index=False)
+  base_name = models.CharField(max_length=200)
+  item_class = models.CharField(max_length=20, choices=BaseItem.ItemClass.choices)
+  slot = models.CharField(max_length=20, choices=BaseItem.Slot.choices)
+  base_icon_url = models.URLField(max_length=500, blank=True, null=True)
+
+  # UniqueAncientMeta as served by the API, or null
+  ancient_meta = models.JSONField(null=True, blank=True)
+  ancient_tier = models.IntegerField(null=True, blank=True)
+  # default sort key: ancient tier first, then untiered ancients, then the rest
+  ancient_rank = models.SmallIntegerField(default=RANK_NO_ANCIENT)
+
+  chaos_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  divine_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+  listing_count = models.PositiveIntegerField(null=True, blank=True)
+
+  refreshed_at = models.DateTimeField(default=timezone.now)
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(
+        fields=["league", "unique_item"],
+        name="uniq_catalog_league_unique",
+      )
+    ]
+    indexes = [
+      # the list endpoint's default ordering; also the seek index for cursor pages
+      models.Index(
+        "league",
+        "ancient_rank",
+        F("chaos_value").desc(nulls_last=True),
+        "name",
+        "unique_item",
+        name="catalog_default_order",
+      ),
+      models.Index(fields=["league", "name"], name="catalog_league_name"),
+      models.Index(fields=["league", "chaos_value"], name="catalog_league_chaos"),
+      models.Index(fields=["league", "divine_value"], name="catalog_league_divine"),
+      models.Index(fields=["league", "listing_count"], name="catalog_league_listings"),
+      models.Index(fields=["league", "required_level"], name="catalog_league_level"),
+      models.Index(fields=["league", "slot", "item_class"], name="catalog_league_slot"),
+    ]
+
+  def __str__(self):
+    return f"{self.name} @ {self.league_id}"
+
+
 class UniqueAncientMeta(models.Model):
   
   class Pool(models.TextChoices):
-    BELT = 'Belt', "belt"
+    # Ancient Orb pools, named like BaseItem.Slot
+    HELMET = "helmet", "Helmet"
+    BODY = "body", "Body Armour"
+    GLOVES = "gloves", "Gloves"
+    BOOTS = "boots", "Boots"
+    SHIELD = "shield", "Shield"
+    WEAPON = "weapon", "Weapon"
+    BELT = "belt", "Belt"
+    RING = "ring", "Ring"
+    AMULET = "amulet", "Amulet"
+    JEWEL = "jewel", "Jewel"
 
   unique_item = models.OneToOneField(
     "UniqueItem",
@@ -172,4 +385,71 @@ class UniqueAncientMeta(models.Model):
   updated_at = models.DateTimeField(auto_now=True)
 
   def __str__(self) -> str:
-    return f"{self.unique_item.name} ({self.pool})"
\ No newline at end of file
+    return f"{self.unique_item.name} ({self.pool})"
+
+
+class ImportRun(models.Model):
+  """
+  One import_poeninja run: row totals and per-phase timings, for charting import
+  performance over time.
+  """
+
+  class Status(models.TextChoices):
+    RUNNING = "running", "Running"
+    OK = "ok", "OK"
+    FAILED = "failed", "Failed"
+
+  command = models.CharField(max_length=50, default="import_poeninja")
+  status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+
+  started_at = models.DateTimeField(default=timezone.now, db_index=True)
+  finished_at = models.DateTimeField(null=True, blank=True)
+  duration_seconds = models.FloatField(null=True, blank=True)
+
+  leagues = models.JSONField(blank=True, default=list)
+  types = models.JSONField(blank=True, default=list)
+  totals = models.JSONField(blank=True, default=dict)
+  # phase -> {"seconds", "queries", "rows"} summed over leagues and types
+  phases = models.JSONField(blank=True, default=dict)
+  error = models.TextField(blank=True, default="")
+
+  def __str__(self):
+    return f"{self.command} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class ImportSchedule(models.Model):
+  """
+  Refresh state of one league/type for run_import_scheduler. The interval shrinks
+  when recent runs changed many prices and grows when they changed few.
+  """
+
+  league = models.ForeignKey(
+    "League",
+    on_delete=models.CASCADE,
+    related_name="import_schedules",
+  )
+  import_type = models.CharField(max_length=50)
+
+  interval_seconds = models.PositiveIntegerField(default=1800)
+  next_run_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+  last_started_at = models.DateTimeField(null=True, blank=True)
+  last_finished_at = models.DateTimeField(null=True, blank=True)
+  last_status = models.CharField(max_length=20, blank=True, default="")
+  last_rows = models.PositiveIntegerField(default=0)
+  last_changed = models.PositiveIntegerField(default=0)
+
+  # smoothed share of rows whose price changed per run
+  churn = models.FloatField(default=0.0)
+  failures = models.PositiveSmallIntegerField(default=0)
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(
+        fields=["league", "import_type"],
+        name="uniq_import_schedule_league_type",
+      )
+    ]
+
+  def __str__(self):
+    return f"{self.league} {self.import_type} every {self.interval_seconds}s"
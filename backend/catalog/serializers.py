@@ -1,5 +1,13 @@
 from rest_framework import serializers
-from .models import BaseItem, UniqueItem, UniqueAncientMeta, League
+from .models import (
+  BaseItem,
+  UniqueItem,
+  UniqueAncientMeta,
+  League,
+  UniqueItemPriceHistory,
+  UniqueItemDailyPrice,
+  UniqueItemLeagueCatalog,
+)
 
 class BaseItemSerializer(serializers.ModelSerializer):
   class Meta:
@@ -34,6 +42,39 @@ class UniqueItemListSerializer(serializers.ModelSerializer):
       "flavour_text", 
       "ancient_meta"]
 
+class UniqueItemCatalogSerializer(serializers.ModelSerializer):
+  """Same shape as UniqueItemListSerializer, read from UniqueItemLeagueCatalog."""
+  id = serializers.IntegerField(source="unique_item_id", read_only=True)
+  base_item = serializers.SerializerMethodField()
+  ancient_meta = serializers.JSONField(read_only=True)
+
+  chaos_value = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+  divine_value = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+  listing_count = serializers.IntegerField(read_only=True)
+
+  class Meta:
+    model = UniqueItemLeagueCatalog
+    fields = [
+      "id",
+      "name",
+      "required_level",
+      "image_url",
+      "base_item",
+      "chaos_value",
+      "divine_value",
+      "listing_count",
+      "flavour_text",
+      "ancient_meta"]
+
+  def get_base_item(self, obj):
+    return {
+      "id": obj.base_item_id,
+      "name": obj.base_name,
+      "item_class": obj.item_class,
+      "slot": obj.slot,
+      "icon_url": obj.base_icon_url,
+    }
+
 class UniqueItemDetailSerializer(serializers.ModelSerializer):
   base_item = BaseItemSerializer(read_only=True) 
   ancient_meta = UniqueItemMetaSerializer(read_only=True)
@@ -50,4 +91,27 @@ class UniqueItemDetailSerializer(serializers.ModelSerializer):
     "base_item",
     "created_at",
     "ancient_meta",
-    ]
\ No newline at end of file
+    ]
+
+class PriceHistorySerializer(serializers.ModelSerializer):
+  class Meta:
+    model = UniqueItemPriceHistory
+    fields = ["bucket", "chaos_value", "divine_value", "listing_count"]
+
+
+class DailyPriceSerializer(serializers.ModelSerializer):
+  # True for days with no price change, carried over from the previous close
+  filled = serializers.BooleanField(read_only=True, default=False)
+
+  class Meta:
+    model = UniqueItemDailyPrice
+    fields = [
+      "day",
+      "open_chaos",
+      "high_chaos",
+      "low_chaos",
+      "close_chaos",
+      "avg_chaos",
+      "avg_listing_count",
+      "filled",
+    ]
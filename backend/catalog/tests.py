@@ -1,3 +1,1092 @@
-from django.test import TestCase
+import datetime as dt
+import io
+import json
+import signal
+import tempfile
+import threading
+from decimal import Decimal
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
 
-# Create your tests here.
+import requests
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import viewsets
+
+from catalog.caching import CACHE_ALIAS, CachedResponseMixin, normalize_params, versioned_key
+from catalog.http_client import HttpClient
+from catalog.importers.classification import BaseCatalog
+from catalog.importers.fetching import (
+    MAX_RETRY_AFTER_S,
+    TokenBucket,
+    _retry_delay,
+    fetch_concurrently,
+    fetch_with_retry,
+)
+from catalog.importers.metrics import ImportMetrics, prometheus_text
+from catalog.importers.readmodel import refresh_catalog
+from catalog.importers.rollups import rollup_daily_prices
+from catalog.importers.scheduling import (
+    CHURN_SATURATION,
+    CHURN_SMOOTHING,
+    due_schedules,
+    ensure_schedules,
+    failure_backoff,
+    next_due_at,
+    next_interval,
+    record_failure,
+    record_success,
+)
+from catalog.importers.snapshots import RecordingClient, ReplayClient, SnapshotArchive, SnapshotError
+from catalog.importers.staging import (
+    SHADOW_PRESENCE_TABLE,
+    SHADOW_STATS_TABLE,
+    StageRow,
+    bump_snapshot_version,
+    merge_stage_rows,
+)
+from catalog.importers.streaming import iter_array_items
+from catalog.management.commands.benchmark_import import MAX_LINES
+from catalog.management.commands.import_poeninja import Command as ImportCommand, ImportOptions
+from catalog.models import (
+    BaseItem,
+    ImportRun,
+    ImportSchedule,
+    League,
+    UniqueAncientMeta,
+    UniqueItem,
+    UniqueItemDailyPrice,
+    UniqueItemLeagueCatalog,
+    UniqueItemLeaguePresence,
+    UniqueItemLeagueStats,
+)
+from catalog.views import UniqueCursorPagination, UniqueItemViewSet
+from tools.extract_ancient_belts_from_poeladder import extract_unique_rows
+
+UNIQUES_URL = "/api/uniques/"
+
+
+def stage_row(poe_ninja_id, name=None, *, chaos=1.0, base_name="Leather Belt", flavour_text=""):
+    return StageRow(
+        poe_ninja_id=poe_ninja_id,
+        name=name or f"Unique {poe_ninja_id}",
+        base_name=base_name,
+        item_class=BaseItem.ItemClass.ACCESSORY.value,
+        slot=BaseItem.Slot.BELT.value,
+        base_icon=None,
+        required_level=10,
+        image_url="",
+        raw_mods="+10 to maximum Life",
+        flavour_text=flavour_text,
+        chaos_value=chaos,
+        divine_value=None,
+        listing_count=5,
+    )
+
+
+def import_rows(league, rows, *, now=None, **kwargs):
+    now = now or timezone.now()
+    with transaction.atomic():
+        totals = merge_stage_rows(
+            rows,
+            league=league,
+            today=timezone.localdate(now),
+            now=now,
+            import_type="UniqueAccessory",
+            **kwargs,
+        )
+        refresh_catalog(league_id=league.pk)
+    return totals
+
+
+class MergeStageRowsTests(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test", is_active=True)
+
+    def test_counts_created_updated_unchanged(self):
+        rows = [stage_row(1), stage_row(2), stage_row(3)]
+
+        totals = import_rows(self.league, rows)
+        self.assertEqual(totals["unique_created"], 3)
+        self.assertEqual(totals["unique_updated"], 0)
+        self.assertEqual(totals["stats_changed"], 3)
+        self.assertEqual(totals["presence_created"], 3)
+        self.assertEqual(UniqueItem.objects.count(), 3)
+
+        totals = import_rows(self.league, rows)
+        self.assertEqual(totals["unique_created"], 0)
+        self.assertEqual(totals["unique_updated"], 0)
+        self.assertEqual(totals["unique_unchanged"], 3)
+        self.assertEqual(totals["stats_changed"], 0)
+        self.assertEqual(totals["stats_unchanged"], 3)
+
+        totals = import_rows(self.league, [stage_row(1, flavour_text="new"), stage_row(2, chaos=9.5), stage_row(3)])
+        self.assertEqual(totals["unique_updated"], 1)
+        self.assertEqual(totals["unique_unchanged"], 2)
+        self.assertEqual(totals["stats_changed"], 1)
+        self.assertEqual(UniqueItem.objects.get(poe_ninja_id=1).flavour_text, "new")
+        self.assertEqual(
+            UniqueItemLeagueStats.objects.get(unique_item__poe_ninja_id=2, league=self.league).chaos_value,
+            Decimal("9.50"),
+        )
+
+    def test_duplicate_ids_count_once(self):
+        totals = import_rows(self.league, [stage_row(1, chaos=1.0), stage_row(1, chaos=2.0)])
+        self.assertEqual(totals["unique_created"], 1)
+        self.assertEqual(totals["unique_unchanged"], 0)
+        # the last row wins, like the old per-row loop
+        self.assertEqual(UniqueItemLeagueStats.objects.get(league=self.league).chaos_value, Decimal("2.00"))
+
+    def test_mark_unseen_delists_missing_uniques(self):
+        import_rows(self.league, [stage_row(1), stage_row(2), stage_row(3)])
+
+        totals = import_rows(self.league, [stage_row(1), stage_row(2)])
+        self.assertEqual(totals["presence_delisted"], 0)
+
+        totals = import_rows(self.league, [stage_row(1), stage_row(2)], mark_unseen=True)
+        self.assertEqual(totals["presence_delisted"], 1)
+        delisted = UniqueItemLeaguePresence.objects.get(unique_item__poe_ninja_id=3)
+        self.assertIsNotNone(delisted.delisted_at)
+        self.assertEqual(
+            set(UniqueItemLeagueCatalog.objects.values_list("unique_item__poe_ninja_id", flat=True)),
+            {1, 2},
+        )
+
+        # an empty payload never delists anything
+        totals = import_rows(self.league, [], mark_unseen=True)
+        self.assertEqual(totals["presence_delisted"], 0)
+
+        totals = import_rows(self.league, [stage_row(1), stage_row(2), stage_row(3)], mark_unseen=True)
+        self.assertEqual(totals["presence_refreshed"], 1)
+        delisted.refresh_from_db()
+        self.assertIsNone(delisted.delisted_at)
+
+
+class IterArrayItemsTests(SimpleTestCase):
+    payload = {
+        "meta": {"nested": [1, 2, {"x": "y"}], "flag": True},
+        "lines": [
+            {"id": 1, "name": "Héatshiver", "chaosValue": 12.5, "mods": ["+1 to \"Level\"", "a\\b"]},
+            {"id": 22, "chaosValue": 1.5e3, "divineValue": -0.25, "listingCount": 1000},
+            [],
+            {},
+            None,
+            3.0,
+            1234567890,
+        ],
+        "language": {"name": "en"},
+    }
+
+    def test_every_chunk_size(self):
+        raw = json.dumps(self.payload, ensure_ascii=False, indent=1).encode("utf-8")
+        for chunk_size in range(1, len(raw) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                items = list(iter_array_items(io.BytesIO(raw), "lines", chunk_size=chunk_size))
+                self.assertEqual(items, self.payload["lines"])
+
+    def test_missing_and_empty_arrays(self):
+        self.assertEqual(list(iter_array_items(io.BytesIO(b'{"other": [1]}'), "lines")), [])
+        self.assertEqual(list(iter_array_items(io.BytesIO(b'{"lines": []}'), "lines")), [])
+        self.assertEqual(list(iter_array_items(io.BytesIO(b"{}"), "lines")), [])
+
+    def test_truncated_payload_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_array_items(io.BytesIO(b'{"lines": [{"id": 1}, {"id'), "lines", chunk_size=4))
+
+
+class UniqueListTestCase(TestCase):
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        # AnonRateThrottle counts requests in the default cache
+        caches["default"].clear()
+        self.league = League.objects.create(name="Test", is_active=True)
+
+
+class UniqueCursorPaginationTests(UniqueListTestCase):
+    def setUp(self):
+        super().setUp()
+        # ties on chaos value and on name, some without a price, a few ancient tiers
+        rows = [
+            stage_row(i, f"Unique {i % 7}", chaos=None if i % 9 == 0 else float(i % 4))
+            for i in range(1, 51)
+        ]
+        import_rows(self.league, rows)
+        for poe_ninja_id, tier in [(3, 1), (4, 2), (5, None), (6, 1)]:
+            UniqueAncientMeta.objects.create(
+                unique_item=UniqueItem.objects.get(poe_ninja_id=poe_ninja_id),
+                pool=UniqueAncientMeta.Pool.BELT,
+                tier=tier,
+            )
+        refresh_catalog(league_id=self.league.pk)
+
+        self.expected = list(
+            UniqueItemLeagueCatalog.objects
+            .filter(league=self.league)
+            .order_by(*UniqueItemViewSet.ordering)
+            .values_list("unique_item_id", flat=True)
+        )
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_pages_follow_default_ordering(self):
+        self.assertEqual(len(self.expected), 50)
+
+        seen = []
+        cursors = []
+        url = f"{UNIQUES_URL}?cursor="
+        while url:
+            cursors.append(url)
+            body = self.fetch(url)
+            self.assertNotIn("count", body)
+            self.assertLessEqual(len(body["results"]), UniqueCursorPagination.page_size)
+            seen.extend(row["id"] for row in body["results"])
+            url = body["next"]
+
+        self.assertEqual(len(cursors), 3)
+        self.assertEqual(seen, self.expected)
+
+        # cursors stay valid: going back to an earlier page returns the same rows
+        size = UniqueCursorPagination.page_size
+        body = self.fetch(cursors[1])
+        self.assertEqual([row["id"] for row in body["results"]], self.expected[size:2 * size])
+
+    def test_count_is_opt_in(self):
+        body = self.fetch(f"{UNIQUES_URL}?cursor=&count=1")
+        self.assertEqual(body["count"], 50)
+
+    def test_rejects_ordering(self):
+        response = self.client.get(f"{UNIQUES_URL}?cursor=&ordering=name")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.json())
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get(f"{UNIQUES_URL}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"cursor": "Invalid cursor."})
+
+
+class CachedResponseTests(UniqueListTestCase):
+    def setUp(self):
+        super().setUp()
+        self.published_at = timezone.now().replace(microsecond=0) - dt.timedelta(hours=1)
+        import_rows(self.league, [stage_row(1), stage_row(2)])
+        bump_snapshot_version(self.league.pk, now=self.published_at)
+
+    def test_not_modified(self):
+        response = self.client.get(UNIQUES_URL)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(response["Last-Modified"], http_date(self.published_at.timestamp()))
+
+        response = self.client.get(UNIQUES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(UNIQUES_URL, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(UNIQUES_URL, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_version_is_required(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "NoVersionViewSet"):
+            class NoVersionViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+                queryset = League.objects.all()
+
+    def test_new_key_after_version_bump(self):
+        count_key = versioned_key("uniques:count", self.league, normalize_params({}, []))
+        response = self.client.get(UNIQUES_URL)
+        etag = response["ETag"]
+        self.assertEqual(response.json()["results"][0]["chaos_value"], "1.00")
+
+        # new data is not served before it is published...
+        import_rows(self.league, [stage_row(1, chaos=7.0), stage_row(2)])
+        response = self.client.get(UNIQUES_URL)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["chaos_value"], "1.00")
+
+        # ...and the bump moves every key, so the old ETag no longer matches
+        bump_snapshot_version(self.league.pk, now=timezone.now())
+        self.league.refresh_from_db()
+        self.assertNotEqual(versioned_key("uniques:count", self.league, normalize_params({}, [])), count_key)
+
+        response = self.client.get(UNIQUES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["chaos_value"], "7.00")
+
+
+class BaseCatalogTests(SimpleTestCase):
+    def test_feed_item_type(self):
+        catalog = BaseCatalog.from_lines([
+            {"name": "Rustic Sash", "itemType": "Belt", "icon": "https://example.com/sash.png"},
+            {"name": "Hubris Circlet", "itemType": "Helmet"},
+        ])
+        self.assertEqual(catalog.classify("Rustic Sash", "UniqueAccessory"), ("accessory", "belt", "https://example.com/sash.png"))
+        self.assertEqual(catalog.classify("Hubris Circlet", "UniqueArmour")[:2], ("armour", "helmet"))
+
+    def test_name_fallback(self):
+        # not in the feed: the last word of the name decides the slot, not the import type
+        catalog = BaseCatalog()
+        self.assertEqual(catalog.classify("Rustic Sash", "UniqueAccessory")[:2], ("accessory", "belt"))
+        self.assertEqual(catalog.classify("Hubris Circlet", "UniqueArmour")[:2], ("armour", "helmet"))
+        self.assertEqual(catalog.classify("Carnal Armour", "UniqueArmour")[:2], ("armour", "body"))
+        # the name never moves a unique out of its import type's class
+        self.assertEqual(catalog.classify("Crimson Jewel Ring", "UniqueJewel")[:2], ("jewel", "jewel"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for name in ("monotonic", "sleep"):
+            patcher = mock.patch(f"catalog.importers.fetching.time.{name}", getattr(self.clock, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_spaces_requests_at_rate(self):
+        bucket = TokenBucket(rate=4.0, burst=2)
+        for _ in range(4):
+            bucket.acquire()
+        # the burst is spent straight away, then one token every 0.25s
+        self.assertEqual(self.clock.sleeps, [0.25, 0.25])
+
+    def test_refills_while_idle(self):
+        bucket = TokenBucket(rate=2.0)
+        bucket.acquire()
+        self.clock.now += 10
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_zero_rate_disables_limiting(self):
+        bucket = TokenBucket(rate=0)
+        for _ in range(100):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+def http_error(status, headers=None):
+    return HTTPError("https://example.com", status, "error", Message() if headers is None else headers, None)
+
+
+class RetryTests(SimpleTestCase):
+    def test_retry_delay(self):
+        retry_after = Message()
+        retry_after["Retry-After"] = "7"
+        huge = Message()
+        huge["Retry-After"] = "3600"
+
+        with mock.patch("catalog.importers.fetching.random.random", return_value=0.5):
+            self.assertEqual(_retry_delay(http_error(503), 0, 1.0), 1.0)
+            self.assertEqual(_retry_delay(http_error(503), 3, 1.0), 8.0)
+            self.assertEqual(_retry_delay(URLError("refused"), 1, 0.5), 1.0)
+            self.assertEqual(_retry_delay(TimeoutError(), 0, 2.0), 2.0)
+        self.assertEqual(_retry_delay(http_error(429, retry_after), 0, 1.0), 7.0)
+        self.assertEqual(_retry_delay(http_error(429, huge), 0, 1.0), MAX_RETRY_AFTER_S)
+        self.assertIsNone(_retry_delay(http_error(404), 0, 1.0))
+        self.assertIsNone(_retry_delay(ValueError("bad json"), 0, 1.0))
+
+    @mock.patch("catalog.importers.fetching.time.sleep")
+    def test_fetch_with_retry(self, sleep):
+        fetch = mock.Mock(side_effect=[http_error(502), URLError("reset"), "payload"])
+        self.assertEqual(fetch_with_retry(fetch, "u", limiter=TokenBucket(rate=0), retries=3, backoff_s=0.1), "payload")
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @mock.patch("catalog.importers.fetching.time.sleep")
+    def test_fetch_with_retry_gives_up(self, sleep):
+        fetch = mock.Mock(side_effect=http_error(503))
+        with self.assertRaises(HTTPError):
+            fetch_with_retry(fetch, "u", limiter=TokenBucket(rate=0), retries=2)
+        self.assertEqual(fetch.call_count, 3)
+
+        fetch = mock.Mock(side_effect=http_error(404))
+        with self.assertRaises(HTTPError):
+            fetch_with_retry(fetch, "u", limiter=TokenBucket(rate=0), retries=2)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_fetch_concurrently(self):
+        urls = {name: f"https://example.com/{name}" for name in ("a", "b", "c")}
+        results = dict(fetch_concurrently(str.upper, urls, limiter=TokenBucket(rate=0), max_workers=2))
+        self.assertEqual(results, {name: url.upper() for name, url in urls.items()})
+
+        def fail_on_b(url):
+            if url.endswith("b"):
+                raise ValueError(url)
+            return url
+
+        with self.assertRaises(ValueError):
+            list(fetch_concurrently(fail_on_b, urls, limiter=TokenBucket(rate=0)))
+
+
+class PayloadServer:
+    """Local HTTP server for client tests: serves `payloads` by path with an ETag."""
+
+    def __init__(self):
+        self.payloads = {}
+        self.requests = []
+        self.always_304 = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                body, etag = server.payloads.get(self.path, (b"", None))
+                if server.always_304 or (etag and self.headers.get("If-None-Match") == etag):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200 if etag else 404)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = PayloadServer()
+        self.addCleanup(self.server.close)
+        self.server.payloads["/lines"] = (b'{"lines": [1, 2]}', '"v1"')
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+        self.client = HttpClient(cache_dir=self.cache_dir)
+        self.addCleanup(self.client.close)
+
+    def last_validator(self):
+        return self.server.requests[-1][1].get("If-None-Match")
+
+    def test_not_modified_is_served_from_cache(self):
+        first = self.client.get(self.server.url("/lines"))
+        self.assertFalse(first.not_modified)
+        self.assertIsNone(self.last_validator())
+
+        second = self.client.get(self.server.url("/lines"))
+        self.assertEqual(self.last_validator(), '"v1"')
+        self.assertTrue(second.not_modified)
+        self.assertEqual(second.json(), {"lines": [1, 2]})
+        self.assertEqual(second.digest, first.digest)
+
+        self.server.payloads["/lines"] = (b'{"lines": [3]}', '"v2"')
+        third = self.client.get(self.server.url("/lines"))
+        self.assertFalse(third.not_modified)
+        self.assertEqual(third.json(), {"lines": [3]})
+
+    def test_store_is_deferred(self):
+        result = self.client.get(self.server.url("/lines"), store=False)
+        # not stored yet: a failed write must not turn into a 304 on the next run
+        self.client.get(self.server.url("/lines"), store=False)
+        self.assertIsNone(self.last_validator())
+
+        self.client.store(result)
+        self.assertTrue(self.client.get(self.server.url("/lines")).not_modified)
+
+    def test_missing_blob_downloads_again(self):
+        result = self.client.get(self.server.url("/lines"))
+        result.path.unlink()
+
+        again = self.client.get(self.server.url("/lines"))
+        self.assertIsNone(self.last_validator())
+        self.assertFalse(again.not_modified)
+        self.assertEqual(again.json(), {"lines": [1, 2]})
+
+    def test_not_modified_without_cached_body_raises(self):
+        self.server.always_304 = True
+        with self.assertRaises(requests.HTTPError):
+            self.client.get(self.server.url("/lines"))
+        with self.assertRaises(requests.HTTPError):
+            HttpClient().get(self.server.url("/lines"))
+
+
+def ninja_line(poe_ninja_id, *, chaos=1.0, name=None, base_type="Leather Belt"):
+    return {
+        "id": poe_ninja_id,
+        "name": name or f"Unique {poe_ninja_id}",
+        "baseType": base_type,
+        "levelRequired": 10,
+        "icon": f"https://example.com/{poe_ninja_id}.png",
+        "explicitMods": [{"text": "+10 to maximum Life", "optional": False}],
+        "chaosValue": chaos,
+        "divineValue": None,
+        "listingCount": 5,
+        "sparkline": {"data": [1, 2, 3]},
+    }
+
+
+class ImportCommandTestCase(TestCase):
+    """Runs import_poeninja against a local server standing in for poe.ninja."""
+
+    league_name = "Test"
+
+    def setUp(self):
+        self.server = PayloadServer()
+        self.addCleanup(self.server.close)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.etags = 0
+        self.set_payload("BaseType", [{"name": "Leather Belt", "itemType": "Belt"}])
+
+    def set_payload(self, import_type, lines):
+        self.etags += 1
+        path = "/itemoverview?" + urlencode({"league": self.league_name, "type": import_type})
+        self.server.payloads[path] = (json.dumps({"lines": lines}).encode("utf-8"), f'"{self.etags}"')
+
+    def run_import(self, *args, types=("UniqueAccessory",)):
+        out = io.StringIO()
+        call_command(
+            "import_poeninja",
+            "--league", self.league_name,
+            "--types", *types,
+            "--base-url", self.server.url("/itemoverview"),
+            "--cache-dir", str(self.tmp / "http"),
+            "--sleep", "0",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+
+class SnapshotRoundTripTests(ImportCommandTestCase):
+    def test_record_then_replay(self):
+        url = self.server.url("/itemoverview?league=Test&type=BaseType")
+        archive = SnapshotArchive(self.tmp / "snap", create=True)
+        client = RecordingClient(HttpClient(), archive)
+        recorded = client.get(url)
+        self.addCleanup(client.close)
+
+        replayed = ReplayClient(SnapshotArchive(self.tmp / "snap")).get(url)
+        self.assertEqual(replayed.json(), recorded.json())
+        self.assertEqual(replayed.digest, recorded.digest)
+        self.assertEqual(replayed.etag, recorded.etag)
+        with self.assertRaises(SnapshotError):
+            ReplayClient(archive).get(self.server.url("/missing"))
+
+        # the same body is stored once
+        client.get(url)
+        self.assertEqual(len(list((self.tmp / "snap" / "blobs").iterdir())), 1)
+
+    def test_import_replays_without_network(self):
+        self.set_payload("UniqueAccessory", [ninja_line(1, chaos=3.0), ninja_line(2, chaos=4.5)])
+        self.run_import("--record", str(self.tmp / "snap"))
+        expected = sorted(UniqueItemLeagueStats.objects.values_list("unique_item__poe_ninja_id", "chaos_value"))
+
+        UniqueItem.objects.all().delete()
+        self.server.close()
+        self.run_import("--replay", str(self.tmp / "snap"))
+
+        self.assertEqual(
+            sorted(UniqueItemLeagueStats.objects.values_list("unique_item__poe_ninja_id", "chaos_value")),
+            expected,
+        )
+        self.assertEqual(expected, [(1, Decimal("3.00")), (2, Decimal("4.50"))])
+
+    def test_replay_requires_snapshot(self):
+        with self.assertRaises(SystemExit):
+            self.run_import("--replay", str(self.tmp / "nothing"))
+
+
+class BenchmarkImportTests(SimpleTestCase):
+    def test_rejects_lines_out_of_range(self):
+        for lines in ("0", "-5", "4", str(MAX_LINES + 1)):
+            with self.subTest(lines=lines), self.assertRaises(SystemExit):
+                call_command("benchmark_import", "--lines", lines, stdout=io.StringIO())
+
+
+class PriceHistoryTests(UniqueListTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0) - dt.timedelta(days=2)
+        self.import_at(0, chaos=1.0)
+        self.unique = UniqueItem.objects.get(poe_ninja_id=1)
+
+    def import_at(self, minutes, *, chaos):
+        import_rows(self.league, [stage_row(1, chaos=chaos)], now=self.start + dt.timedelta(minutes=minutes))
+
+    def history(self, **params):
+        response = self.client.get(f"{UNIQUES_URL}{self.unique.pk}/history/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row["bucket"], row["chaos_value"]) for row in response.json()["results"]]
+
+    def bucket(self, hours):
+        return (self.start + dt.timedelta(hours=hours)).isoformat().replace("+00:00", "Z")
+
+    def test_points_only_for_changes(self):
+        self.import_at(60, chaos=1.0)
+        self.import_at(120, chaos=2.0)
+        self.import_at(180, chaos=2.0)
+        self.import_at(240, chaos=1.5)
+
+        self.assertEqual(
+            self.history(),
+            [(self.bucket(0), "1.00"), (self.bucket(2), "2.00"), (self.bucket(4), "1.50")],
+        )
+
+    def test_last_change_in_an_hour_wins(self):
+        self.import_at(70, chaos=4.0)
+        self.import_at(110, chaos=5.0)
+        self.assertEqual(self.history(), [(self.bucket(0), "1.00"), (self.bucket(1), "5.00")])
+
+    def test_range_starts_with_the_value_in_effect(self):
+        self.import_at(120, chaos=2.0)
+        self.import_at(600, chaos=3.0)
+
+        since = self.start + dt.timedelta(hours=5)
+        self.assertEqual(self.history(since=since.isoformat()), [(self.bucket(2), "2.00"), (self.bucket(10), "3.00")])
+
+        until = self.start + dt.timedelta(hours=9)
+        self.assertEqual(self.history(since=since.isoformat(), until=until.isoformat()), [(self.bucket(2), "2.00")])
+
+    def test_rejects_bad_dates(self):
+        response = self.client.get(f"{UNIQUES_URL}{self.unique.pk}/history/", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("since", response.json())
+
+
+class DailyRollupTests(UniqueListTestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = timezone.localdate() - dt.timedelta(days=10)
+        self.import_at(0, 10, chaos=10.0, listings=4)
+        self.import_at(0, 14, chaos=20.0, listings=8)
+        self.import_at(1, 9, chaos=5.0, listings=2)
+        self.unique = UniqueItem.objects.get(poe_ninja_id=1)
+
+    def at(self, days, hour):
+        day = self.day + dt.timedelta(days=days)
+        return timezone.make_aware(dt.datetime.combine(day, dt.time(hour)))
+
+    def import_at(self, days, hour, *, chaos, listings):
+        now = self.at(days, hour)
+        row = stage_row(1, chaos=chaos)._replace(listing_count=listings)
+        changed_ids = set()
+        import_rows(self.league, [row], now=now, changed_ids=changed_ids)
+        rollup_daily_prices(league_id=self.league.pk, now=now, unique_ids=changed_ids)
+
+    def rollup(self, days):
+        row = UniqueItemDailyPrice.objects.get(unique_item=self.unique, league=self.league, day=self.day + dt.timedelta(days=days))
+        return (row.open_chaos, row.high_chaos, row.low_chaos, row.close_chaos, row.avg_chaos, row.avg_listing_count, row.points)
+
+    def test_rollups(self):
+        self.assertEqual(
+            self.rollup(0),
+            (Decimal("10.00"), Decimal("20.00"), Decimal("10.00"), Decimal("20.00"), Decimal("15.00"), Decimal("6.0"), 2),
+        )
+        # opens at the previous close, but yesterday's point is not part of the day's stats
+        self.assertEqual(
+            self.rollup(1),
+            (Decimal("20.00"), Decimal("5.00"), Decimal("5.00"), Decimal("5.00"), Decimal("5.00"), Decimal("2.0"), 1),
+        )
+
+    def test_only_given_uniques(self):
+        self.assertEqual(rollup_daily_prices(league_id=self.league.pk, now=self.at(2, 12), unique_ids=[]), 0)
+        self.assertFalse(UniqueItemDailyPrice.objects.filter(day=self.day + dt.timedelta(days=2)).exists())
+
+    def test_day_without_own_points(self):
+        rollup_daily_prices(league_id=self.league.pk, now=self.at(3, 12), unique_ids=[self.unique.pk])
+        self.assertEqual(
+            self.rollup(3),
+            (Decimal("5.00"), Decimal("5.00"), Decimal("5.00"), Decimal("5.00"), Decimal("5.00"), Decimal("2.0"), 0),
+        )
+
+    def test_daily_fills_gaps(self):
+        response = self.client.get(
+            f"{UNIQUES_URL}{self.unique.pk}/daily/",
+            {"since": str(self.day - dt.timedelta(days=1)), "until": str(self.day + dt.timedelta(days=3))},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        results = [(row["day"], row["open_chaos"], row["close_chaos"], row["filled"]) for row in response.json()["results"]]
+        days = [str(self.day + dt.timedelta(days=n)) for n in range(4)]
+        # the day before the first rollup has no price to show and is left out
+        self.assertEqual(results, [
+            (days[0], "10.00", "20.00", False),
+            (days[1], "20.00", "5.00", False),
+            (days[2], "5.00", "5.00", True),
+            (days[3], "5.00", "5.00", True),
+        ])
+
+        # a range starting after the last rollup opens at its close
+        response = self.client.get(
+            f"{UNIQUES_URL}{self.unique.pk}/daily/",
+            {"since": days[3], "until": days[3]},
+        )
+        self.assertEqual([row["close_chaos"] for row in response.json()["results"]], ["5.00"])
+
+    def test_daily_rejects_bad_ranges(self):
+        url = f"{UNIQUES_URL}{self.unique.pk}/daily/"
+        self.assertEqual(self.client.get(url, {"since": str(self.day), "until": str(self.day - dt.timedelta(days=1))}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"since": "2020-01-01", "until": "2025-01-01"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"since": "not a date"}).status_code, 400)
+
+
+class ImportMetricsTests(TestCase):
+    def test_phase_counts_queries_and_rows(self):
+        metrics = ImportMetrics()
+        scope = metrics.scope("Test", "UniqueAccessory")
+        for _ in range(2):
+            with scope.phase("stats", rows=3) as phase:
+                League.objects.count()
+                League.objects.count()
+                phase.rows += 1
+
+        (timing,) = metrics.timings()
+        self.assertEqual((timing.league, timing.import_type, timing.phase), ("Test", "UniqueAccessory", "stats"))
+        self.assertEqual((timing.queries, timing.rows), (4, 8))
+        self.assertGreater(timing.seconds, 0)
+
+    def test_timed_iter_and_merge(self):
+        metrics = ImportMetrics()
+        batches = list(metrics.scope("A", "T").timed_iter(iter([[1, 2], [3]]), "decode", count=len))
+        self.assertEqual(batches, [[1, 2], [3]])
+
+        # rows from another process fold into the same phase totals
+        other = ImportMetrics()
+        other.add("decode", 1.5, league="B", import_type="T", rows=10)
+        metrics.extend(other.as_rows())
+
+        self.assertEqual(metrics.by_phase()["decode"]["rows"], 13)
+        self.assertEqual(len(metrics.as_rows()), 2)
+
+    def test_prometheus_text(self):
+        metrics = ImportMetrics()
+        metrics.add("fetch", 0.5, league='Say "hi"', import_type="UniqueJewel", rows=2)
+        text = prometheus_text(metrics, started_at=100.0, finished_at=102.5, totals={"unique_created": 7}, success=True)
+        self.assertIn("poe_import_last_run_duration_seconds 2.500\n", text)
+        self.assertIn('poe_import_last_run_rows{kind="unique_created"} 7\n', text)
+        self.assertIn('poe_import_phase_rows{league="Say \\"hi\\"",type="UniqueJewel",phase="fetch"} 2\n', text)
+
+
+class ImportRunTests(ImportCommandTestCase):
+    def test_run_is_recorded(self):
+        self.set_payload("UniqueAccessory", [ninja_line(1), ninja_line(2)])
+        metrics_out = self.tmp / "metrics.json"
+        prometheus_out = self.tmp / "import.prom"
+        self.run_import("--metrics-out", str(metrics_out), "--prometheus-out", str(prometheus_out))
+
+        run = ImportRun.objects.get()
+        self.assertEqual(run.status, ImportRun.Status.OK)
+        self.assertEqual(run.leagues, ["Test"])
+        self.assertEqual(run.totals["unique_created"], 2)
+        self.assertIsNotNone(run.duration_seconds)
+        for phase in ("fetch", "decode", "stage_copy", "uniques", "stats", "presence", "catalog"):
+            self.assertIn(phase, run.phases)
+        self.assertEqual(run.phases["stats"]["rows"], 2)
+
+        report = json.loads(metrics_out.read_text())
+        self.assertEqual(report["run_id"], run.pk)
+        self.assertTrue(report["success"])
+        self.assertIn(
+            ("Test", "UniqueAccessory", "stats"),
+            {(t["league"], t["import_type"], t["phase"]) for t in report["timings"]},
+        )
+        self.assertIn("poe_import_last_run_success 1\n", prometheus_out.read_text())
+
+    def test_failed_run_is_recorded(self):
+        # no payload for the type: the server answers 404
+        with self.assertRaises(requests.HTTPError):
+            self.run_import()
+
+        run = ImportRun.objects.get()
+        self.assertEqual(run.status, ImportRun.Status.FAILED)
+        self.assertIn("404", run.error)
+
+
+class SchedulingTests(TestCase):
+    def setUp(self):
+        self.league = League.objects.create(name="Test")
+        self.now = timezone.now()
+
+    def test_next_interval(self):
+        self.assertEqual(next_interval(0.0, min_s=600, max_s=3600), 3600)
+        self.assertEqual(next_interval(CHURN_SATURATION / 2, min_s=600, max_s=3600), 2100)
+        self.assertEqual(next_interval(CHURN_SATURATION, min_s=600, max_s=3600), 600)
+        self.assertEqual(next_interval(1.0, min_s=600, max_s=3600), 600)
+        self.assertEqual(next_interval(-0.5, min_s=600, max_s=3600), 3600)
+
+    def test_failure_backoff(self):
+        self.assertEqual([failure_backoff(n, min_s=600, max_s=3600) for n in range(1, 5)], [600, 1200, 2400, 3600])
+
+    def test_churn_is_smoothed(self):
+        schedule = ImportSchedule.objects.create(league=self.league, import_type="UniqueAccessory")
+
+        record_success(schedule, {"stats_changed": 20, "stats_unchanged": 80}, finished=self.now, min_s=600, max_s=3600)
+        # the first run is taken as is
+        self.assertAlmostEqual(schedule.churn, 0.2)
+        self.assertEqual(schedule.last_status, "ok")
+
+        record_success(schedule, {"stats_changed": 0, "stats_unchanged": 100}, finished=self.now, min_s=600, max_s=3600)
+        self.assertAlmostEqual(schedule.churn, CHURN_SMOOTHING * 0.0 + (1 - CHURN_SMOOTHING) * 0.2)
+
+        # a 304 counts as no change
+        record_success(schedule, {}, finished=self.now, min_s=600, max_s=3600)
+        self.assertAlmostEqual(schedule.churn, (1 - CHURN_SMOOTHING) ** 2 * 0.2)
+        self.assertEqual(schedule.last_status, "not_modified")
+
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.interval_seconds, next_interval(schedule.churn, min_s=600, max_s=3600))
+        self.assertEqual(schedule.next_run_at, self.now + dt.timedelta(seconds=schedule.interval_seconds))
+
+    def test_failures_back_off_and_reset(self):
+        schedule = ImportSchedule.objects.create(league=self.league, import_type="UniqueAccessory")
+        record_failure(schedule, finished=self.now, min_s=600, max_s=3600)
+        record_failure(schedule, finished=self.now, min_s=600, max_s=3600)
+        self.assertEqual((schedule.failures, schedule.last_status), (2, "failed"))
+        self.assertEqual(schedule.next_run_at, self.now + dt.timedelta(seconds=1200))
+
+        record_success(schedule, {"stats_changed": 1, "stats_unchanged": 1}, finished=self.now, min_s=600, max_s=3600)
+        self.assertEqual(schedule.failures, 0)
+
+    def test_due_schedules(self):
+        ensure_schedules([self.league], ["UniqueAccessory", "UniqueJewel"], now=self.now)
+        ensure_schedules([self.league], ["UniqueAccessory"], now=self.now)
+        ImportSchedule.objects.filter(import_type="UniqueJewel").update(next_run_at=self.now + dt.timedelta(hours=1))
+
+        due = due_schedules([self.league], ["UniqueAccessory", "UniqueJewel"], now=self.now)
+        self.assertEqual([s.import_type for s in due[self.league]], ["UniqueAccessory"])
+        self.assertEqual(next_due_at([self.league], ["UniqueJewel"]), self.now + dt.timedelta(hours=1))
+
+
+class ImportSchedulerTests(ImportCommandTestCase):
+    # the loop's close_old_connections() would close the test transaction's connection
+    @mock.patch("catalog.management.commands.run_import_scheduler.close_old_connections")
+    def run_scheduler(self, close_old_connections):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        call_command(
+            "run_import_scheduler",
+            "--league", self.league_name,
+            "--types", "UniqueAccessory", "UniqueJewel",
+            "--base-url", self.server.url("/itemoverview"),
+            "--cache-dir", str(self.tmp / "http"),
+            "--sleep", "0",
+            "--min-interval", "600",
+            "--max-interval", "3600",
+            "--once",
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+
+    def test_once_runs_due_types(self):
+        self.set_payload("UniqueAccessory", [ninja_line(1), ninja_line(2)])
+        self.set_payload("UniqueJewel", [ninja_line(3, base_type="Cobalt Jewel")])
+        self.run_scheduler()
+
+        schedules = {s.import_type: s for s in ImportSchedule.objects.all()}
+        self.assertEqual(set(schedules), {"UniqueAccessory", "UniqueJewel"})
+        for schedule in schedules.values():
+            self.assertEqual(schedule.last_status, "ok")
+            self.assertEqual(schedule.churn, 1.0)
+            self.assertEqual(schedule.interval_seconds, 600)
+        self.assertEqual(schedules["UniqueAccessory"].last_rows, 2)
+        self.assertEqual(ImportRun.objects.get().command, "run_import_scheduler")
+
+        # nothing is due yet
+        self.run_scheduler()
+        self.assertEqual(ImportRun.objects.count(), 1)
+
+
+class AtomicImportTests(ImportCommandTestCase):
+    types = ("UniqueAccessory", "UniqueJewel")
+
+    def setUp(self):
+        super().setUp()
+        self.set_payload("UniqueAccessory", [ninja_line(1, chaos=1.0), ninja_line(2, chaos=2.0)])
+        self.set_payload("UniqueJewel", [ninja_line(3, chaos=3.0)])
+        self.run_import(types=self.types)
+        # the next run moves one accessory and the jewel
+        self.set_payload("UniqueAccessory", [ninja_line(1, chaos=1.0), ninja_line(2, chaos=5.0)])
+        self.set_payload("UniqueJewel", [ninja_line(3, chaos=6.0)])
+
+    def live_state(self):
+        return (
+            sorted(UniqueItemLeagueStats.objects.values_list(
+                "unique_item__poe_ninja_id", "chaos_value", "content_hash", "last_fetched_at"
+            )),
+            sorted(UniqueItemLeaguePresence.objects.values_list(
+                "unique_item__poe_ninja_id", "source_type", "last_seen_at", "delisted_at"
+            )),
+            League.objects.get(name=self.league_name).snapshot_version,
+        )
+
+    def test_failure_after_a_shadow_stage_leaves_live_tables(self):
+        before = self.live_state()
+        calls = []
+
+        def fail_second_type(*args, **kwargs):
+            calls.append(kwargs["import_type"])
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+            return merge_stage_rows(*args, **kwargs)
+
+        with mock.patch(
+            "catalog.management.commands.import_poeninja.merge_stage_rows", side_effect=fail_second_type
+        ), self.assertRaises(RuntimeError):
+            self.run_import("--atomic", types=self.types)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.live_state(), before)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [SHADOW_STATS_TABLE, SHADOW_PRESENCE_TABLE])
+            self.assertEqual(cursor.fetchone(), (None, None))
+
+    def test_types_are_reported_with_stats_after_publishing(self):
+        options = ImportOptions(
+            types=list(self.types),
+            rate=0.0,
+            workers=1,
+            retries=0,
+            cache_dir=str(self.tmp / "http"),
+            force=False,
+            dry_run=False,
+            base_url=self.server.url("/itemoverview"),
+            atomic=True,
+        )
+        reported = {}
+
+        def on_type_done(import_type, counts):
+            # nothing is reported before the league is published
+            self.assertEqual(UniqueItemLeagueStats.objects.get(unique_item__poe_ninja_id=3).chaos_value, 6)
+            reported[import_type] = counts
+
+        ImportCommand(stdout=io.StringIO()).import_league(self.league_name, options, on_type_done=on_type_done)
+
+        self.assertEqual(
+            {t: (counts["stats_changed"], counts["stats_unchanged"]) for t, counts in reported.items()},
+            {"UniqueAccessory": (1, 1), "UniqueJewel": (1, 0)},
+        )
+
+
+class AncientMetaImportTests(UniqueListTestCase):
+    def setUp(self):
+        super().setUp()
+        import_rows(self.league, [
+            stage_row(1, "Headhunter"),
+            stage_row(2, "Mageblood"),
+            stage_row(3, "  The   Taming "),
+        ])
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def write_snapshot(self, filename, rows):
+        path = self.tmp / filename
+        path.write_text(json.dumps(rows), encoding="utf-8")
+        return path
+
+    def run_import(self, *args):
+        out = io.StringIO()
+        call_command("import_ancient_meta", "--file", *args, stdout=out)
+        return out.getvalue()
+
+    def metas(self):
+        return sorted(UniqueAncientMeta.objects.values_list("unique_item__poe_ninja_id", "pool", "tier"))
+
+    def test_names_match_across_whitespace_and_case(self):
+        self.write_snapshot("ancient_belts.json", [
+            {"name": "HEADHUNTER ", "tier": 1},
+            {"name": "the taming", "tier": 2},
+            {"name": "Mage  blood", "tier": 3},
+        ])
+        out = self.run_import(str(self.tmp))
+
+        self.assertEqual(self.metas(), [(1, "belt", 1), (3, "belt", 2)])
+        self.assertIn("mage blood", out)
+
+    def test_multi_pool_import(self):
+        self.write_snapshot("ancient_belts.json", [{"name": "Headhunter", "tier": 1}])
+        self.write_snapshot("ancient_rings.json", [{"name": "Mageblood", "tier": 2}])
+        # no pool in the file name: each row names its own
+        self.write_snapshot("ancient_misc.json", [{"name": "The Taming", "tier": 3, "pool": "Ring"}])
+        out = self.run_import(str(self.tmp))
+
+        self.assertEqual(self.metas(), [(1, "belt", 1), (2, "ring", 2), (3, "ring", 3)])
+        self.assertIn("belt=1, ring=2", out)
+
+    def test_pool_option_wins(self):
+        path = self.write_snapshot("ancient_belts.json", [{"name": "Headhunter", "pool": "ring"}])
+        self.run_import(str(path), "--pool", "amulet")
+        self.assertEqual(self.metas(), [(1, "amulet", None)])
+
+    def test_rows_without_a_pool_fail(self):
+        self.write_snapshot("ancient_belts.json", [{"name": "Headhunter", "tier": 1}])
+        self.write_snapshot("snapshot.json", [{"name": "Mageblood", "tier": 2}])
+        with self.assertRaisesMessage(SystemExit, "snapshot.json: no pool for 'mageblood'"):
+            self.run_import(str(self.tmp))
+        self.assertEqual(self.metas(), [])
+
+        self.write_snapshot("snapshot.json", [{"name": "Mageblood", "pool": "belts"}])
+        with self.assertRaisesMessage(SystemExit, "snapshot.json: unknown pool 'belts'"):
+            self.run_import(str(self.tmp))
+
+    def test_unique_in_two_pools_is_reported(self):
+        self.write_snapshot("a_belts.json", [{"name": "Headhunter", "tier": 1}])
+        self.write_snapshot("b_rings.json", [{"name": "Headhunter", "tier": 4}])
+        out = self.run_import(str(self.tmp))
+
+        self.assertEqual(self.metas(), [(1, "ring", 4)])
+        self.assertIn("Headhunter: belt, ring -> ring", out)
+
+
+class ExtractUniqueRowsTests(SimpleTestCase):
+    def test_per_base_payload(self):
+        # shaped like a poeladder per-base response: the base and the uniques carry mods
+        # with a name and a tier of their own, which are not unique rows
+        tiered_mod = {"name": "IncreasedLife", "tier": 1, "text": "+40 to maximum Life"}
+        payload = {
+            "user": {"name": "someone", "tier": 3},
+            "baseItem": {
+                "name": "Leather Belt",
+                "implicitMods": [tiered_mod],
+                "properties": [{"name": "Quality", "tier": 0}],
+            },
+            "uniques": [
+                {"name": "Headhunter", "tier": 1, "chance": 0.5, "avgOrbs": 200, "explicitMods": [tiered_mod]},
+                {"group": "common", "uniques": [{"name": "Wurm's Molt", "tier": 4, "minIlvl": 1}]},
+                {"name": "Mageblood", "avgOrbs": 300},
+            ],
+            "messages": [{"name": "notice", "chance": 1}],
+        }
+
+        self.assertEqual(
+            [row["name"] for row in extract_unique_rows(payload)],
+            ["Headhunter", "Wurm's Molt", "Mageblood"],
+        )
@@ -1,21 +1,256 @@
-from django.db.models import Exists, OuterRef, Subquery, F, Case, When, Value, IntegerField
-from django_filters.rest_framework import DjangoFilterBackend
+import base64
+import datetime as dt
+import functools
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef, F, Q, Max, Sum
+from django_filters.rest_framework import ChoiceFilter, DjangoFilterBackend, FilterSet, NumberFilter
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.core.paginator import Paginator as DjangoPaginator
 from django.shortcuts import get_object_or_404
-from rest_framework.pagination import PageNumberPagination
+from django.utils.functional import cached_property
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
-from .models import BaseItem, UniqueItem, UniqueItemLeaguePresence, League, UniqueItemLeagueStats
+from .caching import CachedResponseMixin, cached_count, normalize_params, versioned_key
+from .models import (
+  BaseItem,
+  UniqueItem,
+  UniqueItemLeaguePresence,
+  League,
+  UniqueItemLeagueCatalog,
+  UniqueItemPriceHistory,
+  UniqueItemDailyPrice,
+)
 from .serializers import (
   BaseItemSerializer,
   UniqueItemListSerializer,
+  UniqueItemCatalogSerializer,
   UniqueItemDetailSerializer,
+  PriceHistorySerializer,
+  DailyPriceSerializer,
 )
 
+class CachedCountPaginator(DjangoPaginator):
+  def __init__(self, *args, count_cache_key=None, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.count_cache_key = count_cache_key
+
+  @cached_property
+  def count(self):
+    return cached_count(self.object_list, self.count_cache_key)
+
+def get_count_cache_key(view):
+  get_key = getattr(view, "get_count_cache_key", None)
+  return get_key() if get_key is not None else None
+
 class UniquePagination(PageNumberPagination):
   page_size = 18
 
+  def paginate_queryset(self, queryset, request, view=None):
+    # the total is cached per filter combination and catalog version (catalog.caching)
+    self.django_paginator_class = functools.partial(
+      CachedCountPaginator,
+      count_cache_key=get_count_cache_key(view),
+    )
+    return super().paginate_queryset(queryset, request, view)
+
+class UniqueCursorPagination(BasePagination):
+  """
+  Opt-in keyset pagination for the uniques list: send ?cursor= (empty for the first
+  page) and follow `next`. The cursor holds the last row's position in the default
+  ordering (ancient_rank, chaos_value desc nulls last, name, unique_item_id), and each
+  page seeks from it on catalog_default_order instead of counting and OFFSETting.
+  `count` is only computed with ?count=1.
+  """
+  page_size = UniquePagination.page_size
+  cursor_query_param = "cursor"
+  count_query_param = "count"
+
+  def encode_cursor(self, row) -> str:
+    chaos = None if row.chaos_value is None else str(row.chaos_value)
+    raw = json.dumps([row.ancient_rank, chaos, row.name, row.unique_item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+  def decode_cursor(self, request):
+    raw = (request.query_params.get(self.cursor_query_param) or "").strip()
+    if not raw:
+      return None
+
+    try:
+      decoded = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)).decode("utf-8")
+      rank, chaos, name, unique_id = json.loads(decoded)
+      position = (
+        int(rank),
+        None if chaos is None else Decimal(chaos),
+        str(name),
+        int(unique_id),
+      )
+    except (TypeError, ValueError, InvalidOperation):
+      raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+    return position
+
+  def seek_ranges(self, position):
+    """
+    Rows after `position`, as consecutive ranges of the default ordering. Each range is
+    an equality prefix plus one bound on catalog_default_order, so it is a plain index
+    range scan (the mixed sort directions rule out a single row comparison).
+    """
+    rank, chaos, name, unique_id = position
+    same_rank = Q(ancient_rank=rank)
+
+    if chaos is None:
+      same_chaos = same_rank & Q(chaos_value__isnull=True)
+      return [
+        same_chaos & Q(name=name, unique_item_id__gt=unique_id),
+        same_chaos & Q(name__gt=name),
+        Q(ancient_rank__gt=rank),
+      ]
+
+    same_chaos = same_rank & Q(chaos_value=chaos)
+    return [
+      same_chaos & Q(name=name, unique_item_id__gt=unique_id),
+      same_chaos & Q(name__gt=name),
+      same_rank & Q(chaos_value__lt=chaos),
+      same_rank & Q(chaos_value__isnull=True),
+      Q(ancient_rank__gt=rank),
+    ]
+
+  def paginate_queryset(self, queryset, request, view=None):
+    if (request.query_params.get("ordering") or "").strip():
+      raise ValidationError({"ordering": "Cursor pagination only supports the default ordering."})
+
+    self.request = request
+    self.count = None
+    if request.query_params.get(self.count_query_param) in ("1", "true"):
+      self.count = cached_count(queryset, get_count_cache_key(view))
+
+    # one extra row tells whether there is a next page
+    want = self.page_size + 1
+    position = self.decode_cursor(request)
+    ranges = [Q()] if position is None else self.seek_ranges(position)
+
+    rows = []
+    for seek in ranges:
+      rows.extend(queryset.filter(seek)[:want - len(rows)])
+      if len(rows) >= want:
+        break
+
+    self.has_next = len(rows) > self.page_size
+    self.page = rows[:self.page_size]
+    return self.page
+
+  def get_next_link(self):
+    if not self.has_next:
+      return None
+    url = self.request.build_absolute_uri()
+    return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+  def get_paginated_response(self, data):
+    body = {"next": self.get_next_link(), "results": data}
+    if self.count is not None:
+      body = {"count": self.count, **body}
+    return Response(body)
+
+HISTORY_DEFAULT_DAYS = 30
+HISTORY_MAX_POINTS = 5000
+DAILY_MAX_DAYS = 730
+
+def parse_time_param(params, name: str):
+  raw = (params.get(name) or "").strip()
+  if not raw:
+    return None
+
+  value = parse_datetime(raw)
+  if value is None:
+    day = parse_date(raw)
+    if day is None:
+      raise ValidationError({name: "Expected an ISO date or datetime."})
+    value = dt.datetime.combine(day, dt.time.min)
+
+  if timezone.is_naive(value):
+    value = timezone.make_aware(value)
+  return value
+
+def parse_date_param(params, name: str):
+  raw = (params.get(name) or "").strip()
+  if not raw:
+    return None
+
+  try:
+    value = parse_date(raw)
+  except ValueError:
+    value = None
+  if value is None:
+    raise ValidationError({name: "Expected an ISO date (YYYY-MM-DD)."})
+  return value
+
+def fill_daily_gaps(rows, opening, since, until):
+  """
+  One entry per day in [since, until]: days without a rollup row repeat the previous
+  close as a flat candle marked `filled`.
+  """
+  by_day = {row.day: row for row in rows}
+  last = opening
+  out = []
+
+  day = since
+  while day <= until:
+    row = by_day.get(day)
+    if row is not None:
+      last = row
+      out.append(row)
+    elif last is not None:
+      close = last.close_chaos
+      out.append(UniqueItemDailyPrice(
+        day=day,
+        open_chaos=close,
+        high_chaos=close,
+        low_chaos=close,
+        close_chaos=close,
+        avg_chaos=close,
+        avg_listing_count=last.avg_listing_count,
+      ))
+      out[-1].filled = True
+    day += dt.timedelta(days=1)
+
+  return out
+
+class UniqueCatalogFilter(FilterSet):
+  # parameter names predate the read model, when the list was a UniqueItem queryset
+  base_item = NumberFilter(field_name="base_item_id")
+  required_level = NumberFilter()
+  required_level__gte = NumberFilter(field_name="required_level", lookup_expr="gte")
+  required_level__lte = NumberFilter(field_name="required_level", lookup_expr="lte")
+  base_item__slot = ChoiceFilter(field_name="slot", choices=BaseItem.Slot.choices)
+  base_item__item_class = ChoiceFilter(field_name="item_class", choices=BaseItem.ItemClass.choices)
+
+  class Meta:
+    model = UniqueItemLeagueCatalog
+    fields = []
+
+class UniqueCatalogOrderingFilter(filters.OrderingFilter):
+  ALIASES = {"ancient_meta__tier": "ancient_tier"}
+
+  def get_ordering(self, request, queryset, view):
+    ordering = super().get_ordering(request, queryset, view)
+    if not ordering:
+      return ordering
+
+    out = []
+    for term in ordering:
+      if isinstance(term, str):
+        desc = term.startswith("-")
+        term = ("-" if desc else "") + self.ALIASES.get(term.lstrip("-"), term.lstrip("-"))
+      out.append(term)
+    return out
+
 def get_current_league() -> League:
   # For now I will use this, will be able to update this do auto detect current leagues
   league = League.objects.filter(is_active=True).first()
@@ -27,25 +262,38 @@ def get_current_league() -> League:
   
   return league
 
-class BaseItemViewSet(viewsets.ReadOnlyModelViewSet):
+class BaseItemViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
   queryset = BaseItem.objects.all().order_by("name")
   serializer_class = BaseItemSerializer
   filter_backends = [filters.SearchFilter]
   search_fields = ["name", "slot", "item_class"]
 
-class UniqueItemViewSet(viewsets.ReadOnlyModelViewSet):
+  def _catalog_state(self):
+    # base items only appear through imports, and every import publish bumps a league
+    if not hasattr(self, "_state"):
+      self._state = League.objects.aggregate(version=Sum("snapshot_version"), published_at=Max("published_at"))
+    return self._state
+
+  def get_cache_version(self):
+    return str(self._catalog_state()["version"] or 0)
+
+  def get_last_modified(self):
+    return self._catalog_state()["published_at"]
+
+  def list(self, request, *args, **kwargs):
+    return self.cached_response(super().list, request, *args, **kwargs)
+
+  def retrieve(self, request, *args, **kwargs):
+    return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+class UniqueItemViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
   queryset = UniqueItem.objects.select_related("base_item").all().order_by("name")
-  filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+  filter_backends = [DjangoFilterBackend, filters.SearchFilter, UniqueCatalogOrderingFilter]
   pagination_class = UniquePagination
 
-  filterset_fields = {
-    "base_item": ["exact"],
-    "required_level": ["exact", "gte", "lte"],
-    "base_item__slot": ["exact"],
-    "base_item__item_class": ["exact"],
-  }
+  filterset_class = UniqueCatalogFilter
 
-  search_fields = ["name", "base_item__name"]
+  search_fields = ["name", "base_name"]
 
   ordering_fields = [
     "name", 
@@ -57,21 +305,64 @@ class UniqueItemViewSet(viewsets.ReadOnlyModelViewSet):
     "ancient_meta__tier"
   ]
   
+  # ancient tier first, then untiered ancients, then the rest (see catalog_default_order index)
   ordering = [
-    "has_ancient",
-    F("ancient_meta__tier").asc(nulls_last=True),
+    "ancient_rank",
     F("chaos_value").desc(nulls_last=True),
-    "name"
+    "name",
+    "unique_item_id",
   ]
 
+  @property
+  def paginator(self):
+    # ?cursor= switches the list to keyset pagination (UniqueCursorPagination)
+    if not hasattr(self, "_paginator"):
+      if self.action == "list" and UniqueCursorPagination.cursor_query_param in self.request.query_params:
+        self._paginator = UniqueCursorPagination()
+      else:
+        self._paginator = self.pagination_class()
+    return self._paginator
+
   def _get_league(self) -> League:
-    league_name =(self.request.query_params.get("league") or "" ).strip()
-    if league_name:
-      return get_object_or_404(League, name=league_name)
-    
-    return get_current_league()
+    # once per request: list, get_queryset and the count cache key all need it
+    if not hasattr(self, "_league"):
+      league_name =(self.request.query_params.get("league") or "" ).strip()
+      if league_name:
+        self._league = get_object_or_404(League, name=league_name)
+      else:
+        self._league = get_current_league()
+    return self._league
+
+  def get_count_cache_key(self):
+    # only the params that change which rows match; page/cursor/ordering do not
+    search_param = filters.SearchFilter.search_param
+    params = normalize_params(
+      self.request.query_params,
+      [*self.filterset_class.base_filters, search_param],
+      folded=[search_param],
+    )
+    return versioned_key("uniques:count", self._get_league(), params)
   
-  def list (self, request, *args, **kwargs):
+  def get_cache_version(self):
+    league = self._get_league()
+    return f"{league.pk}.{league.snapshot_version}"
+
+  def get_last_modified(self):
+    return self._get_league().published_at
+
+  def get_meta(self, league: League):
+    return {
+      "league": {"id": league.id, "name": league.name},
+      "catalog": {"version": league.snapshot_version, "published_at": league.published_at},
+    }
+
+  def list(self, request, *args, **kwargs):
+    return self.cached_response(self.list_response, request, *args, **kwargs)
+
+  def retrieve(self, request, *args, **kwargs):
+    return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+  def list_response(self, request, *args, **kwargs):
     league = self._get_league()
 
     queryset = self.filter_queryset(self.get_queryset())
@@ -81,54 +372,114 @@ class UniqueItemViewSet(viewsets.ReadOnlyModelViewSet):
       serializer = self.get_serializer(page, many=True)
       resp = self.get_paginated_response(serializer.data)
 
-      resp.data["meta"] = {
-        "league": {"id": league.id, "name": league.name}
-      }
+      resp.data["meta"] = self.get_meta(league)
       return resp
     
     serializer = self.get_serializer(queryset, many=True)
     return Response({
-      "meta": {"league": {"id": league.id, "name": league.name}},
+      "meta": self.get_meta(league),
       "results": serializer.data
     })
 
   def get_queryset(self):
     """
-
+    The list reads the per-league read model (UniqueItemLeagueCatalog) only. Detail
+    actions look up one UniqueItem, which must be present in the league.
     """
     league = self._get_league()
 
-    qs = UniqueItem.objects.select_related("base_item", "ancient_meta")
+    if self.action == "list":
+      return UniqueItemLeagueCatalog.objects.filter(league_id=league.id)
 
     current_presence = UniqueItemLeaguePresence.objects.filter(
       unique_item_id=OuterRef("pk"),
       league_id = league.id
     )
 
-    qs = qs.annotate(_in_league=Exists(current_presence)).filter(_in_league=True)
+    return UniqueItem.objects.select_related("base_item", "ancient_meta").filter(Exists(current_presence))
 
-    stats_qs = UniqueItemLeagueStats.objects.filter(
-      unique_item_id=OuterRef("pk"),
-      league_id=league.id,
-    ).order_by("-last_fetched_at")
+  def filter_queryset(self, queryset):
+    # list filters/search/ordering are defined on the read model
+    if self.action != "list":
+      return queryset
+    return super().filter_queryset(queryset)
 
-    qs = qs.annotate(
-      chaos_value=Subquery(stats_qs.values("chaos_value")[:1]),
-      divine_value=Subquery(stats_qs.values("divine_value")[:1]),
-      listing_count=Subquery(stats_qs.values("listing_count")[:1]),
-    )
+  @action(detail=True, methods=["get"])
+  def history(self, request, pk=None):
+    """
+    Price series for one unique in a league: ?since= / ?until= (ISO date or datetime),
+    default the last 30 days. Points are only stored when the price changed, so each
+    value holds until the next point; the first point may predate `since`.
+    """
+    league = self._get_league()
+    unique = self.get_object()
 
-    qs = qs.annotate(
-      has_ancient=Case(
-          When(ancient_meta__isnull=False, then=Value(0)),
-          default=Value(1),
-          output_field=IntegerField(),
-      )
-    )
+    until = parse_time_param(request.query_params, "until")
+    since = parse_time_param(request.query_params, "since")
+    if since is None:
+      since = (until or timezone.now()) - dt.timedelta(days=HISTORY_DEFAULT_DAYS)
+
+    series = UniqueItemPriceHistory.objects.filter(unique_item_id=unique.pk, league_id=league.id)
 
-    return qs
+    points = series.filter(bucket__gte=since)
+    if until is not None:
+      points = points.filter(bucket__lt=until)
+
+    # newest first so the cap keeps the most recent points, then back to time order
+    points = list(points.order_by("-bucket")[:HISTORY_MAX_POINTS])
+    points.reverse()
+
+    # the value in effect at `since` is the last point before it
+    if len(points) < HISTORY_MAX_POINTS:
+      opening = series.filter(bucket__lt=since).order_by("-bucket").first()
+      if opening is not None:
+        points.insert(0, opening)
+
+    return Response({
+      "meta": {
+        "league": {"id": league.id, "name": league.name},
+        "unique": {"id": unique.id, "name": unique.name},
+        "since": since,
+        "until": until,
+      },
+      "results": PriceHistorySerializer(points, many=True).data,
+    })
+
+  @action(detail=True, methods=["get"])
+  def daily(self, request, pk=None):
+    """
+    Daily OHLC rollups for one unique in a league: ?since= / ?until= (ISO dates,
+    inclusive), default the last 30 days. Reads at most one rollup row per day in range.
+    """
+    league = self._get_league()
+    unique = self.get_object()
+
+    until = parse_date_param(request.query_params, "until") or timezone.localdate()
+    since = parse_date_param(request.query_params, "since") or until - dt.timedelta(days=HISTORY_DEFAULT_DAYS - 1)
+    if since > until:
+      raise ValidationError({"since": "Must not be after until."})
+    if (until - since).days >= DAILY_MAX_DAYS:
+      raise ValidationError({"since": f"Range is limited to {DAILY_MAX_DAYS} days."})
+
+    series = UniqueItemDailyPrice.objects.filter(unique_item_id=unique.pk, league_id=league.id)
+    rows = list(series.filter(day__gte=since, day__lte=until).order_by("day"))
+    opening = None
+    if not rows or rows[0].day != since:
+      opening = series.filter(day__lt=since).order_by("-day").first()
+
+    return Response({
+      "meta": {
+        "league": {"id": league.id, "name": league.name},
+        "unique": {"id": unique.id, "name": unique.name},
+        "since": since,
+        "until": until,
+      },
+      "results": DailyPriceSerializer(fill_daily_gaps(rows, opening, since, until), many=True).data,
+    })
 
   def get_serializer_class(self):
     if self.action == "retrieve":
       return UniqueItemDetailSerializer
+    if self.action == "list":
+      return UniqueItemCatalogSerializer
     return UniqueItemListSerializer
\ No newline at end of file
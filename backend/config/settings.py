@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -137,4 +138,21 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 18,
 }
 
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# On-disk cache for conditional GETs made by the importers (see catalog/http_client.py)
+HTTP_CACHE_DIR = BASE_DIR / ".cache" / "http"
+
+# API counts and responses (see catalog/caching.py). Local memory is per process; in
+# production point it at a shared store so every worker reuses the same entries, e.g.
+# API_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# API_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": os.environ.get("API_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("API_CACHE_LOCATION", "catalog-api"),
+    },
+}
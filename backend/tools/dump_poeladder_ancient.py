@@ -1,16 +1,31 @@
 from __future__ import annotations
 
 import json
-import os
-import re
+import sys
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from playwright.sync_api import sync_playwright
 
+# tools/ are run as plain scripts from backend/; make the catalog package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog.http_client import atomic_write  # noqa: E402
+from catalog.importers.snapshots import SnapshotArchive  # noqa: E402
+
 
 URL = "https://poeladder.com/ancient"
 
+# snapshot archive (see catalog.importers.snapshots): gzip blobs named by the sha256 of the
+# body, so an unchanged response is never written twice; extract_ancient_belts_from_poeladder
+# reads it directly
+OUT_DIR = Path("ancient_archive")
+MANIFEST = "manifest.json"
+
+# Skip tiny JSON (often feature flags)
+MIN_BYTES = 2000
+
 
 def looks_relevant(url: str) -> bool:
     u = url.lower()
@@ -18,16 +33,30 @@ def looks_relevant(url: str) -> bool:
     return any(k in u for k in ["ancient", "mythic", "calculator", "api", "data", "weights", "outcomes"])
 
 
-def safe_name(url: str) -> str:
-    name = re.sub(r"[^a-zA-Z0-9._-]+", "_", url)
-    return name[:160]
+def write_manifest(archive: SnapshotArchive, captured: list[dict[str, Any]]) -> Path:
+    """
+    manifest.json: {"dumps": [{"captured_at", "responses": [{"url", "blob", "bytes", "fetched_at"}]}]},
+    newest dump last.
+    """
+    path = archive.root / MANIFEST
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {"dumps": []}
+    manifest["dumps"].append({
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "responses": captured,
+    })
+    atomic_write(path, json.dumps(manifest, indent=2).encode("utf-8"))
+    return path
 
 
 def main() -> None:
-    out_dir = Path("ancient_dump")
-    out_dir.mkdir(parents=True, exist_ok=True)
+    archive = SnapshotArchive(OUT_DIR, create=True)
 
-    saved = []
+    captured: list[dict[str, Any]] = []
+    known_blobs = {p.name.removesuffix(".gz") for p in archive.blob_dir.glob("*.gz")}
+    new_blobs = 0
 
     with sync_playwright() as p:
         browser = p.chromium.launch(
@@ -46,6 +75,7 @@ def main() -> None:
         page = context.new_page()
 
         def on_response(resp) -> None:
+            nonlocal new_blobs
             try:
                 ct = (resp.headers.get("content-type") or "").lower()
                 if "application/json" not in ct:
@@ -57,23 +87,26 @@ def main() -> None:
                     # still keep some: many SPAs load JSON from generic endpoints
                     pass
 
-                data: Any = resp.json()
-                raw = json.dumps(data, ensure_ascii=False)
-                # Skip tiny JSON (often feature flags)
-                if len(raw) < 2000:
+                # raw bytes as served; no decode/re-encode round trip
+                body: bytes = resp.body()
+                if len(body) < MIN_BYTES:
                     return
 
-                fname = safe_name(rurl) + ".json"
-                path = out_dir / fname
-
-                # If duplicates, append counter
-                i = 2
-                while path.exists():
-                    path = out_dir / (safe_name(rurl) + f"__{i}.json")
-                    i += 1
-
-                path.write_text(raw, encoding="utf-8")
-                saved.append((len(raw), str(path), rurl))
+                entry = archive.record_body(
+                    rurl,
+                    body,
+                    etag=resp.headers.get("etag"),
+                    last_modified=resp.headers.get("last-modified"),
+                )
+                if entry["blob"] not in known_blobs:
+                    known_blobs.add(entry["blob"])
+                    new_blobs += 1
+                captured.append({
+                    "url": rurl,
+                    "blob": entry["blob"],
+                    "bytes": len(body),
+                    "fetched_at": entry["fetched_at"],
+                })
             except Exception:
                 return
 
@@ -89,11 +122,14 @@ def main() -> None:
 
         browser.close()
 
-    saved.sort(reverse=True, key=lambda x: x[0])
-    print(f"Saved {len(saved)} JSON files to {out_dir.resolve()}")
-    print("Largest files:")
-    for size, path, rurl in saved[:10]:
-        print(f"- {size:>8} bytes  {path}  <- {rurl}")
+    manifest = write_manifest(archive, captured)
+
+    captured.sort(reverse=True, key=lambda x: x["bytes"])
+    print(f"Captured {len(captured)} JSON responses into {archive.root.resolve()} ({new_blobs} new blobs)")
+    print(f"Manifest: {manifest}")
+    print("Largest responses:")
+    for row in captured[:10]:
+        print(f"- {row['bytes']:>8} bytes  {row['blob'][:12]}  <- {row['url']}")
 
 
 if __name__ == "__main__":
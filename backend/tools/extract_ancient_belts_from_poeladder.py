@@ -1,38 +1,107 @@
 from __future__ import annotations
 
+import argparse
 import json
-import time
+import sys
 from pathlib import Path
-from typing import Any, Iterable
-from urllib.request import Request, urlopen
+from typing import Any
 
+# tools/ are run as plain scripts from backend/; make the catalog package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-DUMP_FILE = Path("ancient_dump/https_poeladder.com_api_v1_uniques_bases_ancientable_1.json")
-OUT_FILE = Path("data/ancient_belts.json")
-
-SLEEP_S = 0.25  # be polite
+from catalog.http_client import HttpClient, HttpResult  # noqa: E402
+from catalog.importers.fetching import TokenBucket, fetch_concurrently  # noqa: E402
+from catalog.importers.snapshots import SnapshotArchive, SnapshotError  # noqa: E402
 
 
-def fetch_json(url: str, *, timeout_s: int = 30) -> Any:
-    req = Request(
-        url,
-        headers={
-            "User-Agent": "poe-uniques-importer/1.0 (+django)",
-            "Accept": "application/json",
-        },
-        method="GET",
+# archive written by dump_poeladder_ancient, else a single saved response
+DUMP_ARCHIVE = Path("ancient_archive")
+DUMP_FILE = Path("ancient_dump/https_poeladder.com_api_v1_uniques_bases_ancientable_1.json")
+BASES_URL_PART = "/uniques/bases/ancientable"
+OUT_DIR = Path("data")
+
+# per-base payloads are cached here and revalidated with ETag/Last-Modified, so a
+# rerun only downloads bases whose payload changed
+CACHE_DIR = Path(".cache/http")
+
+RATE = 4.0  # requests per second across all workers; be polite
+WORKERS = 4
+RETRIES = 3
+
+SOURCE = "poeladder (community; Prohibited Library-based)"
+
+# poeladder category (without the "(2x4)" size suffix), lowercased -> UniqueAncientMeta pool
+CATEGORY_POOLS = {
+    "amulet": "amulet",
+    "belt": "belt",
+    "ring": "ring",
+    "helmet": "helmet",
+    "body armour": "body",
+    "gloves": "gloves",
+    "boots": "boots",
+    "shield": "shield",
+    **dict.fromkeys(
+        [
+            "bow", "claw", "dagger", "fishing rod", "wand", "sceptre", "staff",
+            "one hand axe", "one hand mace", "one hand sword",
+            "two hand axe", "two hand mace", "two hand sword",
+        ],
+        "weapon",
+    ),
+}
+
+# output file per pool; import_ancient_meta reads the pool back from the file name
+POOL_FILES = {
+    "amulet": "ancient_amulets.json",
+    "belt": "ancient_belts.json",
+    "ring": "ancient_rings.json",
+    "helmet": "ancient_helmets.json",
+    "body": "ancient_body_armours.json",
+    "gloves": "ancient_gloves.json",
+    "boots": "ancient_boots.json",
+    "shield": "ancient_shields.json",
+    "weapon": "ancient_weapons.json",
+}
+
+ODDS_KEYS = frozenset({"tier", "chance", "avgOrbs", "avg_orbs", "minIlvl", "min_ilvl"})
+
+# subtrees of a per-base payload that never hold unique rows; mods carry a name and a
+# tier of their own and would otherwise be taken for rows
+SKIP_KEYS = frozenset({
+    "user", "messages", "icon", "image", "flavourText", "properties", "requirements",
+    "implicitMods", "explicitMods", "mods", "stats", "tags",
+})
+
+
+def load_dump(path: Path) -> Any:
+    """The ancientable base list from a snapshot archive directory or a JSON file."""
+    if not path.is_dir():
+        return json.loads(path.read_text(encoding="utf-8"))
+    try:
+        archive = SnapshotArchive(path)
+    except SnapshotError as exc:
+        raise SystemExit(str(exc))
+    entries = sorted(
+        (e for e in archive.entries() if BASES_URL_PART in str(e.get("url", ""))),
+        key=lambda e: str(e.get("fetched_at", "")),
     )
-    with urlopen(req, timeout=timeout_s) as resp:
-        raw = resp.read().decode("utf-8")
-    return json.loads(raw)
+    if not entries:
+        raise SystemExit(f"No {BASES_URL_PART} response in {path}")
+    return archive.lookup(str(entries[-1]["url"])).json()
+
 
+def category_pool(category: str) -> str | None:
+    name = category.split("(")[0].strip().lower()
+    return CATEGORY_POOLS.get(name)
 
-def find_belt_bases(payload: Any) -> list[dict[str, Any]]:
+
+def find_bases(payload: Any, pools: set[str] | None = None) -> list[tuple[str, dict[str, Any]]]:
     """
     Expected shape:
     { ..., "baseItems": [ { "category": "Amulet", "baseItems": [ ... ] }, ... ] }
 
-    Returns the list of base items under category "Belt".
+    Returns (pool, base item) for every base in a category with a known pool,
+    optionally limited to `pools`.
     """
     if not isinstance(payload, dict):
         raise ValueError("Dump payload is not a dict")
@@ -41,47 +110,55 @@ def find_belt_bases(payload: Any) -> list[dict[str, Any]]:
     if not isinstance(groups, list):
         raise ValueError("Dump payload has no 'baseItems' list")
 
+    out: list[tuple[str, dict[str, Any]]] = []
+    skipped: set[str] = set()
     for g in groups:
         if not isinstance(g, dict):
             continue
-        if str(g.get("category", "")).lower() == "belt":
-            bases = g.get("baseItems", [])
-            if isinstance(bases, list):
-                # each item should have: name, identifier, url, uniqueCount
-                return [b for b in bases if isinstance(b, dict) and b.get("url")]
-    return []
-
+        category = str(g.get("category", ""))
+        pool = category_pool(category)
+        if pool is None:
+            skipped.add(category)
+            continue
+        if pools and pool not in pools:
+            continue
+        bases = g.get("baseItems", [])
+        if isinstance(bases, list):
+            # each item should have: name, identifier, url, uniqueCount
+            out.extend((pool, b) for b in bases if isinstance(b, dict) and b.get("url"))
 
-def walk(obj: Any) -> Iterable[Any]:
-    """Yield all nested values (dict/list tree walk)."""
-    yield obj
-    if isinstance(obj, dict):
-        for v in obj.values():
-            yield from walk(v)
-    elif isinstance(obj, list):
-        for v in obj:
-            yield from walk(v)
+    if skipped:
+        print(f"Skipping categories without an Ancient Orb pool: {', '.join(sorted(skipped))}")
+    return out
 
 
 def looks_like_unique_row(d: dict[str, Any]) -> bool:
     # We expect at least a name, and at least one of these odds-ish fields.
-    if not d.get("name"):
-        return False
-    keys = set(d.keys())
-    odds_keys = {"tier", "chance", "avgOrbs", "avg_orbs", "minIlvl", "min_ilvl"}
-    return len(keys.intersection(odds_keys)) > 0
+    return bool(d.get("name")) and not ODDS_KEYS.isdisjoint(d)
 
 
-def extract_unique_rows(any_payload: Any) -> list[dict[str, Any]]:
+def extract_unique_rows(payload: Any) -> list[dict[str, Any]]:
     """
-    We don't know the exact per-base payload shape yet, so we:
-    - walk all nested dicts
-    - keep dicts that look like unique entries with odds fields
+    Collect dicts that look like unique entries with odds fields, in document order.
+    The walk uses an explicit stack, stops at a matched row instead of descending into
+    it, and skips scalar values and SKIP_KEYS subtrees.
     """
     out: list[dict[str, Any]] = []
-    for node in walk(any_payload):
-        if isinstance(node, dict) and looks_like_unique_row(node):
-            out.append(node)
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if looks_like_unique_row(node):
+                out.append(node)
+                continue
+            children = [v for k, v in node.items() if k not in SKIP_KEYS]
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        # pushed last-to-first so the first child is visited next: a pre-order walk,
+        # which keeps document order at every depth for the "first wins" ties in merge_row
+        stack.extend(v for v in reversed(children) if isinstance(v, (dict, list)))
     return out
 
 
@@ -107,72 +184,108 @@ def to_int(x: Any) -> int | None:
         return None
 
 
-def main() -> None:
-    if not DUMP_FILE.exists():
-        raise SystemExit(f"Missing dump file: {DUMP_FILE}")
+def to_meta_row(c: dict[str, Any], pool: str) -> dict[str, Any] | None:
+    name = norm_name(str(c.get("name", "")))
+    if not name:
+        return None
+    return {
+        "name": name,
+        "pool": pool,
+        "tier": c.get("tier"),
+        "chance": to_float(c.get("chance")),  # float 0..100? or 0..1? depends on source; we'll keep raw
+        "avg_orbs": to_int(c.get("avgOrbs") if "avgOrbs" in c else c.get("avg_orbs")),
+        "min_ilvl": to_int(c.get("minIlvl") if "minIlvl" in c else c.get("min_ilvl")),
+        "source": SOURCE,
+    }
+
+
+def merge_row(rows: dict[str, dict[str, Any]], row: dict[str, Any]) -> None:
+    # Deduplicate by name: keep the row with the *lowest* avg_orbs if present
+    key = row["name"].lower()
+    existing = rows.get(key)
+    if existing is None:
+        rows[key] = row
+        return
+    old = existing.get("avg_orbs")
+    new = row.get("avg_orbs")
+    if isinstance(new, int) and (not isinstance(old, int) or new < old):
+        rows[key] = row
 
-    dump = json.loads(DUMP_FILE.read_text(encoding="utf-8"))
-    belt_bases = find_belt_bases(dump)
-    if not belt_bases:
-        raise SystemExit("Could not find category 'Belt' in dump JSON")
 
-    print(f"Found {len(belt_bases)} belt bases")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract Ancient Orb odds per pool from poeladder.")
+    parser.add_argument(
+        "--pool",
+        action="append",
+        choices=sorted(POOL_FILES),
+        help="Only extract these pools (repeatable). Default: all",
+    )
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent downloads. Default: {WORKERS}")
+    parser.add_argument("--rate", type=float, default=RATE, help=f"Requests per second. Default: {RATE}")
+    parser.add_argument("--no-cache", action="store_true", help="Always download every base payload.")
+    parser.add_argument(
+        "--dump",
+        type=Path,
+        default=DUMP_ARCHIVE if DUMP_ARCHIVE.exists() else DUMP_FILE,
+        help=f"Snapshot archive from dump_poeladder_ancient or a saved JSON response. Default: {DUMP_ARCHIVE}, else {DUMP_FILE}",
+    )
+    args = parser.parse_args()
 
-    all_uniques: dict[str, dict[str, Any]] = {}
+    if not args.dump.exists():
+        raise SystemExit(f"Missing dump file: {args.dump}")
 
-    for i, base in enumerate(belt_bases, start=1):
-        base_name = base.get("name")
-        url = base.get("url")
-        if not url:
-            continue
+    dump = load_dump(args.dump)
+    bases = find_bases(dump, set(args.pool or []))
+    if not bases:
+        raise SystemExit("Could not find any matching categories in dump JSON")
 
-        print(f"[{i}/{len(belt_bases)}] {base_name} -> {url}")
+    print(f"Found {len(bases)} bases")
 
-        payload = fetch_json(str(url))
-        candidates = extract_unique_rows(payload)
+    client = HttpClient(cache_dir=None if args.no_cache else CACHE_DIR, pool_size=max(1, args.workers))
+    # keyed by index: a base can be listed in more than one category
+    urls = {i: str(base["url"]) for i, (_, base) in enumerate(bases)}
+    by_pool: dict[str, dict[str, dict[str, Any]]] = {}
+    not_modified = 0
 
-        # Convert candidates into our normalized format
-        for c in candidates:
-            name = norm_name(str(c.get("name", "")))
-            if not name:
-                continue
+    def fetch(url: str) -> HttpResult:
+        # validators are only stored once the payload has been parsed
+        return client.get(url, store=False)
 
-            tier = c.get("tier")
-            chance = to_float(c.get("chance"))
-            avg_orbs = to_int(c.get("avgOrbs") if "avgOrbs" in c else c.get("avg_orbs"))
-            min_ilvl = to_int(c.get("minIlvl") if "minIlvl" in c else c.get("min_ilvl"))
-
-            row = {
-                "name": name,
-                "pool": "belt",
-                "tier": tier,
-                "chance": chance,       # float 0..100? or 0..1? depends on source; we'll keep raw
-                "avg_orbs": avg_orbs,
-                "min_ilvl": min_ilvl,
-                "source": "poeladder (community; Prohibited Library-based)",
-            }
-
-            # Deduplicate by name: keep the row with the *lowest* avg_orbs if present
-            key = name.lower()
-            existing = all_uniques.get(key)
-            if existing is None:
-                all_uniques[key] = row
-            else:
-                old = existing.get("avg_orbs")
-                new = row.get("avg_orbs")
-                if isinstance(new, int) and (not isinstance(old, int) or new < old):
-                    all_uniques[key] = row
-
-        time.sleep(SLEEP_S)
-
-    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    out_list = sorted(all_uniques.values(), key=lambda r: r["name"].lower())
-    OUT_FILE.write_text(json.dumps(out_list, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    print(f"\nWrote {len(out_list)} unique belt rows to: {OUT_FILE}")
-    print("Sample:")
-    for r in out_list[:10]:
-        print(" -", r["name"], r.get("tier"), r.get("avg_orbs"), r.get("chance"), r.get("min_ilvl"))
+    try:
+        for done, (i, result) in enumerate(
+            fetch_concurrently(
+                fetch,
+                urls,
+                limiter=TokenBucket(rate=args.rate),
+                max_workers=args.workers,
+                retries=RETRIES,
+            ),
+            start=1,
+        ):
+            pool, base = bases[i]
+            status = "not modified" if result.not_modified else "downloaded"
+            print(f"[{done}/{len(bases)}] {base.get('name')} ({pool}) -> {status}")
+            not_modified += result.not_modified
+
+            rows = by_pool.setdefault(pool, {})
+            for c in extract_unique_rows(result.json()):
+                row = to_meta_row(c, pool)
+                if row is not None:
+                    merge_row(rows, row)
+            client.store(result)
+    finally:
+        client.close()
+
+    print(f"\n{not_modified}/{len(bases)} base payloads unchanged since the last run")
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    for pool, rows in sorted(by_pool.items()):
+        out_file = OUT_DIR / POOL_FILES[pool]
+        out_list = sorted(rows.values(), key=lambda r: r["name"].lower())
+        out_file.write_text(json.dumps(out_list, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Wrote {len(out_list)} unique {pool} rows to: {out_file}")
+        for r in out_list[:5]:
+            print(" -", r["name"], r.get("tier"), r.get("avg_orbs"), r.get("chance"), r.get("min_ilvl"))
 
 
 if __name__ == "__main__":
@@ -1,42 +1,70 @@
 from __future__ import annotations
 
+import argparse
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Iterable
 
-from playwright.sync_api import sync_playwright, Page, Response
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import sync_playwright, Page
 
 
 URL = "https://poeladder.com/ancient"
-OUT_FILE = Path("data/ancient_belts.json")
-
-WAIT_MS = 600
-
-
-def walk(obj: Any) -> Iterable[Any]:
-    yield obj
-    if isinstance(obj, dict):
-        for v in obj.values():
-            yield from walk(v)
-    elif isinstance(obj, list):
-        for v in obj:
-            yield from walk(v)
-
-
-def looks_like_unique_row(d: dict[str, Any]) -> bool:
-    if not d.get("name"):
-        return False
-    odds_keys = {"tier", "chance", "avgOrbs", "avg_orbs", "minIlvl", "min_ilvl"}
-    return any(k in d for k in odds_keys)
-
-
-def extract_unique_rows(payload: Any) -> list[dict[str, Any]]:
-    out: list[dict[str, Any]] = []
-    for node in walk(payload):
-        if isinstance(node, dict) and looks_like_unique_row(node):
-            out.append(node)
-    return out
+OUT_DIR = Path("data")
+
+SOURCE = "poeladder (community; Prohibited Library-based)"
+
+# categories scraped by default, as labelled in the page's Category dropdown
+DEFAULT_CATEGORIES = ["Belt", "Ring", "Amulet", "Helmet", "Body Armour", "Gloves", "Boots"]
+
+# category label without a "(2x4)" size suffix, lowercased -> UniqueAncientMeta pool
+CATEGORY_POOLS = {
+    "amulet": "amulet",
+    "belt": "belt",
+    "ring": "ring",
+    "helmet": "helmet",
+    "body armour": "body",
+    "gloves": "gloves",
+    "boots": "boots",
+    "shield": "shield",
+    **dict.fromkeys(
+        [
+            "bow", "claw", "dagger", "fishing rod", "wand", "sceptre", "staff",
+            "one hand axe", "one hand mace", "one hand sword",
+            "two hand axe", "two hand mace", "two hand sword",
+        ],
+        "weapon",
+    ),
+}
+
+# output file per pool; import_ancient_meta reads the pool back from the file name
+POOL_FILES = {
+    "amulet": "ancient_amulets.json",
+    "belt": "ancient_belts.json",
+    "ring": "ancient_rings.json",
+    "helmet": "ancient_helmets.json",
+    "body": "ancient_body_armours.json",
+    "gloves": "ancient_gloves.json",
+    "boots": "ancient_boots.json",
+    "shield": "ancient_shields.json",
+    "weapon": "ancient_weapons.json",
+}
+
+TABLE_ROWS = ".MuiTableContainer-root tbody tr"
+
+# every cell of the current table page in one round trip
+READ_TABLE_JS = """(sel) => Array.from(
+    document.querySelectorAll(sel),
+    tr => Array.from(tr.querySelectorAll('td'), td => (td.innerText || '').trim())
+)"""
+
+NEXT_PAGE_BUTTON = 'button:has(svg path[d="M8.59 16.34l4.58-4.59-4.58-4.59L10 5.75l6 6-6 6z"])'
+
+
+def category_pool(category: str) -> str | None:
+    name = category.split("(")[0].strip().lower()
+    return CATEGORY_POOLS.get(name)
 
 
 def norm_name(s: str) -> str:
@@ -61,14 +89,20 @@ def to_int(x: Any) -> int | None:
         return None
 
 
-def click_category_belt(page: Page) -> None:
+def to_chance(x: str) -> float | None:
+    # "4.36%" -> 0.0436
+    pct = to_float(x.replace("%", "")) if "%" in x else None
+    return None if pct is None else pct / 100
+
+
+def click_category(page: Page, category: str) -> None:
     """
     Custom ARIA combobox: find the combobox in the same row as the 'Category:' label,
-    open it, then pick 'Belt'.
+    open it, then pick `category`.
     """
     # Find the "Category:" label, then look for a combobox near it
     label = page.get_by_text("Category:", exact=False).first
-    label.scroll_into_view_if_needed()
+    label.scroll_into_view_if_needed(timeout=60_000)
 
     # Heuristic: combobox in the same parent row/container as the label
     row = label.locator("..")
@@ -82,32 +116,20 @@ def click_category_belt(page: Page) -> None:
     combo.click(timeout=20_000)
 
     # Try the clean ARIA way first: role=option
-    opt = page.get_by_role("option", name="Belt", exact=True)
+    opt = page.get_by_role("option", name=category, exact=True)
     if opt.count() > 0:
         opt.first.click(timeout=20_000)
     else:
         # Fallback: click by text in the opened list
-        page.locator('text="Belt"').first.click(timeout=20_000)
-
-    page.wait_for_timeout(WAIT_MS)
+        page.locator(f'text="{category}"').first.click(timeout=20_000)
 
 
-def wait_for_base_dropdown_ready(page: Page) -> None:
-    """
-    After selecting category, the UI should render a base selector.
-    We don't know its exact placeholder text, so we just wait for the API that lists bases.
-    """
-    # If the page makes an API call listing ancientable bases for that category, great.
-    # Otherwise, we fall back to waiting a bit.
-    page.wait_for_timeout(1200)
-
 def click_next_page(page: Page) -> bool:
     """
     Click the MUI pagination 'next' IconButton that contains the chevron-right svg path.
     Returns False if it looks disabled / not found.
     """
-    # This targets the exact <path> for the chevron-right icon you pasted.
-    btn = page.locator('button:has(svg path[d="M8.59 16.34l4.58-4.59-4.58-4.59L10 5.75l6 6-6 6z"])').first
+    btn = page.locator(NEXT_PAGE_BUTTON).first
 
     if btn.count() == 0:
         return False
@@ -119,16 +141,6 @@ def click_next_page(page: Page) -> bool:
     btn.click()
     return True
 
-def first_row_name(page: Page) -> str:
-    container = page.locator(".MuiTableContainer-root").first
-    rows = container.locator("tbody tr")
-    if rows.count() == 0:
-        return ""
-    cells = rows.nth(0).locator("td")
-    if cells.count() < 2:
-        return ""
-    return (cells.nth(1).inner_text() or "").strip()
-
 
 def get_open_menu_options(page: Page) -> list[str]:
     """
@@ -155,49 +167,67 @@ def get_open_menu_options(page: Page) -> list[str]:
 
     return [t.strip() for t in opts.all_text_contents() if t and t.strip()]
 
-def extract_belt_table(page: Page):
-    container = page.locator(".MuiTableContainer-root").first
-    container.wait_for(state="visible", timeout=20_000)
 
-    rows = container.locator("tbody tr")
-    count = rows.count()
-    print(f"Found {count} belt unique rows.")
+def maximize_rows_per_page(page: Page) -> None:
+    """Pick the largest "Rows per page" option of the MUI pagination, if it has one."""
+    select = page.locator(".MuiTablePagination-root [role='combobox'], .MuiTablePagination-select").first
+    if select.count() == 0:
+        return
+    select.click()
+    sizes = [int(t) for t in get_open_menu_options(page) if t.isdigit()]
+    if not sizes:
+        page.keyboard.press("Escape")
+        return
+
+    before = page.locator(TABLE_ROWS).count()
+    page.get_by_role("option", name=str(max(sizes)), exact=True).first.click()
+    try:
+        page.wait_for_function(
+            "([sel, n]) => document.querySelectorAll(sel).length !== n",
+            arg=[TABLE_ROWS, before],
+            timeout=5_000,
+        )
+    except PlaywrightTimeoutError:
+        # everything already fit on the first page
+        pass
 
-    data = []
 
-    for i in range(count):
-        row = rows.nth(i)
-        cells = row.locator("td")
+def read_table(page: Page) -> list[list[str]]:
+    return page.evaluate(READ_TABLE_JS, TABLE_ROWS)
 
-        if cells.count() < 6:
+
+def parse_rows(cells: Iterable[list[str]], pool: str) -> list[dict[str, Any]]:
+    data = []
+    for row in cells:
+        if len(row) < 6:
             continue
 
-        name = cells.nth(1).inner_text().strip()
-        tier = cells.nth(2).inner_text().strip()
-        min_ilvl = cells.nth(3).inner_text().strip()
-        avg_orbs = cells.nth(4).inner_text().strip()
-        chance = cells.nth(5).inner_text().strip()
+        name = norm_name(row[1])
+        tier, min_ilvl, avg_orbs, chance = row[2], row[3], row[4], row[5]
+        if not name:
+            continue
 
         data.append({
             "name": name,
-            "pool": "belt",
+            "pool": pool,
             "tier": tier,
-            "min_ilvl": int(min_ilvl) if min_ilvl.isdigit() else None,
-            "avg_orbs": int(avg_orbs.replace(",", "")) if avg_orbs else None,
-            "chance": float(chance.replace("%", "")) / 100 if "%" in chance else None,
-            "source": "poeladder (community; Prohibited Library-based)"
+            "min_ilvl": to_int(min_ilvl),
+            "avg_orbs": to_int(avg_orbs.replace(",", "")),
+            "chance": to_chance(chance),
+            "source": SOURCE,
         })
 
     return data
 
 
+def scrape_category(category: str, pool: str, *, headless: bool) -> list[dict[str, Any]]:
+    """Scrape every table page of one category in its own browser."""
+    rows: dict[str, dict[str, Any]] = {}
 
-def main() -> None:
-    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-
+    # the sync API is per thread: every worker drives its own playwright/browser
     with sync_playwright() as p:
         browser = p.chromium.launch(
-            headless=False,  # keep visible to reduce bot-blocking
+            headless=headless,
             args=["--disable-blink-features=AutomationControlled"],
         )
         context = browser.new_context(
@@ -209,34 +239,23 @@ def main() -> None:
         )
         page = context.new_page()
         page.goto(URL, wait_until="domcontentloaded", timeout=60_000)
-        page.wait_for_timeout(2000)
-
-        # 1) Choose category: Belt (combobox-based)
-        click_category_belt(page)
 
-        # 2) Wait for the MUI table to render
-        page.locator(".MuiTableContainer-root").first.wait_for(state="visible", timeout=20_000)
-        page.wait_for_timeout(800)
+        click_category(page, category)
+        page.locator(TABLE_ROWS).first.wait_for(state="visible", timeout=20_000)
+        maximize_rows_per_page(page)
 
-        # 3) Extract belt outcomes directly from the table
-        belt_data = extract_belt_table(page)
-
-        all_rows: dict[str, dict[str, Any]] = {}
-
-        # Read pages until Next is disabled
+        pages = 0
         while True:
-            page_rows = extract_belt_table(page)
-            for r in page_rows:
-                all_rows[r["name"].lower()] = r  # dedupe by name
+            cells = read_table(page)
+            pages += 1
+            for r in parse_rows(cells, pool):
+                rows[r["name"].lower()] = r  # dedupe by name
 
-            before = first_row_name(page)
-
-            moved = click_next_page(page)
-            if not moved:
+            before = cells[0][1] if cells and len(cells[0]) > 1 else ""
+            if not click_next_page(page):
                 break
 
             # wait for page contents to change
-            page.wait_for_timeout(200)
             page.wait_for_function(
                 """(prev) => {
                     const first = document.querySelector('.MuiTableContainer-root tbody tr td:nth-child(2)');
@@ -245,23 +264,62 @@ def main() -> None:
                 arg=before,
                 timeout=20_000,
             )
-            page.wait_for_timeout(300)
 
-        belt_data = sorted(all_rows.values(), key=lambda r: r["name"].lower())
+        browser.close()
 
+    print(f"{category}: {len(rows)} rows from {pages} page(s)")
+    return list(rows.values())
 
-        browser.close()
 
-    # 4) Write snapshot JSON to disk
-    OUT_FILE.write_text(
-        json.dumps(belt_data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scrape Ancient Orb outcome tables from poeladder.")
+    parser.add_argument(
+        "--category",
+        action="append",
+        help=f"Category as labelled on the page (repeatable). Default: {', '.join(DEFAULT_CATEGORIES)}",
     )
-
-    print(f"Wrote {len(belt_data)} belt rows -> {OUT_FILE}")
-    print("Sample:")
-    for r in belt_data[:10]:
-        print(" -", r["name"], r.get("tier"), r.get("avg_orbs"), r.get("chance"), r.get("min_ilvl"))
+    parser.add_argument("--concurrency", type=int, default=3, help="Categories scraped at once. Default: 3")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Hide the browser windows (visible by default to reduce bot-blocking).",
+    )
+    args = parser.parse_args()
+
+    # quivers, jewels or a mistyped --category would otherwise land in some pool's file
+    pools: dict[str, str] = {}
+    skipped: list[str] = []
+    for category in dict.fromkeys(args.category or DEFAULT_CATEGORIES):
+        pool = category_pool(category)
+        if pool is None:
+            skipped.append(category)
+        else:
+            pools[category] = pool
+    if skipped:
+        print(f"Skipping categories without an Ancient Orb pool: {', '.join(skipped)}")
+    if not pools:
+        raise SystemExit("No categories to scrape")
+
+    categories = list(pools)
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        results = list(executor.map(lambda c: scrape_category(c, pools[c], headless=args.headless), categories))
+
+    by_pool: dict[str, dict[str, dict[str, Any]]] = {}
+    for category, rows in zip(categories, results):
+        pool_rows = by_pool.setdefault(pools[category], {})
+        for r in rows:
+            pool_rows[r["name"].lower()] = r
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    for pool, rows in sorted(by_pool.items()):
+        out_file = OUT_DIR / POOL_FILES[pool]
+        data = sorted(rows.values(), key=lambda r: r["name"].lower())
+        out_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        print(f"Wrote {len(data)} {pool} rows -> {out_file}")
+        print("Sample:")
+        for r in data[:10]:
+            print(" -", r["name"], r.get("tier"), r.get("avg_orbs"), r.get("chance"), r.get("min_ilvl"))
 
 
 if __name__ == "__main__":
@@ -35,6 +35,7 @@ export type Paginated<T> = {
   results: T[];
   meta?: {
     league?: LeagueMeta;
+    catalog?: CatalogMeta;
   }
 }
 
@@ -48,4 +49,9 @@ export type UniqueQuery = {
 export type LeagueMeta = {
   id: number;
   name: string;
-}
\ No newline at end of file
+}
+
+export type CatalogMeta = {
+  version: number;
+  published_at: string | null;
+}